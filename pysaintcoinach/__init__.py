@@ -10,7 +10,7 @@ except:
 
 _SAINTCOINACH_HOME = Path(_SCRIPT_PATH, '..', 'SaintCoinach', 'SaintCoinach')
 
-from .ex import Language
+from .ex import Language, SheetCachePolicy
 from .ex.relational.definition import RelationDefinition, SheetDefinition
 from .xiv import XivCollection
 from .pack import PackCollection
@@ -47,10 +47,17 @@ class ARealmReversed(object):
     @property
     def is_current_version(self): return self.game_version == self.definition_version
 
-    def __init__(self, game_path: str, language: Language):
+    def __init__(self,
+                 game_path: str,
+                 language: Language,
+                 cache_directory: str = None,
+                 cache_policy: SheetCachePolicy = None,
+                 shared_state: dict = None):
         self._game_directory = Path(game_path)
-        self._packs = PackCollection(self._game_directory.joinpath('game', 'sqpack'))
-        self._game_data = XivCollection(self._packs)
+        self._packs = PackCollection(self._game_directory.joinpath('game', 'sqpack'),
+                                     cache_directory=cache_directory,
+                                     shared_state=shared_state)
+        self._game_data = XivCollection(self._packs, cache_policy)
         self._game_data.active_language = language
 
         self._game_version = self._game_directory.joinpath('game', 'ffxivgame.ver').read_text()
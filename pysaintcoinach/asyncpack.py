@@ -0,0 +1,206 @@
+import asyncio
+import os
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, TimeoutError
+from threading import Event
+from typing import AsyncIterator, Iterable, Tuple
+
+from .file import File
+from .pack import PackCollection
+
+
+class AsyncPackCollection(object):
+    """
+    Asyncio facade over a `PackCollection`.
+
+    Reading from the dat files runs on `io_executor` and inflating on
+    `inflate_executor`, so each can be sized for the disk and the CPU
+    respectively. Concurrent requests for the same file share a single read.
+    """
+
+    DEFAULT_IO_WORKERS = 4
+
+    # Files read ahead of the consumer of `extract_many`.
+    DEFAULT_READ_AHEAD = 16
+
+    # Seconds between checks, by a thread blocked on a full `extract_many`
+    # queue, of whether the consumer stopped.
+    PUT_POLL_INTERVAL = 0.1
+
+    @property
+    def collection(self) -> PackCollection: return self._collection
+
+    @property
+    def io_executor(self) -> Executor: return self._io_executor
+
+    @property
+    def inflate_executor(self) -> Executor: return self._inflate_executor
+
+    def __init__(self,
+                 collection: PackCollection,
+                 io_executor: Executor = None,
+                 inflate_executor: Executor = None):
+        self._collection = collection
+        self._owned_executors = []
+        if io_executor is None:
+            io_executor = ThreadPoolExecutor(max_workers=self.DEFAULT_IO_WORKERS,
+                                             thread_name_prefix='pack-io')
+            self._owned_executors.append(io_executor)
+        if inflate_executor is None:
+            inflate_executor = ThreadPoolExecutor(max_workers=os.cpu_count(),
+                                                  thread_name_prefix='pack-inflate')
+            self._owned_executors.append(inflate_executor)
+        self._io_executor = io_executor
+        self._inflate_executor = inflate_executor
+        # Reads in flight, by event loop and path.
+        self._pending = {}  # type: dict[Tuple[int, str], asyncio.Future]
+
+    def __repr__(self):
+        return "AsyncPackCollection(%s)" % self.collection.data_directory
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the executors created by this facade.
+        """
+        for executor in self._owned_executors:
+            executor.shutdown(wait=False)
+        self._owned_executors = []
+
+    async def file_exists(self, path: str) -> bool:
+        return await self._run_io(self.collection.file_exists, path)
+
+    async def get_file(self, path: str) -> File:
+        return await self._run_io(self.collection.get_file, path)
+
+    async def get_data(self, path: str) -> bytes:
+        """
+        Gets the data of a file, or None if it does not exist.
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), path.lower())
+        future = self._pending.get(key)
+        if future is None:
+            future = loop.create_task(self.__get_data(path))
+            self._pending[key] = future
+            future.add_done_callback(lambda f: self._pending.pop(key, None))
+        # Callers cancelling must not cancel the read shared with others.
+        return await asyncio.shield(future)
+
+    async def get_image(self, path: str):
+        """
+        Gets a file as an image, or None if it does not exist.
+        """
+        # Fetch the data first so concurrent requests share its read.
+        if await self.get_data(path) is None:
+            return None
+        file = await self.get_file(path)
+        return await self._run_inflate(file.get_image)
+
+    async def __get_data(self, path: str) -> bytes:
+        file = await self.get_file(path)
+        if file is None:
+            return None
+
+        data = file.pack.payload_cache.get(file.cache_key)
+        if file.pack.statistics is not None:
+            file.pack.statistics.add('cache_misses' if data is None else 'cache_hits')
+        if data is not None:
+            return data
+
+        store = file.pack.blob_store
+        if store is not None:
+            data = await self._run_io(store.get, file.blob_key)
+        if data is None:
+            blocks = await self._run_io(file._read_sources)
+            data = await self._run_inflate(file._inflate_blocks, blocks, file._get_padded_length())
+            if store is not None:
+                await self._run_io(store.put, file.blob_key, data)
+        return file.pack.payload_cache.put(file.cache_key, data)
+
+    async def extract_many(self,
+                           paths: Iterable[str],
+                           max_gap: int = None,
+                           max_span: int = None,
+                           read_ahead: int = DEFAULT_READ_AHEAD) -> AsyncIterator[Tuple[str, bytes]]:
+        """
+        Yields the path and data of each file as `PackCollection.extract_many`
+        reads them, in dat file and offset order. Paths that could not be
+        found are yielded last, with None as their data.
+
+        Files are read on `io_executor` and inflated on `inflate_executor`.
+        Reading pauses once `read_ahead` files are waiting for the consumer,
+        and stops if the consumer stops iterating.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(read_ahead)
+        done = object()
+        stopped = Event()
+
+        def _discard():
+            # Drop whatever was read ahead, unblocking the reading thread.
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not done and isinstance(item[1], Future):
+                    item[1].cancel()
+
+        async def _enqueue(item):
+            await queue.put(item)
+            if stopped.is_set():
+                # The consumer left while this item was waiting for room.
+                _discard()
+
+        def _put(item):
+            # Blocks the reading thread while the queue is full, until the
+            # consumer takes an item or stops iterating.
+            future = asyncio.run_coroutine_threadsafe(_enqueue(item), loop)
+            while True:
+                try:
+                    return future.result(self.PUT_POLL_INTERVAL)
+                except TimeoutError:
+                    if stopped.is_set() or loop.is_closed():
+                        future.cancel()
+                        if item is not done and isinstance(item[1], Future):
+                            item[1].cancel()
+                        return
+
+        def _extract():
+            missing = []
+            try:
+                for file, data, blocks in self.collection._read_many(paths, missing, max_gap, max_span):
+                    if stopped.is_set():
+                        break
+                    if data is None:
+                        data = self.inflate_executor.submit(file._inflate_stored, blocks)
+                    _put((file.path, data))
+            finally:
+                if not stopped.is_set():
+                    _put(done)
+            return missing
+
+        task = loop.run_in_executor(self.io_executor, _extract)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                path, data = item
+                if isinstance(data, Future):
+                    data = await asyncio.wrap_future(data)
+                yield path, data
+            missing = await task
+        finally:
+            stopped.set()
+            _discard()
+        for path in missing:
+            yield path, None
+
+    def _run_io(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self.io_executor, func, *args)
+
+    def _run_inflate(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self.inflate_executor, func, *args)
@@ -0,0 +1,185 @@
+from pathlib import Path
+import hashlib
+import logging
+import os
+import struct
+import zlib
+from threading import Lock
+from typing import Tuple
+
+from .util import replace_file
+
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore(object):
+    """
+    Size-capped on-disk store of decompressed file payloads.
+
+    Blobs are addressed by a digest of the pack, dat file, offset and
+    compressed size of the file they came from plus the game version, so a
+    patch that moves or repacks a file never serves stale data. Once the
+    total size exceeds `max_size` the least recently used blobs are deleted.
+    """
+
+    MAGIC = b'SCBS'
+    FORMAT_VERSION = 1
+
+    DEFAULT_MAX_SIZE = 4 * 1024 * 1024 * 1024
+
+    # Magic, format version, payload length, payload CRC-32.
+    _HEADER = struct.Struct('<4sIQI4x')
+
+    # Share of `max_size` kept after trimming, so trimming is not triggered
+    # again by the very next blob.
+    _TRIM_RATIO = 0.9
+
+    @property
+    def directory(self) -> Path: return self._directory
+
+    @property
+    def game_version(self) -> str: return self._game_version
+
+    @property
+    def max_size(self) -> int: return self._max_size
+
+    @property
+    def size(self) -> int:
+        self._scan()
+        return self._size
+
+    def __init__(self, directory, game_version: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        if isinstance(directory, str):
+            directory = Path(directory)
+        self._directory = directory
+        self._game_version = (game_version or '').strip()
+        self._max_size = max_size
+        self._lock = Lock()
+        self._sizes = None  # type: dict[Path, int]
+        self._size = 0
+
+    def __repr__(self):
+        return "BlobStore(%s)" % self.directory
+
+    def get(self, key: Tuple) -> bytes:
+        """
+        Gets the payload stored for `key`, or None.
+        """
+        path = self._get_path(key)
+        try:
+            buffer = path.read_bytes()
+        except OSError:
+            return None
+
+        payload = self._check(buffer)
+        if payload is None:
+            logger.warning('Discarding corrupt blob %s', path)
+            self._delete(path)
+            return None
+
+        try:
+            # The modification time doubles as the last access time.
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def put(self, key: Tuple, payload: bytes):
+        """
+        Stores the payload for `key`, trimming old blobs if needed.
+        """
+        if self._HEADER.size + len(payload) > self.max_size:
+            return
+
+        path = self._get_path(key)
+        header = self._HEADER.pack(self.MAGIC, self.FORMAT_VERSION, len(payload), zlib.crc32(payload))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            replace_file(path, (header, payload))
+        except OSError as exc:
+            logger.warning('Failed to write blob %s: %s', path, exc)
+            return
+
+        self._scan()
+        with self._lock:
+            self._size += len(header) + len(payload) - self._sizes.get(path, 0)
+            self._sizes[path] = len(header) + len(payload)
+            over = self._size > self.max_size
+        if over:
+            self.trim()
+
+    def trim(self, max_size: int = None):
+        """
+        Deletes the least recently used blobs until the store fits in
+        `max_size`, or in a share of its own cap if not given.
+        """
+        if max_size is None:
+            max_size = int(self.max_size * self._TRIM_RATIO)
+
+        self._scan()
+        with self._lock:
+            paths = list(self._sizes.keys())
+
+        entries = []
+        for path in paths:
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except OSError:
+                self._forget(path)
+        entries.sort()
+
+        for _, path in entries:
+            if self._size <= max_size:
+                break
+            self._delete(path)
+
+    def clear(self):
+        self.trim(0)
+
+    def _get_path(self, key: Tuple) -> Path:
+        digest = hashlib.sha1(repr((self.game_version,) + tuple(key)).encode()).hexdigest()
+        return self.directory.joinpath(digest[:2], digest[2:])
+
+    def _check(self, buffer: bytes) -> bytes:
+        if len(buffer) < self._HEADER.size:
+            return None
+        magic, fmt, length, crc = self._HEADER.unpack_from(buffer, 0)
+        if magic != self.MAGIC or fmt != self.FORMAT_VERSION:
+            return None
+        payload = buffer[self._HEADER.size:]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+    def _scan(self):
+        # Sizes of blobs left by earlier runs are only gathered when first
+        # needed.
+        if self._sizes is not None:
+            return
+        sizes = {}
+        if self.directory.exists():
+            for path in self.directory.glob('??/*'):
+                if path.suffix == '.tmp':
+                    continue
+                try:
+                    sizes[path] = path.stat().st_size
+                except OSError:
+                    continue
+        with self._lock:
+            if self._sizes is None:
+                self._sizes = sizes
+                self._size = sum(sizes.values())
+
+    def _delete(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        self._forget(path)
+
+    def _forget(self, path: Path):
+        if self._sizes is None:
+            return
+        with self._lock:
+            self._size -= self._sizes.pop(path, 0)
@@ -3,3 +3,43 @@ from .. import ARealmReversed
 
 class IXivShellCommandMixin(object):
     _realm = None  # type: ARealmReversed
+
+    def _get_modified_sheets(self, sheets, since):
+        """
+        Gets the sheets whose header or data files were added or changed
+        since the inventory (or sqpack directory) at `since`.
+        """
+        from pathlib import Path
+        from ..inventory import Inventory, InventoryDiff
+        from ..pack import PackCollection
+
+        EX_HPATH_FORMAT = "exd/%s.exh"
+        PARTIAL_FILE_NAME_FORMAT = "exd/%s_%u%s.exd"
+
+        exd_pack = self._realm.packs.get_pack(EX_HPATH_FORMAT % '')
+        if Path(since).is_dir():
+            # Only the exd pack matters, so don't scan the whole old tree.
+            old_packs = PackCollection(since)
+            try:
+                old = Inventory.scan(old_packs.get_pack(EX_HPATH_FORMAT % ''))
+            finally:
+                old_packs.close()
+        else:
+            old = Inventory.read(since)
+        diff = InventoryDiff(old, Inventory.scan(exd_pack))
+
+        modified = []
+        for name in sheets:
+            paths = [EX_HPATH_FORMAT % name]
+            try:
+                header = self._realm.game_data.get_sheet(name).header
+            except (KeyError, FileNotFoundError):
+                # Leave it to the export to report.
+                modified.append(name)
+                continue
+            for _range in header.data_file_ranges:
+                for lang in header.available_languages:
+                    paths.append(PARTIAL_FILE_NAME_FORMAT % (name, _range.start, lang.get_suffix()))
+            if any(map(diff.is_modified, paths)):
+                modified.append(name)
+        return modified
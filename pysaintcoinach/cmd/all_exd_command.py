@@ -20,6 +20,8 @@ class AllExdCommand(IXivShellCommandMixin):
         import argparse
         parser = argparse.ArgumentParser()
         parser.add_argument(dest='sheets', nargs='*')
+        parser.add_argument('--since', dest='since', default=None,
+                            help='only export sheets changed since this inventory file or sqpack directory')
 
         parsed_args = parser.parse_args(args.split())
 
@@ -29,6 +31,8 @@ class AllExdCommand(IXivShellCommandMixin):
             files_to_export = self._realm.game_data.available_sheets
         else:
             files_to_export = parsed_args.sheets
+        if parsed_args.since is not None:
+            files_to_export = self._get_modified_sheets(files_to_export, parsed_args.since)
 
         success_count = 0
         fail_count = 0
@@ -23,6 +23,8 @@ class AllExdRawCommand(IXivShellCommandMixin):
                             dest='use_definition_version',
                             action='store_true', default=False)
         parser.add_argument(dest='sheets', nargs='*')
+        parser.add_argument('--since', dest='since', default=None,
+                            help='only export sheets changed since this inventory file or sqpack directory')
 
         parsed_args = parser.parse_args(args.split())
 
@@ -36,6 +38,8 @@ class AllExdRawCommand(IXivShellCommandMixin):
             files_to_export = self._realm.game_data.available_sheets
         else:
             files_to_export = parsed_args.sheets
+        if parsed_args.since is not None:
+            files_to_export = self._get_modified_sheets(files_to_export, parsed_args.since)
 
         success_count = 0
         fail_count = 0
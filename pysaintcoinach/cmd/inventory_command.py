@@ -0,0 +1,71 @@
+import logging
+import time
+from pathlib import Path
+
+from . import IXivShellCommandMixin
+from ..inventory import Inventory, InventoryDiff
+
+
+logger = logging.getLogger('xivshell')
+
+
+class InventoryCommand(IXivShellCommandMixin):
+
+    def do_inventory(self, args: str):
+        """
+        Save a listing of every file in the game's packs, without reading
+        their data.
+        """
+
+        target = Path(self._realm.game_version, 'inventory.bin')
+        if not target.parent.exists():
+            target.parent.mkdir(parents=True)
+
+        start = time.time()
+        inventory = Inventory.scan(self._realm.packs)
+        inventory.write(target)
+        logger.info('Listed %u files in %.1fs to %s' % (len(inventory), time.time() - start, target))
+
+        # Do not quit.
+        return False
+
+    def do_diff(self, args: str):
+        """
+        List the files added, removed or changed since an older inventory
+        file or sqpack directory.
+        """
+
+        if args is None or len(args.strip()) == 0:
+            return False
+
+        target = Path(self._realm.game_version, 'diff.txt')
+        if not target.parent.exists():
+            target.parent.mkdir(parents=True)
+
+        diff = InventoryDiff(args.strip(), self._realm.packs)
+        with target.open('w') as f:
+            for kind, entries in (('+', diff.added), ('-', diff.removed), ('*', diff.changed)):
+                for pack_id, keys in sorted(entries.items(), key=lambda e: hash(e[0])):
+                    for directory_key, file_key in sorted(keys):
+                        f.write('%s %s/%02x%02x%02x %08X %08X%s\n' % (kind, pack_id.expansion, pack_id.type_key,
+                                                                     pack_id.expansion_key, pack_id.number,
+                                                                     directory_key, file_key,
+                                                                     self.__get_name(directory_key, file_key)))
+        logger.info('%u added, %u removed, %u changed; listed in %s' % (
+            sum(map(len, diff.added.values())),
+            sum(map(len, diff.removed.values())),
+            sum(map(len, diff.changed.values())),
+            target))
+
+        # Do not quit.
+        return False
+
+    def __get_name(self, directory_key, file_key):
+        dictionary = self._realm.packs.path_dictionary
+        if dictionary is None:
+            return ''
+        if directory_key != 0:
+            path = dictionary.get_path(directory_key, file_key)
+        else:
+            path = dictionary.get_path_for_hash(file_key)
+        return ' ' + path if path is not None else ''
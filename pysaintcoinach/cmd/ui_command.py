@@ -12,6 +12,7 @@ class UiCommand(IXivShellCommandMixin):
 
     UI_IMAGE_DIR_FORMAT = 'ui/icon/{0:03d}000{1}'
     UI_IMAGE_PATH_FORMAT = 'ui/icon/{0:03d}000{1}/{2:06d}.tex'
+    UI_IMAGE_NAME_FORMAT = '{0:06d}.tex'
     UI_VERSIONS = [
         '',
         '/en',
@@ -20,6 +21,7 @@ class UiCommand(IXivShellCommandMixin):
         '/de',
         '/hq'
     ]
+    BATCH_SIZE = 0x10000
 
     def do_ui(self, args: str):
         """
@@ -67,34 +69,44 @@ class UiCommand(IXivShellCommandMixin):
         return False
 
     def __build_file_list(self, _min, _max):
-        from ..indexfile import IndexSource
+        from ..indexfile import IndexSource, build_name_table
         file_list = []
 
         pack = self._realm.packs.get_pack('ui/')
         if isinstance(pack.source, IndexSource):
             source = cast(IndexSource, pack.source)
             # OPTIMIZATION:
-            # Due to how SE organizes these files, it's possible to confirm them in groups of 1000 by
-            # checking if the directory itself exists first.
-            for i in range(_min, _max + 1, 1000):
-                for v in self.UI_VERSIONS:
-                    dir_path = self.UI_IMAGE_DIR_FORMAT.format(int(i / 1000), v)
-                    if source.directory_exists(dir_path):
-                        d = int(i / 1000) * 1000
-                        for j in range(1000):
-                            n = d + j
-                            if _min <= n <= _max:
-                                file_path = self.UI_IMAGE_PATH_FORMAT.format(int(n / 1000), v, n)
-                                if pack.file_exists(file_path):
-                                    file_list.append(file_path)
+            # Due to how SE organizes these files, all icons of a group of 1000 share a directory, and
+            # each version of the group uses the same file names. Hash the names once per group and
+            # match them against the keys actually present in each directory.
+            for i in range(_min - _min % 1000, _max + 1, 1000):
+                directories = [source.get_directory(self.UI_IMAGE_DIR_FORMAT.format(int(i / 1000), v))
+                               for v in self.UI_VERSIONS]
+                directories = [d for d in directories if d is not None]
+                if len(directories) == 0:
+                    continue
+                names = build_name_table(self.UI_IMAGE_NAME_FORMAT.format(n)
+                                         for n in range(max(i, _min), min(i + 1000, _max + 1)))
+                for directory in directories:
+                    for name in sorted(directory.match_names(names).values()):
+                        file_list.append(directory.path + '/' + name)
         else:
+            candidates = []
             for i in range(_min, _max):
                 for v in self.UI_VERSIONS:
-                    file_path = self.UI_IMAGE_PATH_FORMAT.format(int(i / 1000), v, i)
-                    if pack.file_exists(file_path):
-                        file_list.append(file_path)
+                    candidates.append(self.UI_IMAGE_PATH_FORMAT.format(int(i / 1000), v, i))
+                if len(candidates) >= self.BATCH_SIZE:
+                    file_list += self.__filter_existing(candidates)
+            file_list += self.__filter_existing(candidates)
         return file_list
 
+    def __filter_existing(self, candidates):
+        # Check the paths as one batch, and empty the list for the next one.
+        exists = self._realm.packs.files_exist(candidates)
+        existing = [path for path, e in zip(candidates, exists) if e]
+        candidates.clear()
+        return existing
+
     def __process(self, file_path):
         file = self._realm.packs.get_file(file_path)
         if file is not None:
@@ -13,6 +13,7 @@ from .all_exd_raw_command import AllExdRawCommand
 from .bgm_command import BgmCommand
 from .exd_command import ExdCommand
 from .image_command import ImageCommand
+from .inventory_command import InventoryCommand
 from .language_command import LanguageCommand
 from .raw_command import RawCommand
 from .raw_exd_command import RawExdCommand
@@ -27,6 +28,7 @@ class XivShell(cmd.Cmd,
                BgmCommand,
                ExdCommand,
                ImageCommand,
+               InventoryCommand,
                LanguageCommand,
                RawCommand,
                RawExdCommand,
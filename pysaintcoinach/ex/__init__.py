@@ -4,4 +4,5 @@ from .multisheet import IMultiRow, IMultiSheet, MultiRow, MultiSheet
 from .language import Language
 from .header import Header
 from .column import Column
-from .excollection import ExCollection
+from .rowdecoder import RowDecoder
+from .excollection import ExCollection, SheetCachePolicy
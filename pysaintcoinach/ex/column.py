@@ -60,7 +60,13 @@ class Column(object):
         return self.reader.name
 
     def read(self, buffer: bytes, row: 'ex.IDataRow', offset: int = None):
-        return self.read_raw(buffer, row, offset)
+        return self.convert(row, self.read_raw(buffer, row, offset))
+
+    def convert(self, row: 'ex.IDataRow', value):
+        """
+        Converts a raw value of the column into the value `read` returns.
+        """
+        return value
 
     def read_raw(self, buffer: bytes, row: 'ex.IDataRow', offset: int = None):
         if offset is None:
@@ -29,6 +29,11 @@ class DataReader(ABC):
     def type(self) -> type:
         pass
 
+    @property
+    def format(self) -> str:
+        # Big-endian struct format of the values, for fixed-size types.
+        return None
+
     @abstractmethod
     def read(self, buffer: bytes, **kwargs):
         pass
@@ -44,11 +49,15 @@ class DelegateDataReader(DataReader):
     @property
     def type(self): return self._type
 
-    def __init__(self, name, length, type, func):
+    @property
+    def format(self): return self._format
+
+    def __init__(self, name, length, type, func, format=None):
         self._name = name
         self._length = length
         self._type = type
         self._func = func
+        self._format = format
 
     def read(self, buffer: bytes, **kwargs):
         if 'offset' in kwargs:
@@ -68,6 +77,9 @@ class PackedBooleanDataReader(DataReader):
     @property
     def type(self): return type(bool)
 
+    @property
+    def mask(self): return self._mask
+
     def __init__(self, mask):
         self._mask = mask
         self._name = "bit&%02X" % mask
@@ -97,6 +109,9 @@ class StringDataReader(DataReader):
         end_of_fixed = kwargs['row'].offset + kwargs['row'].sheet.header.fixed_size_data_length
 
         start = end_of_fixed + unpack_from(">l", buffer, field_offset)[0]
+        return self.read_string(buffer, start)
+
+    def read_string(self, buffer: bytes, start: int):
         if start < 0:
             return None
 
@@ -106,14 +121,14 @@ class StringDataReader(DataReader):
 
 
 DATA_READERS = {0x0000: StringDataReader(),
-                0x0001: DelegateDataReader("bool", 1, type(bool), lambda d, o: d[o] != 0),
-                0x0002: DelegateDataReader("sbyte", 1, type(int), lambda d, o: unpack_from(">b", d, o)[0]),
-                0x0003: DelegateDataReader("byte", 1, type(int), lambda d, o: unpack_from(">B", d, o)[0]),
-                0x0004: DelegateDataReader("int16", 2, type(int), lambda d, o: unpack_from(">h", d, o)[0]),
-                0x0005: DelegateDataReader("uint16", 2, type(int), lambda d, o: unpack_from(">H", d, o)[0]),
-                0x0006: DelegateDataReader("int32", 4, type(int), lambda d, o: unpack_from(">l", d, o)[0]),
-                0x0007: DelegateDataReader("uint32", 4, type(int), lambda d, o: unpack_from(">L", d, o)[0]),
-                0x0009: DelegateDataReader("single", 4, type(float), lambda d, o: unpack_from(">f", d, o)[0]),
-                0x000B: DelegateDataReader("int64", 8, type(int), lambda d, o: unpack_from(">q", d, o)[0])}
+                0x0001: DelegateDataReader("bool", 1, type(bool), lambda d, o: d[o] != 0, ">?"),
+                0x0002: DelegateDataReader("sbyte", 1, type(int), lambda d, o: unpack_from(">b", d, o)[0], ">b"),
+                0x0003: DelegateDataReader("byte", 1, type(int), lambda d, o: unpack_from(">B", d, o)[0], ">B"),
+                0x0004: DelegateDataReader("int16", 2, type(int), lambda d, o: unpack_from(">h", d, o)[0], ">h"),
+                0x0005: DelegateDataReader("uint16", 2, type(int), lambda d, o: unpack_from(">H", d, o)[0], ">H"),
+                0x0006: DelegateDataReader("int32", 4, type(int), lambda d, o: unpack_from(">l", d, o)[0], ">i"),
+                0x0007: DelegateDataReader("uint32", 4, type(int), lambda d, o: unpack_from(">L", d, o)[0], ">I"),
+                0x0009: DelegateDataReader("single", 4, type(float), lambda d, o: unpack_from(">f", d, o)[0], ">f"),
+                0x000B: DelegateDataReader("int64", 8, type(int), lambda d, o: unpack_from(">q", d, o)[0], ">q")}
 for i in range(0, 8):
     DATA_READERS[0x19 + i] = PackedBooleanDataReader(1 << i)
@@ -1,18 +1,62 @@
-from typing import Union, Tuple, Iterable as IterableT, TypeVar, Type, Dict
+from typing import Union, Tuple, Iterable as IterableT, TypeVar, Type, Dict, List
 from abc import abstractmethod
+from array import array
+from bisect import bisect_left
 from struct import unpack_from
 from collections import OrderedDict
 from threading import Lock
+import operator
+import sys
 
 from ..file import File
+from ..util import LruCache
 from .sheet import IRow, ISheet
 from .language import Language
 from .header import Header
 from .. import ex
-from ..util import ConcurrentDictionary
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('Columnar access requires NumPy') from None
+    return numpy
+
+
+def _find_column(header: Header, column: Union[int, str, 'ex.Column']) -> 'ex.Column':
+    if isinstance(column, int):
+        return header.get_column(column)
+    if not isinstance(column, str):
+        return column
+    find_column = getattr(header, 'find_column', None)
+    result = find_column(column) if find_column is not None else None
+    if result is None:
+        raise KeyError(column)
+    return result
+
+
+def _gather_column(numpy, buffer: bytes, positions, column: 'ex.Column'):
+    # Gathers the value of `column` at each of `positions` into an array of
+    # native byte order.
+    data = numpy.frombuffer(buffer, dtype=numpy.uint8)
+    reader = column.reader
+    mask = getattr(reader, 'mask', None)
+    if mask is not None:
+        return (data[positions] & mask) != 0
+    if reader.format is None:
+        raise ValueError('Column %u (%s) has no fixed-size values' % (column.index, reader.name))
+
+    dtype = numpy.dtype(reader.format)
+    if dtype.kind == 'b':
+        return data[positions] != 0
+    cells = data[positions[:, numpy.newaxis] + numpy.arange(dtype.itemsize)]
+    return cells.view(dtype).reshape(len(positions)).astype(dtype.newbyteorder('='))
 
 
 class IDataRow(IRow):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def offset(self) -> int:
@@ -38,6 +82,10 @@ class IDataSheet(ISheet[T]):
 
 
 class DataRowBase(IDataRow):
+    # Rows only refer to where their data is; converted values are cached
+    # by the sheet, so rows are cheap to create and need not be kept.
+    __slots__ = ('__sheet', '__key', '__offset')
+
     @property
     def sheet(self) -> Union[IDataSheet, ISheet]: return self.__sheet
 
@@ -51,20 +99,26 @@ class DataRowBase(IDataRow):
         self.__sheet = sheet
         self.__key = key
         self.__offset = offset
-        self.__value_references = {}  # type: Dict[int, object]
 
     def __getitem__(self, item: int):
         if not isinstance(item, int):
             raise ValueError('item must be an int')
         column_index = item
 
-        value = self.__value_references.get(column_index)
+        # Keyed on offset, as sub rows share their parent's key but not its
+        # offset. Keys can't collide: each partial sheet has its own cache
+        # and offsets are unique within its data file, and column counts
+        # are 16-bit, so the index never reaches the offset bits.
+        cache = self.sheet.value_cache
+        cache_key = self.__offset << 16 | column_index
+        value = cache.get(cache_key)
         if value is not None:
             return value
 
         column = self.sheet.header.get_column(column_index)
         value = column.read(self.sheet.get_buffer(), self)
-        self.__value_references[column_index] = value
+        if value is not None:
+            cache.put(cache_key, value, 1)
 
         return value
 
@@ -72,19 +126,41 @@ class DataRowBase(IDataRow):
         column = self.sheet.header.get_column(column_index)
         return column.read_raw(self.sheet.get_buffer(), self)
 
+    def get_values(self, column_indices: IterableT[int] = None, raw: bool = False) -> List[object]:
+        """
+        Gets the values of the given columns, or of every column, unpacking
+        the fixed-size section of the row only once.
+        """
+        header = self.sheet.header
+        if column_indices is not None:
+            column_indices = list(column_indices)
+        values = header.row_decoder.read_raw(self.sheet.get_buffer(), self, column_indices)
+        if raw:
+            return values
+
+        if column_indices is None:
+            columns = header.columns
+        else:
+            columns = [header.get_column(i) for i in column_indices]
+        return [column.convert(self, value) for column, value in zip(columns, values)]
+
     def column_values(self) -> IterableT[object]:
-        buffer = self.sheet.get_buffer()
-        for column in self.sheet.header.columns:
-            yield column.read(buffer, self)
+        return iter(self.get_values())
 
     def items(self):
         item_dict = OrderedDict()
-        for c in self.sheet.header.columns:
-            item_dict[c.name] = self[c.index]
+        for c, value in zip(self.sheet.header.columns, self.get_values()):
+            item_dict[c.name] = value
         return item_dict
 
 
 class PartialDataSheet(IDataSheet[T]):
+    # Number of converted values kept for the rows of a sheet.
+    VALUE_CACHE_SIZE = 0x1000
+
+    # Rough memory held by each cached value, for `estimate_size`.
+    VALUE_SIZE_ESTIMATE = 0x80
+
     @property
     def source_sheet(self): return self.__source_sheet
 
@@ -95,11 +171,14 @@ class PartialDataSheet(IDataSheet[T]):
     def file(self): return self.__file
 
     @property
-    def keys(self): return self.__row_offsets.keys()
+    def keys(self): return self.__keys
 
     @property
     def language(self): return self.source_sheet.language
 
+    @property
+    def value_cache(self) -> LruCache: return self.__value_cache
+
     @property
     def name(self): return self.source_sheet.name + "_" + str(self.range.start)
 
@@ -114,8 +193,12 @@ class PartialDataSheet(IDataSheet[T]):
                  source_sheet: IDataSheet[T],
                  _range: range,
                  file: File):
-        self.__rows = None  # type: ConcurrentDictionary[int, T]
-        self.__row_offsets = {}
+        self.__value_cache = LruCache(self.VALUE_CACHE_SIZE)  # type: LruCache[int, object]
+        self.__keys = None  # type: array
+        self.__offsets = None  # type: array
+        self.__sorted_keys = None  # type: array
+        self.__sorted_order = None  # type: array
+        self.__buffer = None  # type: bytes
         self.__source_sheet = source_sheet
         self.__range = _range
         self.__file = file
@@ -124,7 +207,9 @@ class PartialDataSheet(IDataSheet[T]):
         self.__build()
 
     def get_buffer(self):
-        return self.file.get_data()
+        # Rows read from this buffer constantly, so the sheet keeps its own
+        # reference rather than going through the pack's payload cache.
+        return self.__buffer
 
     def __build(self):
         HEADER_LENGTH_OFFSET = 0x08
@@ -134,49 +219,100 @@ class PartialDataSheet(IDataSheet[T]):
         ENTRY_POSITION_OFFSET = 0x04
 
         buffer = self.file.get_data()
+        self.__buffer = buffer
 
         header_len, = unpack_from(">l", buffer, HEADER_LENGTH_OFFSET)
-        count = int(header_len / ENTRY_LENGTH)
-        current_position = ENTRIES_OFFSET
-
-        self.__rows = ConcurrentDictionary()
-        for i in range(count):
-            key, = unpack_from(">l", buffer, current_position + ENTRY_KEY_OFFSET)
-            off, = unpack_from(">l", buffer, current_position + ENTRY_POSITION_OFFSET)
-            self.__row_offsets[key] = off
-            #self.__rows[key] = self._create_row(key, off)
-            current_position += ENTRY_LENGTH
+        count = header_len // ENTRY_LENGTH
+
+        # The table is a run of big-endian (key, offset) int32 pairs, read
+        # in one go and split into a key and an offset array.
+        entries = array('i')
+        entries.frombytes(buffer[ENTRIES_OFFSET:ENTRIES_OFFSET + count * ENTRY_LENGTH])
+        if sys.byteorder == 'little':
+            entries.byteswap()
+        self.__keys = entries[ENTRY_KEY_OFFSET // 4::2]
+        self.__offsets = entries[ENTRY_POSITION_OFFSET // 4::2]
+
+        # Rows are looked up by binary search. Tables are almost always
+        # sorted already; otherwise search a sorted copy of the keys, mapped
+        # back to their position in the table.
+        keys = self.__keys
+        if all(map(operator.lt, keys, keys[1:])):
+            self.__sorted_keys = keys
+            self.__sorted_order = None
+        else:
+            order = sorted(range(count), key=keys.__getitem__)
+            self.__sorted_keys = array('i', (keys[i] for i in order))
+            self.__sorted_order = array('i', order)
+
+    def estimate_size(self) -> int:
+        """
+        Gets a rough estimate of the memory held by the sheet, in bytes.
+        """
+        size = len(self.__buffer) + self.__keys.itemsize * (len(self.__keys) + len(self.__offsets))
+        if self.__sorted_order is not None:
+            size += self.__keys.itemsize * (len(self.__sorted_keys) + len(self.__sorted_order))
+        return size + self.VALUE_SIZE_ESTIMATE * len(self.__value_cache)
+
+    def __find(self, key: int) -> int:
+        keys = self.__sorted_keys
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return -1
+        return i if self.__sorted_order is None else self.__sorted_order[i]
+
+    def __get_offset(self, key: int) -> int:
+        i = self.__find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.__offsets[i]
+
+    def __get_row(self, key: int, offset: int = None) -> T:
+        if offset is None:
+            offset = self.__get_offset(key)
+        return self._create_row(key, offset)
 
     def _create_row(self, key, offset) -> T:
         return self.__t_cls(self, key, offset)
 
     def get_all_rows(self) -> IterableT[T]:
-        return self.__rows.values()
+        return iter(self)
 
     def __getitem__(self, item: Union[int, Tuple[int, int]]) -> Union[T, IRow, object]:
-        def get_row(key):
-            def _add_value(k):
-                offset = self.__row_offsets[key]
-                if offset is not None:
-                    return self._create_row(k, offset)
-                else:
-                    return None  # there is no default for T.
-            return self.__rows.get_or_add(key, _add_value)
-
         if isinstance(item, tuple):
-            return get_row(item[0])[item[1]]
+            return self.__get_row(item[0])[item[1]]
         else:
-            return get_row(item)
+            return self.__get_row(item)
 
     def __contains__(self, item):
-        return item in self.__row_offsets
+        return self.__find(item) >= 0
 
     def __len__(self):
-        return len(self.__row_offsets)
+        return len(self.__keys)
 
     def __iter__(self):
-        for key, off in self.__row_offsets.items():
-            yield self.__rows.get_or_add(key, lambda k: self._create_row(k, off))
+        for key, offset in zip(self.__keys, self.__offsets):
+            yield self.__get_row(key, offset)
+
+    def column_array(self, column: Union[int, str, 'ex.Column']):
+        """
+        Gets the values of a fixed-size column for every row, in the same
+        order as iterating the sheet, as a NumPy array along with the array
+        of row keys. Packed booleans come back as a bool array.
+
+        Raises ValueError for string columns, and for variant 2 sheets,
+        whose values belong to sub-rows rather than rows.
+        """
+        numpy = _import_numpy()
+        column = _find_column(self.header, column)
+        if self.header.variant != 1:
+            raise ValueError('Sheet %s has sub-rows; columns can only be gathered from variant 1 sheets'
+                             % self.header.name)
+
+        positions = numpy.array(self.__offsets, dtype=numpy.int64)
+        positions += self.__t_cls.METADATA_LENGTH + column.offset
+        return (_gather_column(numpy, self.__buffer, positions, column),
+                numpy.array(self.__keys, dtype=numpy.int32))
 
 
 class DataSheet(IDataSheet[T]):
@@ -199,7 +335,7 @@ class DataSheet(IDataSheet[T]):
                  language: Language):
         self.__partial_sheets_created = False
         self.__partial_sheets = {}
-        self.__row_to_partial_sheet_map = {}
+        self.__keys = None  # type: array
         self.__partial_sheets_lock = Lock()
         self.__collection = collection
         self.__header = header
@@ -207,14 +343,13 @@ class DataSheet(IDataSheet[T]):
         self.__t_cls = t_cls
 
     def __len__(self):
-        import operator
         self.__create_all_partial_sheets()
         return sum(map(operator.length_hint, self.__partial_sheets.values()))
 
     @property
     def keys(self) -> IterableT[int]:
         self.__create_all_partial_sheets()
-        return self.__row_to_partial_sheet_map.keys()
+        return self.__keys
 
     def __iter__(self):
         self.__create_all_partial_sheets()
@@ -225,6 +360,31 @@ class DataSheet(IDataSheet[T]):
     def get_buffer(self):
         raise NotImplementedError
 
+    def estimate_size(self) -> int:
+        """
+        Gets a rough estimate of the memory held by the sheet, in bytes.
+        """
+        size = sum(partial.estimate_size() for partial in list(self.__partial_sheets.values()))
+        if self.__keys is not None:
+            size += self.__keys.itemsize * len(self.__keys)
+        return size
+
+    def column_array(self, column: Union[int, str, 'ex.Column']):
+        """
+        Gets the values of a fixed-size column for every row, in the same
+        order as iterating the sheet, as a NumPy array along with the array
+        of row keys. Packed booleans come back as a bool array.
+
+        Raises ValueError for string columns and variant 2 sheets.
+        """
+        numpy = _import_numpy()
+        self.__create_all_partial_sheets()
+        parts = [partial.column_array(column) for partial in self.__partial_sheets.values()]
+        if len(parts) == 1:
+            return parts[0]
+        return (numpy.concatenate([values for values, _ in parts]),
+                numpy.concatenate([keys for _, keys in parts]))
+
     def _create_partial_sheet(self, _range: range, _file: File) -> ISheet[T]:
         return PartialDataSheet[T](self.__t_cls, self, _range, _file)
 
@@ -239,11 +399,12 @@ class DataSheet(IDataSheet[T]):
         return file
 
     def _get_partial_sheet(self, row: int) -> ISheet[T]:
-        if row in self.__row_to_partial_sheet_map:
-            return self.__row_to_partial_sheet_map[row]
-
         res = [item for item in self.header.data_file_ranges if row in item]
         if not any(res):
+            # Rows outside of every range can still be in a partial file.
+            for partial in list(self.__partial_sheets.values()):
+                if row in partial:
+                    return partial
             raise ValueError("row")
 
         with self.__partial_sheets_lock:
@@ -263,6 +424,10 @@ class DataSheet(IDataSheet[T]):
                     continue
                 self.__create_partial_sheet(_range)
 
+            keys = array('i')
+            for partial in self.__partial_sheets.values():
+                keys.extend(partial.keys)
+            self.__keys = keys
             self.__partial_sheets_created = True
 
     def __create_partial_sheet(self, _range: range) -> ISheet[T]:
@@ -270,8 +435,6 @@ class DataSheet(IDataSheet[T]):
 
         partial = self._create_partial_sheet(_range, file)
         self.__partial_sheets[_range] = partial
-        for k in partial.keys:
-            self.__row_to_partial_sheet_map[k] = partial
         return partial
 
     def __getitem__(self, item: Union[int, Tuple[int, int]]) -> Union[T, IRow, object]:
@@ -285,4 +448,4 @@ class DataSheet(IDataSheet[T]):
 
     def __contains__(self, row: int):
         self.__create_all_partial_sheets()
-        return row in self.__row_to_partial_sheet_map
+        return any(row in partial for partial in self.__partial_sheets.values())
@@ -1,16 +1,53 @@
 import io
-from typing import TypeVar, Type, overload, cast
+from threading import RLock
+from weakref import WeakValueDictionary
+from typing import FrozenSet, Iterable, TypeVar, Type, Union, overload, cast
 
 from .header import Header
 from .datasheet import DataSheet
 from .multisheet import MultiRow, MultiSheet
 from ..pack import PackCollection
 from .language import Language
+from ..util import LruCache
 from .. import ex
 
 T = TypeVar('T')
 
 
+class SheetCachePolicy(object):
+    """
+    Limits on what an `ExCollection` keeps of the sheets it has opened.
+
+    Sheets are kept in least recently used order for as long as their
+    estimated size fits in `max_size`, except for the sheet used last, which
+    is kept however large it is; `pinned` sheets are never dropped.
+    Each sheet keeps at most `max_rows` row objects.
+    """
+
+    DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+    DEFAULT_MAX_ROWS = 0x10000
+
+    @property
+    def max_size(self) -> int: return self.__max_size
+
+    @property
+    def max_rows(self) -> int: return self.__max_rows
+
+    @property
+    def pinned(self) -> FrozenSet[str]: return self.__pinned
+
+    def __init__(self,
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 max_rows: int = DEFAULT_MAX_ROWS,
+                 pinned: Iterable[str] = ()):
+        self.__max_size = max_size
+        self.__max_rows = max_rows
+        self.__pinned = frozenset(pinned)
+
+    def __repr__(self):
+        return "SheetCachePolicy(%u, %u, %r)" % (self.max_size, self.max_rows, sorted(self.pinned))
+
+
 class ExCollection(object):
 
     @property
@@ -33,25 +70,63 @@ class ExCollection(object):
     def available_sheets(self):
         return self._available_sheets
 
-    def __init__(self, pack_collection: PackCollection):
+    @property
+    def cache_policy(self) -> SheetCachePolicy:
+        return self._cache_policy
+
+    def __init__(self, pack_collection: PackCollection, cache_policy: SheetCachePolicy = None):
+        if cache_policy is None:
+            cache_policy = SheetCachePolicy()
+
         self._sheet_identifiers = {}
         # NOTE: Making _sheets a WeakValueDictionary will greatly slow down
         # relational accesses to a sheet, especially when iterating rows with
         # several related sheets. Unfortunately, Python's GC is a bit too eager
         # to finalize these technically dead references, even though they'll
         # likely be requested again soon (just in a separate scope...)
-        self._sheets = dict()
+        # Sheets are instead dropped least recently used first, once they
+        # no longer fit in the policy's budget. The sheet in use is always
+        # kept, however large it is.
+        self._cache_policy = cache_policy
+        self._sheets = LruCache(cache_policy.max_size, sizeof=lambda sheet: sheet.estimate_size(), keep_last=True)
+        # Sheets dropped from the budget are reused for as long as rows or
+        # relations still refer to them, rather than built a second time.
+        self._live_sheets = WeakValueDictionary()
+        self._last_sheet_name = None
+        self._pinned_sheets = {}
+        self._pinned_names = set(cache_policy.pinned)
+        # Exports read sheets from several threads; finding, measuring and
+        # creating a sheet happen under this lock, so each is built once.
+        self._lock = RLock()
         self._available_sheets = set()
         self._pack_collection = pack_collection
 
         self.__build_index()
 
     def __build_index(self):
+        EX_ROOT_PATH = "exd/root.exl"
+
+        cache = self.pack_collection.index_cache
+        pack = self.pack_collection.get_pack(EX_ROOT_PATH)
+        if cache is not None and pack is not None and pack.source.index.path is not None:
+            entries = cache.get_sheet_list(pack.source.index.path, self.__read_root)
+        else:
+            entries = self.__read_root()
+
+        available = []
+        for name, id in entries:
+            available += [name]
+            if id >= 0:
+                self._sheet_identifiers[id] = name
+
+        self._available_sheets = set(available)
+
+    def __read_root(self):
         ex_root = self.pack_collection.get_file("exd/root.exl")
         if ex_root is None:
             raise FileNotFoundError('exd/root.exl')
 
-        available = []
+        entries = []
 
         with io.BufferedReader(io.BytesIO(ex_root.get_data())) as s:
             s.readline() # EXLT,2
@@ -68,11 +143,9 @@ class ExCollection(object):
                 name = split[0]
                 id = int(split[1])
 
-                available += [name]
-                if id >= 0:
-                    self._sheet_identifiers[id] = name
+                entries += [(name, id)]
 
-        self._available_sheets = set(available)
+        return entries
 
     def sheet_exists(self, id_or_name):
         if isinstance(id_or_name, str):
@@ -100,30 +173,73 @@ class ExCollection(object):
         if isinstance(args[0], type):
             return cast(ex.ISheet[args[0]], self.get_sheet(args[1]))
 
-        if isinstance(args[0], int):
-            name = self._sheet_identifiers[args[0]]
-        else:
-            name = args[0]
+        name = self.__get_sheet_name(args[0])
 
         EX_HPATH_FORMAT = "exd/%s.exh"
 
-        sheet = self._sheets.get(name, None)
-        if sheet is not None:
+        with self._lock:
+            sheet = self._pinned_sheets.get(name)
+            if sheet is not None:
+                return sheet
+
+            if name != self._last_sheet_name:
+                # Sheets grow as their rows are read, so the one used last is
+                # measured again, once, as soon as another one is asked for.
+                if self._last_sheet_name is not None:
+                    self._sheets.remeasure(self._last_sheet_name)
+                self._last_sheet_name = name
+
+            sheet = self._sheets.get(name)
+            if sheet is not None:
+                return sheet
+
+            sheet = self._live_sheets.get(name)
+            if sheet is None:
+                if name not in self.available_sheets:
+                    raise KeyError("Unknown sheet '%s'" % name)
+
+                exh_path = EX_HPATH_FORMAT % (name)
+                exh = self.pack_collection.get_file(exh_path)
+                if exh is None:
+                    raise FileNotFoundError(exh_path)
+
+                header = self._create_header(name, exh)
+                sheet = self._create_sheet(header)
+                self._live_sheets[name] = sheet
+
+            if name in self._pinned_names:
+                self._pinned_sheets[name] = sheet
+            else:
+                self._sheets.put(name, sheet)
             return sheet
 
-        if name not in self.available_sheets:
-            raise KeyError("Unknown sheet '%s'" % name)
-
-        exh_path = EX_HPATH_FORMAT % (name)
-        exh = self.pack_collection.get_file(exh_path)
-        if exh is None:
-            raise FileNotFoundError(exh_path)
-
-        header = self._create_header(name, exh)
-        sheet = self._create_sheet(header)
-
-        self._sheets[name] = sheet
-        return sheet
+    def pin_sheet(self, id_or_name: Union[int, str]):
+        """
+        Keeps a sheet for as long as the collection, however large it gets.
+        """
+        name = self.__get_sheet_name(id_or_name)
+        with self._lock:
+            self._pinned_names.add(name)
+            sheet = self._sheets.get(name)
+            if sheet is not None:
+                self._pinned_sheets[name] = sheet
+                self._sheets.remove(name)
+
+    def unpin_sheet(self, id_or_name: Union[int, str]):
+        """
+        Lets a pinned sheet be dropped again like any other.
+        """
+        name = self.__get_sheet_name(id_or_name)
+        with self._lock:
+            self._pinned_names.discard(name)
+            sheet = self._pinned_sheets.pop(name, None)
+            if sheet is not None:
+                self._sheets.put(name, sheet)
+
+    def __get_sheet_name(self, id_or_name: Union[int, str]) -> str:
+        if isinstance(id_or_name, int):
+            return self._sheet_identifiers[id_or_name]
+        return id_or_name
 
     def _create_header(self, name, file):
         return Header(self, name, file)
@@ -62,10 +62,21 @@ class Header(object):
     def fixed_size_data_length(self) -> int:
         return self.__fixed_size_data_length
 
+    @property
+    def row_decoder(self) -> 'RowDecoder':
+        """
+        Gets the decoder reading the fixed-size section of rows in one go.
+        """
+        if self.__row_decoder is None:
+            from .rowdecoder import RowDecoder
+            self.__row_decoder = RowDecoder(self)
+        return self.__row_decoder
+
     def __init__(self, collection: 'ex.ExCollection', name: str, file: File):
         self.__available_languages = []
         self.__columns = []
         self.__data_file_ranges = []
+        self.__row_decoder = None
 
         self.__collection = collection
         self.__name = name
@@ -11,6 +11,8 @@ from ..util import ConcurrentDictionary
 
 
 class IMultiRow(IRow):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def sheet(self) -> 'IMultiSheet':
@@ -51,7 +53,6 @@ class MultiSheet(IMultiSheet[TMulti, TData]):
                  collection: 'ex.ExCollection',
                  header: Header):
         self.__localised_sheets = ConcurrentDictionary()  # type: ConcurrentDictionary[Language, ISheet[TData]]
-        self.__rows = ConcurrentDictionary()  # type: ConcurrentDictionary[int, TMulti]
         self.__collection = collection
         self.__header = header
         self.__tmulti_cls = tmulti_cls
@@ -87,6 +88,12 @@ class MultiSheet(IMultiSheet[TMulti, TData]):
         for key in self.active_sheet.keys:
             yield self[key]
 
+    def column_array(self, column):
+        return self.active_sheet.column_array(column)
+
+    def estimate_size(self) -> int:
+        return sum(sheet.estimate_size() for sheet in list(self.__localised_sheets.values()))
+
     def _create_multi_row(self, row) -> TMulti:
         return self.__tmulti_cls(self, row)
 
@@ -94,18 +101,20 @@ class MultiSheet(IMultiSheet[TMulti, TData]):
         return DataSheet[TData](self.__tdata_cls, self.collection, self.header, language)
 
     def __getitem__(self, item):
-        def get_row(key) -> TMulti:
-            return self.__rows.get_or_add(key, lambda k: self._create_multi_row(k))
+        # Multi rows only hold their sheet and key, so they are created on
+        # demand rather than kept.
         if isinstance(item, tuple):
-            return get_row(item[0])[item[1]]
+            return self._create_multi_row(item[0])[item[1]]
         else:
-            return get_row(item)
+            return self._create_multi_row(item)
 
     def __contains__(self, item):
         return item in self.active_sheet
 
 
 class MultiRow(IMultiRow):
+    __slots__ = ('__sheet', '__key')
+
     def __init__(self, sheet: IMultiSheet, key: int):
         self.__sheet = sheet
         self.__key = key
@@ -41,11 +41,9 @@ class RelationalColumn(Column):
         self._has_definition = False
         self._definition = None
 
-    def read(self, buffer: bytes, row: 'ex.datasheet.IDataRow', offset: int = None):
-        base_val = super(RelationalColumn, self).read(buffer, row, offset)
-
+    def convert(self, row: 'ex.datasheet.IDataRow', value):
         _def = self.definition
-        return _def.convert(row, base_val, self.index) if _def is not None else base_val
+        return _def.convert(row, value, self.index) if _def is not None else value
 
     def __str__(self):
         return self.name or str(self.index)
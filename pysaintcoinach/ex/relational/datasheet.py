@@ -45,6 +45,8 @@ class RelationalDataIndex(Generic[T]):
 
 
 class IRelationalDataRow(IRelationalRow, IDataRow):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def sheet(self) -> 'IRelationalDataSheet':
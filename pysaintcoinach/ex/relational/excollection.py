@@ -1,5 +1,5 @@
 from typing import overload, cast, TypeVar, Type
-from ..excollection import ExCollection
+from ..excollection import ExCollection, SheetCachePolicy
 from .datasheet import RelationalDataSheet
 from .definition import RelationDefinition
 from . import IRelationalRow, IRelationalSheet
@@ -17,8 +17,8 @@ class RelationalExCollection(ExCollection):
     @definition.setter
     def definition(self, value): self.__definition = value
 
-    def __init__(self, pack_collection):
-        super(RelationalExCollection, self).__init__(pack_collection)
+    def __init__(self, pack_collection, cache_policy: SheetCachePolicy = None):
+        super(RelationalExCollection, self).__init__(pack_collection, cache_policy)
         self.__definition = RelationDefinition()
 
     def _create_header(self, name, file):
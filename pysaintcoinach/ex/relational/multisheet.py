@@ -11,6 +11,8 @@ from ... import ex
 
 
 class IRelationalMultiRow(IRelationalRow, IMultiRow):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def sheet(self) -> 'IRelationalMultiSheet':
@@ -45,6 +47,8 @@ class IRelationalMultiSheet(IMultiSheet[TMulti, TData], IRelationalSheet[TMulti]
 
 
 class RelationalMultiRow(MultiRow, IRelationalMultiRow):
+    __slots__ = ()
+
     def __init__(self, sheet: IMultiSheet, key: int):
         super(RelationalMultiRow, self).__init__(sheet, key)
 
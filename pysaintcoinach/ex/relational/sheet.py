@@ -7,6 +7,8 @@ from ... import ex
 
 
 class IRelationalRow(IRow):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def sheet(self) -> 'IRelationalSheet':
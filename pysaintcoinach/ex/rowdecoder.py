@@ -0,0 +1,113 @@
+from struct import Struct
+from typing import Iterable as IterableT, List
+
+from .datareaders import PackedBooleanDataReader, StringDataReader
+from .. import ex
+
+
+class RowDecoder(object):
+    """
+    Decoder for the fixed-size section of the rows of a sheet.
+
+    All fixed-size columns are compiled, in offset order, into a single
+    big-endian struct, so a row's fixed section is unpacked with one call.
+    Packed booleans sharing a byte are unpacked once and masked; strings
+    are unpacked as their offset into the variable section and only
+    decoded when their column is asked for.
+    """
+
+    # How each column's value is taken from the unpacked fields.
+    _VALUE = 0
+    _BIT = 1
+    _STRING = 2
+    _COLUMN = 3  # Read on its own, for columns the struct can not hold.
+
+    @property
+    def header(self) -> 'ex.Header': return self.__header
+
+    @property
+    def struct(self) -> Struct: return self.__struct
+
+    def __init__(self, header: 'ex.Header'):
+        self.__header = header
+        self.__fixed_size_data_length = header.fixed_size_data_length
+        self.__string_reader = None  # type: StringDataReader
+
+        columns = list(header.columns)
+        specs = [self.__get_field(column) for column in columns]
+
+        # Lay out the distinct fields, padding the gaps between them.
+        fields = {}
+        format_parts = ['>']
+        end = 0
+        for offset, code, length in sorted(set(spec for spec in specs if spec is not None)):
+            if offset < end:
+                continue
+            if offset > end:
+                format_parts.append('%ux' % (offset - end))
+            fields[(offset, code, length)] = len(fields)
+            format_parts.append(code)
+            end = offset + length
+        self.__struct = Struct(''.join(format_parts))
+
+        self.__plan = []
+        for column, spec in zip(columns, specs):
+            field = fields.get(spec)
+            if field is None:
+                self.__plan.append((self._COLUMN, 0, 0, column))
+            elif isinstance(column.reader, PackedBooleanDataReader):
+                self.__plan.append((self._BIT, field, column.reader.mask, column))
+            elif isinstance(column.reader, StringDataReader):
+                self.__string_reader = column.reader
+                self.__plan.append((self._STRING, field, 0, column))
+            else:
+                self.__plan.append((self._VALUE, field, 0, column))
+
+    def __repr__(self):
+        return "RowDecoder(%s, %r)" % (self.header.name, self.struct.format)
+
+    @staticmethod
+    def __get_field(column: 'ex.Column'):
+        reader = column.reader
+        if isinstance(reader, PackedBooleanDataReader):
+            return column.offset, 'B', 1
+        if isinstance(reader, StringDataReader):
+            return column.offset, 'l', 4
+        if reader.format is None:
+            return None
+        return column.offset, reader.format.lstrip('<>!='), reader.length
+
+    def unpack(self, buffer: bytes, offset: int) -> tuple:
+        """
+        Unpacks the fixed-size section of the row whose data starts at
+        `offset`, one item per distinct field.
+        """
+        return self.__struct.unpack_from(buffer, offset)
+
+    def read_raw(self,
+                 buffer: bytes,
+                 row: 'ex.IDataRow',
+                 column_indices: IterableT[int] = None) -> List[object]:
+        """
+        Gets the raw values of the given columns of a row, or of all its
+        columns, in one pass.
+        """
+        offset = row.offset
+        fields = self.__struct.unpack_from(buffer, offset)
+        if column_indices is None:
+            plan = self.__plan
+        else:
+            plan = [self.__plan[i] for i in column_indices]
+
+        values = []
+        for kind, field, mask, column in plan:
+            if kind == self._VALUE:
+                values.append(fields[field])
+            elif kind == self._BIT:
+                values.append((fields[field] & mask) != 0)
+            elif kind == self._STRING:
+                start = offset + self.__fixed_size_data_length + fields[field]
+                values.append(self.__string_reader.read_string(buffer, start))
+            else:
+                values.append(column.read_raw(buffer, row))
+        return values
@@ -5,6 +5,8 @@ from .. import ex
 
 
 class IRow(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def sheet(self) -> 'ISheet':
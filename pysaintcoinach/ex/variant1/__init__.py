@@ -3,14 +3,16 @@ from struct import unpack_from
 
 from ..datasheet import DataRowBase, IDataSheet
 from ..relational.datasheet import IRelationalDataRow, IRelationalDataSheet
-from ...util import ConcurrentDictionary
 
 
 class DataRow(DataRowBase):
+    __slots__ = ()
+
     METADATA_LENGTH = 0x06
 
     @property
-    def length(self): return self.__length
+    def length(self):
+        return unpack_from(">l", self.sheet.get_buffer(), self.offset - self.METADATA_LENGTH)[0]
 
     def __init__(self, sheet: IDataSheet, key: int, offset: int):
         super(DataRow, self).__init__(sheet, key, offset + self.METADATA_LENGTH)
@@ -19,18 +21,19 @@ class DataRow(DataRowBase):
         if len(b) < (offset + self.METADATA_LENGTH):
             raise ValueError("Index out of range")
 
-        self.__length, c = unpack_from(">lh", b, offset)
+        c, = unpack_from(">h", b, offset + 4)
         if c != 1:
             raise ValueError("Invalid data")
 
 
 class RelationalDataRow(DataRow, IRelationalDataRow):
+    __slots__ = ()
+
     def __init__(self,
                  sheet: IDataSheet,
                  key: int,
                  offset: int):
         super(RelationalDataRow, self).__init__(sheet, key, offset)
-        self.__value_references = ConcurrentDictionary()  # type: ConcurrentDictionary[str, object]
 
     @property
     def sheet(self) -> IRelationalDataSheet:
@@ -52,14 +55,10 @@ class RelationalDataRow(DataRow, IRelationalDataRow):
         if isinstance(item, int):
             return super(RelationalDataRow, self).__getitem__(item)
 
-        val_ref = self.__value_references.get_or_add(item, lambda c: self.__get_column_value(c))
-        # Not using weak references, so just return the result.
-        return val_ref
-
-    def __get_column_value(self, column_name: str) -> object:
-        col = self.sheet.header.find_column(column_name)
+        # Values are cached by column index, in the sheet.
+        col = self.sheet.header.find_column(item)
         if col is None:
-            raise KeyError(column_name)
+            raise KeyError(item)
         return self[col.index]
 
     def get_raw(self, column_name: Union[str, int] = None, **kwargs) -> object:
@@ -8,6 +8,8 @@ from ..relational.datasheet import IRelationalDataSheet
 
 
 class SubRow(DataRowBase, IRelationalDataRow):
+    __slots__ = ('__parent_row',)
+
     @property
     def parent_row(self): return self.__parent_row
 
@@ -49,10 +51,13 @@ class SubRow(DataRowBase, IRelationalDataRow):
 
 
 class DataRow(DataRowBase):
+    __slots__ = ('__sub_row_count', '__is_read', '__sub_rows')
+
     METADATA_LENGTH = 0x06
 
     @property
-    def length(self): return self.__length
+    def length(self):
+        return unpack_from(">l", self.sheet.get_buffer(), self.offset - self.METADATA_LENGTH)[0]
 
     @property
     def sub_row_count(self): return self.__sub_row_count
@@ -83,7 +88,7 @@ class DataRow(DataRowBase):
         if len(b) < (offset + self.METADATA_LENGTH):
             raise ValueError("Index out of range")
 
-        self.__length, self.__sub_row_count = unpack_from(">lh", b, offset)
+        self.__sub_row_count, = unpack_from(">h", b, offset + 4)
 
     def _read(self):
         self.__sub_rows.clear()
@@ -108,8 +113,13 @@ class DataRow(DataRowBase):
     def get_raw(self, column_index: int, **kwargs):
         raise RuntimeError('Invalid Operation: Cannot get column on Variant 2 DataRow. Use GetSubRow instead.')
 
+    def get_values(self, column_indices=None, raw=False):
+        raise RuntimeError('Invalid Operation: Cannot get column on Variant 2 DataRow. Use GetSubRow instead.')
+
 
 class RelationalDataRow(DataRow, IRelationalDataRow):
+    __slots__ = ()
+
     @property
     def sheet(self) -> IRelationalDataSheet:
         return super(RelationalDataRow, self).sheet
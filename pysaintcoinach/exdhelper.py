@@ -89,13 +89,17 @@ class ExdHelper(object):
             multi_row = cast(IMultiRow, use_row)
 
             row_line = [write_key(use_row)]
-            for col in col_indices:
-                if language == Language.none or multi_row is None:
-                    v = use_row.get_raw(col) if write_raw else use_row[col]
-                else:
-                    v = multi_row.get_raw(col, language) if write_raw else multi_row[(col, language)]
+            data_row = ExdHelper._get_data_row(use_row, language)
+            if data_row is not None:
+                row_line.extend(data_row.get_values(col_indices, write_raw))
+            else:
+                for col in col_indices:
+                    if language == Language.none or multi_row is None:
+                        v = use_row.get_raw(col) if write_raw else use_row[col]
+                    else:
+                        v = multi_row.get_raw(col, language) if write_raw else multi_row[(col, language)]
 
-                row_line.append(v)
+                    row_line.append(v)
 
             writer.writerow(row_line)
 
@@ -141,18 +145,38 @@ class ExdHelper(object):
 
         key = get_key(use_row)
         out_row = {}
-        for col in cols:
-            v = None
-            if language == Language.none or multi_row is None:
-                v = use_row[col.index]
-            else:
-                v = multi_row[(col.index, language)]
+        data_row = ExdHelper._get_data_row(use_row, language)
+        if data_row is not None:
+            values = data_row.get_values([col.index for col in cols])
+        else:
+            values = []
+            for col in cols:
+                if language == Language.none or multi_row is None:
+                    values.append(use_row[col.index])
+                else:
+                    values.append(multi_row[(col.index, language)])
 
+        for col, v in zip(cols, values):
             if v is not None:
                 out_row[col.name or col.index] = str(v)
 
         return key, out_row
 
+    @staticmethod
+    def _get_data_row(row: IRow, language: Language):
+        """
+        Gets the data row holding the values of `row` in `language`, whose
+        columns can be read in one go, or None if there is none.
+        """
+        from .ex import IMultiRow, DataRowBase
+
+        if isinstance(row, IMultiRow):
+            sheet = row.sheet.active_sheet if language == Language.none else row.sheet.get_localised_sheet(language)
+            row = sheet[row.key]
+        elif language != Language.none:
+            return None
+        return row if isinstance(row, DataRowBase) else None
+
     @staticmethod
     def get_row_key(row: IRow):
         return row.key
@@ -1,10 +1,15 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 import io
 import struct
+import time
 import zlib
 import weakref
 import logging
+from typing import Iterable, List, Tuple
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +41,8 @@ class FileFactory(object):
 
         if header.file_type not in FILE_FACTORY_INIT_MAP:
             raise TypeError("Unknown file type %02X" % header.file_type)
+        if pack.statistics is not None:
+            pack.statistics.add('files_created')
         return FILE_FACTORY_INIT_MAP[header.file_type](pack, header)
 
 
@@ -71,7 +78,7 @@ class FileCommonHeader(object):
         FILE_LENGTH_OFFSET = 0x10
         FILE_LENGTH_SHIFT = 7
 
-        self._buffer = stream.read(4)
+        self._buffer = bytes(stream.read(4))
 
         length, = struct.unpack_from('<l', self._buffer, 0)
 
@@ -104,6 +111,21 @@ class File(ABC):
     @path.setter
     def path(self, value): self._path = value
 
+    @property
+    def cache_key(self):
+        """
+        Gets the key identifying this file's payload in the pack's cache.
+        """
+        return self.index.pack_id, self.index.dat_file, self.index.offset
+
+    @property
+    def blob_key(self):
+        """
+        Gets the key identifying this file's payload in the pack's blob store.
+        """
+        start, end = self._get_extent()
+        return hash(self.index.pack_id), self.index.dat_file, self.index.offset, end - start
+
     def __init__(self, pack, common_header):
         self._path = None
         self._pack = pack
@@ -122,17 +144,195 @@ class File(ABC):
     def get_stream(self):
         return io.BytesIO(self.get_data())
 
+    def open(self) -> io.RawIOBase:
+        """
+        Opens a read-only, seekable stream over the file's data which only
+        inflates the blocks that are actually read.
+        """
+        return PackedFileStream(self, self._get_block_map(), self._get_padded_length())
+
     def _get_source_stream(self) -> io.RawIOBase:
         return self.pack.get_data_stream(self.index.dat_file)
 
+    def _get_cached(self, key, factory, sizeof=None):
+        """
+        Gets a value from the pack's payload cache, creating it with
+        `factory` on a miss.
+        """
+        statistics = self.pack.statistics
+        if statistics is None:
+            return self.pack.payload_cache.get_or_add(key, factory, sizeof)
+
+        misses = []
+
+        def _create(k):
+            misses.append(k)
+            return factory(k)
+
+        value = self.pack.payload_cache.get_or_add(key, _create, sizeof)
+        statistics.add('cache_misses' if len(misses) > 0 else 'cache_hits')
+        return value
+
+    def _read_stored(self) -> bytes:
+        """
+        Reads the file's data from the pack's blob store, inflating and
+        storing it there on a miss.
+        """
+        store = self.pack.blob_store
+        if store is None:
+            return self._read()
+
+        data = store.get(self.blob_key)
+        if data is None:
+            data = self._inflate_stored(self._read_sources())
+        return data
+
+    def _inflate_stored(self, blocks: List[Tuple[bytes, bool, int]]) -> bytes:
+        """
+        Inflates blocks read by `_read_sources` into the file's data, and
+        keeps it in the pack's blob store.
+        """
+        data = self._inflate_blocks(blocks, self._get_padded_length())
+        store = self.pack.blob_store
+        if store is not None:
+            store.put(self.blob_key, data)
+        return data
+
+    def _read(self, source_stream: io.RawIOBase = None) -> bytes:
+        """
+        Reads the file's data, bypassing the payload cache.
+
+        Unless a source stream is given, the blocks are parsed from a single
+        read of the file's whole extent.
+        """
+        return self._inflate_blocks(self._read_sources(source_stream), self._get_padded_length())
+
+    def _read_sources(self, source_stream: io.RawIOBase = None) -> List[Tuple[bytes, bool, int]]:
+        """
+        Reads the file's blocks without inflating them; see `_read`.
+        """
+        positions = self._get_block_positions()
+        if source_stream is None and len(positions) > 0:
+            try:
+                return self._read_block_sources(positions, self._read_extent(positions))
+            except EOFError:
+                # The header understated the file's extent; read block by block.
+                pass
+        return self._read_block_sources(positions, source_stream)
+
+    def _read_extent(self, positions: List[int]) -> io.RawIOBase:
+        """
+        Reads everything from the first of the given blocks to the end of the
+        file in one go, and gets a stream over it.
+        """
+        from .pack import BufferStream
+
+        start = min(positions)
+        _, end = self._get_extent()
+        source_stream = self._get_source_stream()
+        source_stream.seek(start)
+        return BufferStream(memoryview(source_stream.read(max(0, end - start))), start)
+
+    def _get_extent(self) -> Tuple[int, int]:
+        """
+        Gets the start and end offsets of the file inside its dat file.
+        """
+        return self.index.offset, self.common_header.end_of_header
+
+    def _get_block_positions(self) -> List[int]:
+        """
+        Gets the position in the dat file of each of the file's data blocks.
+        """
+        return []
+
+    def _get_block_map(self) -> List[Tuple[int, int]]:
+        """
+        Gets the position and raw size of each of the file's data blocks.
+        """
+        RAW_SIZE_OFFSET = 0x0C
+
+        source_stream = self._get_source_stream()
+        blocks = []
+        for position in self._get_block_positions():
+            source_stream.seek(position + RAW_SIZE_OFFSET)
+            raw_size, = struct.unpack('<l', source_stream.read(4))
+            blocks.append((position, raw_size))
+        return blocks
+
+    def _get_padded_length(self) -> int:
+        return 0
+
+    def _read_block_sources(self,
+                            positions: Iterable[int],
+                            source_stream: io.RawIOBase = None) -> List[Tuple[bytes, bool, int]]:
+        if source_stream is None:
+            source_stream = self._get_source_stream()
+        blocks = []
+        for position in positions:
+            source_stream.seek(position)
+            blocks.append(File._read_block_source(source_stream))
+        return blocks
+
+    def _inflate_blocks(self, blocks: List[Tuple[bytes, bool, int]], min_length: int = 0) -> bytes:
+        """
+        Inflates blocks read by `_read_block_sources` into the file's data,
+        zero-padded to `min_length`.
+        """
+        decompressor = self.pack.decompressor
+        statistics = self.pack.statistics
+
+        if decompressor is None:
+            return File._join([File._inflate_block(*block, statistics) for block in blocks], min_length)
+        if statistics is None:
+            return decompressor.decompress(blocks, min_length)
+
+        start = time.perf_counter()
+        data = decompressor.decompress(blocks, min_length)
+        statistics.add_inflate(len(blocks),
+                               sum(raw_size for _, _, raw_size in blocks),
+                               time.perf_counter() - start)
+        return data
+
+    @staticmethod
+    def _join(parts: List[bytes], min_length: int = 0) -> bytes:
+        """
+        Concatenates inflated blocks, zero-padded to `min_length`, copying
+        each of them exactly once.
+        """
+        length = sum(map(len, parts))
+        if length < min_length:
+            parts.append(bytes(min_length - length))
+        return b''.join(parts)
+
     @staticmethod
-    def _read_block(stream):
-        with io.BytesIO() as out_stream:
-            File._read_block_into(stream, out_stream)
-            return out_stream.getvalue()
+    def _inflate_block(buffer, is_compressed: bool, raw_size: int, statistics=None):
+        """
+        Inflates a block read by `_read_block_source`, checking its size.
+
+        Stored blocks are returned as they are, which is a view into the
+        source buffer when it was read through a `BufferStream`.
+        """
+        if not is_compressed:
+            return buffer
+
+        # Sizing the output up front spares zlib from growing it.
+        if statistics is None:
+            data = zlib.decompress(buffer, -15, max(raw_size, 1))
+        else:
+            start = time.perf_counter()
+            data = zlib.decompress(buffer, -15, max(raw_size, 1))
+            statistics.add_inflate(1, len(data), time.perf_counter() - start)
+        if len(data) != raw_size:
+            raise RuntimeError("Inflated block does not match indicated size")
+        return data
 
     @staticmethod
-    def _read_block_into(in_stream: io.RawIOBase, out_stream: io.RawIOBase):
+    def _read_block_source(in_stream: io.RawIOBase) -> Tuple[bytes, bool, int]:
+        """
+        Reads a block's header and payload, without inflating it.
+
+        Returns the payload, whether it is compressed, and its raw size.
+        """
         MAGIC = 0x00000010
 
         HEADER_LENGTH = 0x10
@@ -177,12 +377,7 @@ class File(ABC):
         if len(buffer) != block_size:
             raise EOFError
 
-        if is_compressed:
-            current_position = out_stream.tell()
-            if raw_size != out_stream.write(zlib.decompress(buffer, -15)):
-                raise RuntimeError("Inflated block does not match indicated size")
-        else:
-            out_stream.write(buffer)
+        return buffer, is_compressed, raw_size
 
     def __hash__(self):
         return hash(self.index)
@@ -204,33 +399,203 @@ class EmptyFile(File):
 class FileDefault(File):
     def __init__(self, pack, header):
         super().__init__(pack, header)
-        self._buffer_cache = None
 
     def get_data(self):
-        if self._buffer_cache is not None:
-            return self._buffer_cache
-
-        logger.info('Getting data for: %s' % self.path)
-        buffer = self.__read()
-
-        self._buffer_cache = buffer
+        def _read(key):
+            logger.info('Getting data for: %s' % self.path)
+            return self._read_stored()
 
-        return buffer
+        return self._get_cached(self.cache_key, _read)
 
-    def __read(self):
+    def _get_block_infos(self) -> List[Tuple[int, int, int]]:
+        """
+        Gets the position, size in the dat file, and raw size of each block.
+        """
         BLOCK_COUNT_OFFSET = 0x14
         BLOCK_INFO_OFFSET = 0x18
         BLOCK_INFO_LENGTH = 0x08
 
-        source_stream = self._get_source_stream()
         block_count, = struct.unpack_from('<h', self.common_header._buffer, BLOCK_COUNT_OFFSET)
 
-        with io.BytesIO(b'\0' * len(self.common_header)) as data_stream:
-            for i in range(0, block_count):
-                block_offset, = struct.unpack_from('<l',
-                                                   self.common_header._buffer,
-                                                   BLOCK_INFO_OFFSET + i * BLOCK_INFO_LENGTH)
-                source_stream.seek(self.common_header.end_of_header + block_offset)
-                File._read_block_into(source_stream, data_stream)
+        infos = []
+        for i in range(0, block_count):
+            block_offset, size, raw_size = struct.unpack_from('<lHH',
+                                                              self.common_header._buffer,
+                                                              BLOCK_INFO_OFFSET + i * BLOCK_INFO_LENGTH)
+            infos.append((self.common_header.end_of_header + block_offset, size, raw_size))
+        return infos
+
+    def _get_block_positions(self) -> List[int]:
+        return [position for position, _, _ in self._get_block_infos()]
+
+    def _get_block_map(self) -> List[Tuple[int, int]]:
+        # The block table already records each block's raw size.
+        return [(position, raw_size) for position, _, raw_size in self._get_block_infos()]
+
+    def _get_extent(self) -> Tuple[int, int]:
+        start, end = super(FileDefault, self)._get_extent()
+        for position, size, _ in self._get_block_infos():
+            end = max(end, position + size)
+        return start, end
+
+    def _get_padded_length(self) -> int:
+        return len(self.common_header)
 
-            return data_stream.getvalue()
+
+class BlockDecompressor(object):
+    """
+    Inflates the blocks of a file one after another.
+    """
+
+    def decompress(self, blocks: List[Tuple[bytes, bool, int]], min_length: int = 0) -> bytes:
+        return File._join([self._inflate(block) for block in blocks], min_length)
+
+    @staticmethod
+    def _inflate(block: Tuple[bytes, bool, int]) -> bytes:
+        return File._inflate_block(*block)
+
+
+class ParallelBlockDecompressor(BlockDecompressor):
+    """
+    Inflates the blocks of large files concurrently on a shared thread pool.
+
+    `zlib` releases the GIL while inflating, so each block is inflated on a
+    worker and the results are joined in order. Files whose raw size is
+    below `threshold` keep using the serial path.
+    """
+
+    DEFAULT_THRESHOLD = 0x40000
+
+    @property
+    def max_workers(self) -> int: return self._max_workers
+
+    @property
+    def threshold(self) -> int: return self._threshold
+
+    def __init__(self, max_workers: int = None, threshold: int = DEFAULT_THRESHOLD):
+        self._max_workers = max_workers
+        self._threshold = threshold
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='inflate')
+
+    def decompress(self, blocks: List[Tuple[bytes, bool, int]], min_length: int = 0) -> bytes:
+        raw_length = sum(raw_size for _, _, raw_size in blocks)
+        if len(blocks) < 2 or raw_length < self.threshold:
+            return super(ParallelBlockDecompressor, self).decompress(blocks, min_length)
+
+        # Errors in workers are raised here while collecting the results.
+        return File._join(list(self._executor.map(self._inflate, blocks)), min_length)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class PackedFileStream(io.RawIOBase):
+    """
+    Read-only, seekable stream over the data of a packed file.
+
+    Logical offsets are mapped to blocks through the file's block map, and
+    only the blocks that are actually read are inflated. The most recently
+    used blocks are kept in a small cache.
+    """
+
+    DEFAULT_CACHED_BLOCKS = 4
+
+    @property
+    def file(self) -> File: return self._file
+
+    def __init__(self,
+                 file: File,
+                 blocks: List[Tuple[int, int]],
+                 min_length: int = 0,
+                 cached_blocks: int = DEFAULT_CACHED_BLOCKS):
+        super(PackedFileStream, self).__init__()
+        self._file = file
+        self._positions = []  # type: List[int]
+        self._starts = []  # type: List[int]
+        self._sizes = []  # type: List[int]
+        data_length = 0
+        for position, raw_size in blocks:
+            if raw_size <= 0:
+                continue
+            self._positions.append(position)
+            self._starts.append(data_length)
+            self._sizes.append(raw_size)
+            data_length += raw_size
+        self._data_length = data_length
+        self._length = max(data_length, min_length)
+        self._position = 0
+        self._cached_blocks = cached_blocks
+        self._block_cache = OrderedDict()  # type: OrderedDict[int, bytes]
+
+    def __len__(self):
+        return self._length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._length
+        elif whence != io.SEEK_SET:
+            raise ValueError('whence')
+        if offset < 0:
+            raise ValueError('offset')
+        self._position = offset
+        return offset
+
+    def readinto(self, b) -> int:
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+
+        view = memoryview(b).cast('B')
+        count = min(len(view), self._length - self._position)
+        if count <= 0:
+            return 0
+
+        written = 0
+        while written < count:
+            position = self._position + written
+            if position >= self._data_length:
+                # Zero padding past the last block.
+                view[written:count] = bytes(count - written)
+                written = count
+                break
+
+            i = bisect_right(self._starts, position) - 1
+            data = self._get_block(i)
+            start = position - self._starts[i]
+            length = min(len(data) - start, count - written)
+            view[written:written + length] = data[start:start + length]
+            written += length
+
+        self._position += count
+        return count
+
+    def _get_block(self, i: int) -> bytes:
+        data = self._block_cache.get(i)
+        if data is not None:
+            self._block_cache.move_to_end(i)
+            return data
+
+        source_stream = self.file._get_source_stream()
+        source_stream.seek(self._positions[i])
+        buffer, is_compressed, raw_size = File._read_block_source(source_stream)
+        data = bytes(File._inflate_block(buffer, is_compressed, raw_size, self.file.pack.statistics))
+        if len(data) != self._sizes[i]:
+            raise RuntimeError("Inflated block does not match indicated size")
+
+        self._block_cache[i] = data
+        while len(self._block_cache) > self._cached_blocks:
+            self._block_cache.popitem(last=False)
+        return data
@@ -3,7 +3,7 @@ import io
 import struct
 from enum import Enum
 from io import StringIO, BytesIO
-from typing import Iterable, List, Callable, Dict
+from typing import Iterable, List, Callable, Dict, Tuple
 
 from PIL import Image
 
@@ -51,7 +51,7 @@ class ImageHeader(object):
         WIDTH_OFFSET = 0x08
         HEIGHT_OFFSET = 0x0A
 
-        self._buffer = stream.read(LENGTH)
+        self._buffer = bytes(stream.read(LENGTH))
         if len(self._buffer) != LENGTH:
             raise EOFError
 
@@ -83,45 +83,41 @@ class ImageFile(File):
                  pack: Pack,
                  common_header: FileCommonHeader):
         super(ImageFile, self).__init__(pack, common_header)
-        self.__buffer_cache = None  # type: bytes
-        self.__image_cache = None  # type: object
         stream = self._get_source_stream()
         stream.seek(common_header.end_of_header)
         self.__image_header = ImageHeader(stream)
 
     def get_image(self) -> Image.Image:
-        if self.__image_cache is not None:
-            return self.__image_cache
+        def _get_image_size(image):
+            if not isinstance(image, Image.Image):
+                return 0
+            return image.width * image.height * len(image.getbands())
 
-        image = ImageConverter.convert(self)
-
-        # self.__image_cache = weakref.proxy(image)
-        self.__image_cache = image
-        return image
+        return self._get_cached(self.cache_key + ('image',),
+                                lambda k: ImageConverter.convert(self),
+                                _get_image_size)
 
     def get_data(self) -> bytes:
-        if self.__buffer_cache is not None:
-            return self.__buffer_cache
+        return self._get_cached(self.cache_key, lambda k: self._read_stored())
 
-        buffer = self._read()
+    def _get_block_positions(self) -> List[int]:
+        return [self.image_header.end_of_header + offset for offset in self._get_block_offsets()]
 
-        self.__buffer_cache = buffer
+    def _get_extent(self) -> Tuple[int, int]:
+        start, _ = super(ImageFile, self)._get_extent()
+        return start, self.image_header.end_of_header + sum(self._get_block_sizes())
 
-        return buffer
+    def _get_block_offsets(self) -> Iterable[int]:
+        current_offset = 0
+        offsets = []  # type: List[int]
 
-    def _read(self) -> bytes:
-        source_stream = self._get_source_stream()
-        offsets = self._get_block_offsets()
+        for _len in self._get_block_sizes():
+            offsets += [current_offset]
+            current_offset += _len
 
-        data = b''
-        with io.BytesIO() as data_stream:
-            for offset in offsets:
-                source_stream.seek(self.image_header.end_of_header + offset)
-                self._read_block_into(source_stream, data_stream)
-            data = data_stream.getvalue()
-        return data
+        return offsets
 
-    def _get_block_offsets(self) -> Iterable[int]:
+    def _get_block_sizes(self) -> List[int]:
         COUNT_OFFSET = 0x14
         ENTRY_LENGTH = 0x14
         BLOCK_INFO_OFFSET = 0x18
@@ -129,19 +125,17 @@ class ImageFile(File):
         count, = struct.unpack_from('<h',
                                     self.common_header._buffer,
                                     COUNT_OFFSET)
-        current_offset = 0
-        offsets = []  # type: List[int]
+        sizes = []  # type: List[int]
 
         i = BLOCK_INFO_OFFSET + count * ENTRY_LENGTH
         while i + 2 <= len(self.common_header._buffer):
             _len, = struct.unpack_from('<H', self.common_header._buffer, i)
             if _len == 0:
                 break
-            offsets += [current_offset]
-            current_offset += _len
+            sizes += [_len]
             i += 2
 
-        return offsets
+        return sizes
 
 
 class _ImageConverter(object):
@@ -0,0 +1,238 @@
+from pathlib import Path
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Callable, List, Tuple
+
+from .indexfile import IndexTable
+from .util import replace_file
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndexCache(object):
+    """
+    Persistent on-disk cache of parsed index tables and the sheet list.
+
+    Each entry is keyed by the absolute path, size and modification time of
+    its source file plus the game version, and is stored in a flat binary
+    layout that is memory-mapped back in without any parsing.
+    """
+
+    MAGIC = b'SCIC'
+    FORMAT_VERSION = 1
+
+    KIND_TABLE = 1
+    KIND_SHEET_LIST = 2
+
+    # Magic, format version, kind, flags, source size, source mtime,
+    # game version, entry count.
+    _HEADER = struct.Struct('<4sIIIQq64sI4x')
+    _SHEET_ENTRY = struct.Struct('<lH')
+
+    FLAG_DIRECTORY_KEYS = 0x01
+
+    @property
+    def directory(self) -> Path: return self._directory
+
+    @property
+    def game_version(self) -> str: return self._game_version
+
+    def __init__(self, directory, game_version: str = None):
+        if isinstance(directory, str):
+            directory = Path(directory)
+        self._directory = directory
+        self._game_version = (game_version or '').strip()
+
+    def __repr__(self):
+        return "IndexCache(%s)" % self.directory
+
+    def get_table(self,
+                  source_path: str,
+                  has_directory_keys: bool,
+                  factory: Callable[[], IndexTable]) -> IndexTable:
+        """
+        Gets the table for an index file, building and storing it with
+        `factory` when the cache has no valid entry.
+        """
+        cache_path = self._get_cache_path(source_path, '.idx')
+        key = self._get_source_key(source_path)
+
+        try:
+            table = self._load_table(cache_path, key)
+        except (OSError, ValueError, struct.error) as exc:
+            logger.warning('Ignoring index cache %s: %s', cache_path, exc)
+            table = None
+        if table is not None:
+            return table
+
+        table = factory()
+        try:
+            self._store_table(cache_path, key, table, has_directory_keys)
+        except OSError as exc:
+            logger.warning('Failed to write index cache %s: %s', cache_path, exc)
+        return table
+
+    def get_sheet_list(self,
+                       source_path: str,
+                       factory: Callable[[], List[Tuple[str, int]]]) -> List[Tuple[str, int]]:
+        """
+        Gets the (name, id) pairs of the sheet list, keyed on the index file
+        of the pack that contains it.
+        """
+        cache_path = self._get_cache_path(source_path, '.exl')
+        key = self._get_source_key(source_path)
+
+        try:
+            entries = self._load_sheet_list(cache_path, key)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError) as exc:
+            logger.warning('Ignoring sheet list cache %s: %s', cache_path, exc)
+            entries = None
+        if entries is not None:
+            return entries
+
+        entries = factory()
+        try:
+            self._store_sheet_list(cache_path, key, entries)
+        except OSError as exc:
+            logger.warning('Failed to write sheet list cache %s: %s', cache_path, exc)
+        return entries
+
+    def _get_cache_path(self, source_path: str, suffix: str) -> Path:
+        source_path = os.path.abspath(source_path)
+        digest = hashlib.sha1(source_path.encode()).hexdigest()[:16]
+        return self.directory.joinpath(Path(source_path).name + '.' + digest + suffix)
+
+    def _get_source_key(self, source_path: str) -> Tuple[int, int, bytes]:
+        stat = os.stat(source_path)
+        return stat.st_size, stat.st_mtime_ns, self.game_version.encode()[:64]
+
+    def _pack_header(self, kind, flags, key, count) -> bytes:
+        size, mtime, version = key
+        return self._HEADER.pack(self.MAGIC, self.FORMAT_VERSION, kind, flags,
+                                 size, mtime, version, count)
+
+    def _check_header(self, buffer, kind, key):
+        if len(buffer) < self._HEADER.size:
+            return None
+        magic, fmt, _kind, flags, size, mtime, version, count = self._HEADER.unpack_from(buffer, 0)
+        if magic != self.MAGIC or fmt != self.FORMAT_VERSION or _kind != kind:
+            return None
+        if (size, mtime, version.rstrip(b'\0')) != key:
+            return None
+        return flags, count
+
+    @staticmethod
+    def _align(position: int) -> int:
+        return (position + 7) & ~7
+
+    def _load_table(self, cache_path: Path, key) -> IndexTable:
+        if not cache_path.exists():
+            return None
+
+        with cache_path.open(mode='rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._parse_table(memoryview(mapping), key)
+
+    def _parse_table(self, view: memoryview, key) -> IndexTable:
+        """
+        Gets the table stored in `view` without copying it, or None if it was
+        stored for a different source or game version.
+        """
+        header = self._check_header(view, self.KIND_TABLE, key)
+        if header is None:
+            return None
+        flags, count = header
+
+        position = self._HEADER.size
+        file_keys = self._get_array(view, position, count, 'I')
+        position += count * 4
+        directory_keys = None
+        if flags & self.FLAG_DIRECTORY_KEYS:
+            directory_keys = self._get_array(view, position, count, 'I')
+            position += count * 4
+        position = self._align(position)
+        offsets = self._get_array(view, position, count, 'Q')
+        position += count * 8
+        dat_files = self._get_array(view, position, count, 'B')
+        if len(dat_files) != count:
+            raise ValueError('truncated')
+
+        return IndexTable(file_keys, directory_keys, dat_files, offsets)
+
+    @staticmethod
+    def _get_array(view: memoryview, position: int, count: int, typecode: str):
+        length = count * struct.calcsize(typecode)
+        if position + length > len(view):
+            raise ValueError('truncated')
+        data = view[position:position + length]
+        if sys.byteorder == 'little' or typecode == 'B':
+            return data.cast(typecode)
+
+        values = array(typecode)
+        values.frombytes(data)
+        values.byteswap()
+        return values
+
+    def _store_table(self, cache_path: Path, key, table: IndexTable, has_directory_keys: bool):
+        self._write(cache_path, self._serialize_table(key, table, has_directory_keys))
+
+    def _serialize_table(self, key, table: IndexTable, has_directory_keys: bool) -> bytes:
+        count = len(table)
+        flags = self.FLAG_DIRECTORY_KEYS if has_directory_keys else 0
+
+        parts = [self._pack_header(self.KIND_TABLE, flags, key, count),
+                 self._to_bytes(table.file_keys, 'I')]
+        if has_directory_keys:
+            parts.append(self._to_bytes(table.directory_keys, 'I'))
+        position = sum(map(len, parts))
+        parts.append(b'\0' * (self._align(position) - position))
+        parts.append(self._to_bytes(table.offsets, 'Q'))
+        parts.append(self._to_bytes(table.dat_files, 'B'))
+        return b''.join(parts)
+
+    @staticmethod
+    def _to_bytes(values, typecode: str) -> bytes:
+        values = array(typecode, values)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values.tobytes()
+
+    def _load_sheet_list(self, cache_path: Path, key) -> List[Tuple[str, int]]:
+        if not cache_path.exists():
+            return None
+
+        buffer = cache_path.read_bytes()
+        header = self._check_header(buffer, self.KIND_SHEET_LIST, key)
+        if header is None:
+            return None
+        _, count = header
+
+        entries = []
+        position = self._HEADER.size
+        for i in range(count):
+            _id, length = self._SHEET_ENTRY.unpack_from(buffer, position)
+            position += self._SHEET_ENTRY.size
+            if position + length > len(buffer):
+                raise ValueError('truncated')
+            entries.append((buffer[position:position + length].decode(), _id))
+            position += length
+        return entries
+
+    def _store_sheet_list(self, cache_path: Path, key, entries: List[Tuple[str, int]]):
+        parts = [self._pack_header(self.KIND_SHEET_LIST, 0, key, len(entries))]
+        for name, _id in entries:
+            encoded = name.encode()
+            parts.append(self._SHEET_ENTRY.pack(_id, len(encoded)))
+            parts.append(encoded)
+
+        self._write(cache_path, b''.join(parts))
+
+    def _write(self, cache_path: Path, data: bytes):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        replace_file(cache_path, (data,))
@@ -1,18 +1,30 @@
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Mapping
+import mmap
+import operator
 import struct
+import sys
 import zlib
-from typing import Dict, Union, Iterator
+from typing import Dict, FrozenSet, Union, Iterator, Iterable as IterableT, List, Tuple
+from weakref import WeakValueDictionary
 
 from .pack import Pack, PackIdentifier
 from .file import FileFactory, File
-from .util import ConcurrentDictionary
 
 
 def _compute_hash(s):
     return ~zlib.crc32(s.lower().encode()) & 0xFFFFFFFF
 
 
+def build_name_table(names: IterableT[str]) -> Dict[int, str]:
+    """
+    Hashes candidate file names into a table of file key to name.
+    """
+    return dict((_compute_hash(name), name) for name in names)
+
+
 class IIndexFile(ABC):
     @property
     @abstractmethod
@@ -66,7 +78,9 @@ class Directory(IPackSource):
         self._pack = pack
         self._index = index
         self._file_name_map = {}  # type: Dict[str, int]
-        self._files = ConcurrentDictionary()  # type: ConcurrentDictionary[int, File]
+        # Files only hold their headers; payloads live in the pack's cache.
+        self._files = WeakValueDictionary()  # type: WeakValueDictionary[int, File]
+        self._file_keys = None  # type: FrozenSet[int]
         self._path = None
 
     def __repr__(self):
@@ -80,11 +94,33 @@ class Directory(IPackSource):
             name_or_key = _compute_hash(name_or_key)
         return name_or_key in self.index.files
 
+    @property
+    def file_keys(self) -> FrozenSet[int]:
+        """
+        Gets the keys of the files actually present in this directory.
+        """
+        if self._file_keys is None:
+            self._file_keys = frozenset(self.index.files)
+        return self._file_keys
+
+    def match_names(self, names: Union[Mapping, IterableT[str]]) -> Dict[int, str]:
+        """
+        Gets the names that exist in this directory, keyed by file key.
+
+        `names` is either an iterable of file names or a prebuilt table of
+        file key to name, which can be shared between directories that use
+        the same candidate names.
+        """
+        if not isinstance(names, Mapping):
+            names = build_name_table(names)
+        return {key: names[key] for key in names.keys() & self.file_keys}
+
     def get_file(self, name_or_key) -> Union[type(None), File]:
         # NOTE: This function /can/ return None!
         def from_key(key):
-            if key in self._files:
-                return self._files[key]
+            file = self._files.get(key)
+            if file is not None:
+                return file
 
             index = self.index.files.get(key)
             if index is None:
@@ -101,10 +137,181 @@ class Directory(IPackSource):
             return from_key(name_or_key)
 
     def __iter__(self) -> Iterator[File]:
-        for file_key in self.index.files.values():
+        for file_key in self.index.files:
             yield self.get_file(file_key)
 
 
+class IndexTable(object):
+    """
+    Compact table of index entries.
+
+    Entries are kept in parallel arrays (file key, directory key, dat file
+    and offset) sorted by directory and file key, so lookups are a binary
+    search and `IndexFile` objects are only created when a lookup hits.
+    """
+
+    # Per byte lookup tables: the dat file held in the low byte of an entry's
+    # base, and that byte with the dat file bits cleared.
+    _DAT_FILE_TABLE = bytes((b & 0x7) >> 1 for b in range(256))
+    _OFFSET_MASK_TABLE = bytes(b & 0xF8 for b in range(256))
+
+    @property
+    def file_keys(self): return self._file_keys
+
+    @property
+    def directory_keys(self): return self._directory_keys
+
+    @property
+    def dat_files(self): return self._dat_files
+
+    @property
+    def offsets(self): return self._offsets
+
+    def __init__(self, file_keys, directory_keys, dat_files, offsets):
+        self._file_keys = file_keys
+        self._directory_keys = directory_keys
+        self._dat_files = dat_files
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._file_keys)
+
+    @staticmethod
+    def read(buffer, entry_length: int, has_directory_keys: bool) -> 'IndexTable':
+        """
+        Parses a whole table of index entries in a single pass.
+        """
+        words = array('I')
+        words.frombytes(buffer)
+        if sys.byteorder != 'little':
+            words.byteswap()
+
+        stride = entry_length // words.itemsize
+        file_keys = words[0::stride]
+        if has_directory_keys:
+            directory_keys = words[1::stride]
+            bases = words[2::stride]
+        else:
+            directory_keys = None
+            bases = words[1::stride]
+
+        dat_files, offsets = IndexTable._split_bases(bases)
+
+        table = IndexTable(file_keys, directory_keys, dat_files, offsets)
+        table._sort()
+        return table
+
+    @staticmethod
+    def _split_bases(bases: array) -> Tuple[array, array]:
+        """
+        Splits the base of every entry into its dat file and offset in bulk,
+        without going through Python integers one entry at a time.
+        """
+        low = bases
+        if sys.byteorder != 'little':
+            low = array(bases.typecode, bases)
+            low.byteswap()
+        low = low.tobytes()
+
+        dat_files = array('B', low[0::4].translate(IndexTable._DAT_FILE_TABLE))
+
+        # Widen each masked base to 64 bits, then shift them all at once as
+        # a single integer; the upper half of each lane is zero, so no bits
+        # cross from one lane into the next.
+        lanes = bytearray(len(bases) * 8)
+        lanes[0::8] = low[0::4].translate(IndexTable._OFFSET_MASK_TABLE)
+        for i in range(1, 4):
+            lanes[i::8] = low[i::4]
+        lanes = (int.from_bytes(lanes, 'little') << 3).to_bytes(len(lanes), 'little')
+
+        offsets = array('Q')
+        offsets.frombytes(lanes)
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        return dat_files, offsets
+
+    @staticmethod
+    def _combine_keys(directory_keys: array, file_keys: array) -> array:
+        """
+        Gets the directory and file key of each entry as one 64-bit key,
+        ordered as the (directory key, file key) pairs are.
+        """
+        high = directory_keys.tobytes()
+        low = file_keys.tobytes()
+        if sys.byteorder != 'little':
+            low, high = high, low
+
+        # Both halves are laid out in native order, so the lanes can be read
+        # back as native 64-bit integers directly.
+        lanes = bytearray(len(low) * 2)
+        for i in range(4):
+            lanes[i::8] = low[i::4]
+            lanes[i + 4::8] = high[i::4]
+
+        keys = array('Q')
+        keys.frombytes(lanes)
+        return keys
+
+    def _sort(self):
+        if self._directory_keys is None:
+            keys = self._file_keys
+        else:
+            keys = self._combine_keys(self._directory_keys, self._file_keys)
+        if all(map(operator.le, keys, keys[1:])):
+            return
+
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._file_keys = array(self._file_keys.typecode, [self._file_keys[i] for i in order])
+        if self._directory_keys is not None:
+            self._directory_keys = array(self._directory_keys.typecode, [self._directory_keys[i] for i in order])
+        self._dat_files = array(self._dat_files.typecode, [self._dat_files[i] for i in order])
+        self._offsets = array(self._offsets.typecode, [self._offsets[i] for i in order])
+
+    def get_directory_range(self, directory_key: int) -> range:
+        start = bisect_left(self._directory_keys, directory_key)
+        stop = bisect_left(self._directory_keys, directory_key + 1, start)
+        return range(start, stop)
+
+    def find(self, file_key: int, _range: range = None) -> int:
+        """
+        Gets the position of an entry, or -1 if it is not present.
+        """
+        if _range is None:
+            _range = range(len(self))
+        i = bisect_left(self._file_keys, file_key, _range.start, _range.stop)
+        if i < _range.stop and self._file_keys[i] == file_key:
+            return i
+        return -1
+
+
+class IndexFileMapping(Mapping):
+    """
+    Read-only mapping of file keys to index entries inside an `IndexTable`.
+    """
+
+    def __init__(self, table: IndexTable, _range: range, factory):
+        self._table = table
+        self._range = _range
+        self._factory = factory
+
+    def __getitem__(self, file_key):
+        i = self._table.find(file_key, self._range)
+        if i < 0:
+            raise KeyError(file_key)
+        return self._factory(self._table, i)
+
+    def __contains__(self, file_key):
+        return self._table.find(file_key, self._range) >= 0
+
+    def __len__(self):
+        return len(self._range)
+
+    def __iter__(self):
+        file_keys = self._table.file_keys
+        for i in self._range:
+            yield file_keys[i]
+
+
 class IndexDirectory(object):
     """
     Directory-entry inside an index file.
@@ -123,31 +330,29 @@ class IndexDirectory(object):
     def count(self) -> int: return self._count
 
     @property
-    def files(self) -> Dict[int, 'IndexFile']: return self._files
+    def files(self) -> Mapping:
+        # File tables are only read the first time they are needed.
+        if self._files is None:
+            self._files = self._index.get_directory_files(self)
+        return self._files
 
-    def __init__(self, pack_id, stream):
-        self._files = {}  # type: Dict[int, 'IndexFile']
+    def __init__(self, pack_id, stream, index: 'Index'):
         self._pack_id = pack_id
+        self._index = index
+        self._files = None  # type: Mapping
 
         self._read_meta(stream)
-        pos = stream.tell()
-        self._read_files(stream)
-        stream.seek(pos)
 
     def _read_meta(self, stream):
         self._key, self._offset, _len = struct.unpack('<Lll4x', stream.read(16))
         self._count = int(_len / 0x10)
 
-    def _read_files(self, stream):
-        stream.seek(self.offset)
-
-        rem = self.count
-        files = []
-        while rem > 0:
-            rem -= 1
-            files += [IndexFile(self.pack_id, stream)]
-
-        self._files = dict([(file.file_key, file) for file in files])
+    def create_file(self, table: IndexTable, i: int) -> 'IndexFile':
+        return IndexFile(self.pack_id,
+                         table.file_keys[i],
+                         table.directory_keys[i],
+                         table.dat_files[i],
+                         table.offsets[i])
 
     def __repr__(self):
         return "IndexDir(dir_key=%08X)" % self.key
@@ -194,6 +399,18 @@ class IndexSource(IPackSource):
         else:
             return from_key(path_or_key)
 
+    def get_file_keys(self, path_or_key: Union[str, int]) -> FrozenSet[int]:
+        """
+        Gets the keys of the files present in a directory, or an empty set if
+        the directory does not exist.
+        """
+        if isinstance(path_or_key, str):
+            path_or_key = _compute_hash(path_or_key)
+        directory = self.get_directory(path_or_key)
+        if directory is None:
+            return frozenset()
+        return directory.file_keys
+
     def file_exists(self, path: str) -> bool:
         if '/' not in path:
             raise ValueError('path')
@@ -219,6 +436,57 @@ class IndexSource(IPackSource):
             return _dir.get_file(base_name)
         return None
 
+    def resolve_many(self, paths: IterableT[str]) -> List[Tuple[int, int]]:
+        """
+        Gets the (directory key, file key) of each path, hashing each
+        distinct directory only once. Paths without a directory give None.
+        """
+        directory_keys = {}  # type: Dict[str, int]
+        keys = []
+        for path in paths:
+            last_separator = path.rfind('/')
+            if last_separator < 0:
+                keys.append(None)
+                continue
+            dir_path = path[:last_separator]
+            directory_key = directory_keys.get(dir_path)
+            if directory_key is None:
+                directory_key = directory_keys[dir_path] = _compute_hash(dir_path)
+            keys.append((directory_key, _compute_hash(path[last_separator + 1:])))
+        return keys
+
+    def keys_exist(self, keys: IterableT[Tuple[int, int]]) -> List[bool]:
+        """
+        Gets whether a file exists for each (directory key, file key), looking
+        up each distinct directory only once.
+        """
+        directories = {}  # type: Dict[int, IndexDirectory]
+        results = []
+        for key in keys:
+            if key is None:
+                results.append(False)
+                continue
+            directory_key, file_key = key
+            if directory_key in directories:
+                directory = directories[directory_key]
+            else:
+                directory = directories[directory_key] = self.index.directories.get(directory_key)
+            results.append(directory is not None and file_key in directory.files)
+        return results
+
+    def get_file_index(self, path: str) -> 'IndexFile':
+        """
+        Gets the index entry of a file without reading its header.
+        """
+        if '/' not in path:
+            raise ValueError('path')
+
+        last_separator = path.rindex('/')
+        directory = self.index.directories.get(_compute_hash(path[:last_separator]))
+        if directory is None:
+            return None
+        return directory.files.get(_compute_hash(path[last_separator + 1:]))
+
     def get_file_from_keys(self, directory_key: int, file_key: int) -> File:
         _dir = self.get_directory(directory_key)
         if _dir is not None:
@@ -240,6 +508,7 @@ class Index(object):
     """
     Class representing the data inside a *.index file.
     """
+    _ENTRY_LENGTH = 0x10
 
     @property
     def pack_id(self) -> PackIdentifier: return self._pack_id
@@ -250,9 +519,23 @@ class Index(object):
     @property
     def directories(self) -> Dict[int, IndexDirectory]: return self._directories
 
-    def __init__(self, pack_id, path_or_stream):
+    @property
+    def table(self) -> IndexTable:
+        if self._table is None:
+            self._table = IndexTable.read(self._entries, self._ENTRY_LENGTH, True)
+        return self._table
+
+    @property
+    def path(self) -> str: return self._path
+
+    def __init__(self, pack_id, path_or_stream, cache: 'IndexCache' = None):
         self._pack_id = pack_id
+        self._path = None
+        self._cache = cache
+        self._table = None  # type: IndexTable
+        self._entries = None
         if isinstance(path_or_stream, str):
+            self._path = path_or_stream
             with open(path_or_stream, 'rb') as stream:
                 self._build(stream)
         else:
@@ -264,6 +547,7 @@ class Index(object):
         assert file_magic == SQPACKMAGIC
 
         self._read_header(stream)
+        self._read_files(stream)
         self._read_directories(stream)
 
     def _read_header(self, stream):
@@ -275,14 +559,44 @@ class Index(object):
         stream.seek(header_offset)
         self._header = IndexHeader(stream)
 
+    def _read_files(self, stream):
+        start = self.header.files_offset
+        end = start + self.header.files_count * self._ENTRY_LENGTH
+        if self._path is not None:
+            # Map the index so each directory's entries are only paged in
+            # once that directory is accessed.
+            self._entries = memoryview(mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ))[start:end]
+        else:
+            stream.seek(start)
+            self._entries = stream.read(end - start)
+
+        if self._cache is not None and self._path is not None:
+            self._table = self._cache.get_table(self._path, True,
+                                                lambda: IndexTable.read(self._entries, self._ENTRY_LENGTH, True))
+
     def _read_directories(self, stream):
         stream.seek(self.header.directories_offset)
 
-        dirs = [IndexDirectory(self.pack_id, stream)
+        dirs = [IndexDirectory(self.pack_id, stream, self)
                 for _ in range(self.header.directories_count)]
 
         self._directories = dict([(_dir.key, _dir) for _dir in dirs])
 
+    def get_directory_files(self, directory: IndexDirectory) -> Mapping:
+        """
+        Gets the file entries of a directory, parsing only that directory's
+        part of the file table unless the whole table is already loaded.
+        """
+        table = self._table
+        if table is not None:
+            _range = table.get_directory_range(directory.key)
+        else:
+            start = directory.offset - self.header.files_offset
+            table = IndexTable.read(self._entries[start:start + directory.count * self._ENTRY_LENGTH],
+                                    self._ENTRY_LENGTH, True)
+            _range = range(len(table))
+        return IndexFileMapping(table, _range, directory.create_file)
+
 
 class IndexHeader(object):
     @property
@@ -328,13 +642,12 @@ class IndexFile(IIndexFile):
     @property
     def dat_file(self): return self._dat_file
 
-    def __init__(self, pack_id, stream):
+    def __init__(self, pack_id, file_key, directory_key, dat_file, offset):
         self._pack_id = pack_id
-        self._file_key, self._directory_key = struct.unpack('<LL', stream.read(8))
-
-        base_offset, = struct.unpack('<l4x', stream.read(8))
-        self._dat_file = (base_offset & 0x7) >> 1
-        self._offset = (base_offset & 0xFFFFFFF8) << 3
+        self._file_key = file_key
+        self._directory_key = directory_key
+        self._dat_file = dat_file
+        self._offset = offset
 
     def __hash__(self):
         return ((self.dat_file << 24) | hash(self._pack_id)) ^ self.offset
@@ -363,7 +676,7 @@ class Index2Source(IPackSource):
     def __init__(self, pack, index):
         self._pack = pack
         self._index = index
-        self._files = {}
+        self._files = WeakValueDictionary()  # type: WeakValueDictionary[int, File]
         self._file_path_map = {}
 
     def file_exists(self, path_or_hash):
@@ -371,6 +684,27 @@ class Index2Source(IPackSource):
             path_or_hash = _compute_hash(path_or_hash)
         return path_or_hash in self.index.files
 
+    def resolve_many(self, paths: IterableT[str]) -> List[int]:
+        """
+        Gets the key of each path.
+        """
+        return [_compute_hash(path) for path in paths]
+
+    def keys_exist(self, keys: IterableT[int]) -> List[bool]:
+        """
+        Gets whether a file exists for each key.
+        """
+        files = self.index.files
+        return [key in files for key in keys]
+
+    def get_file_index(self, path_or_hash) -> 'Index2File':
+        """
+        Gets the index entry of a file without reading its header.
+        """
+        if isinstance(path_or_hash, str):
+            path_or_hash = _compute_hash(path_or_hash)
+        return self.index.files.get(path_or_hash)
+
     def get_file(self, path_or_hash):
         def from_hash(hash):
             file = self._files.get(hash, None)
@@ -400,14 +734,23 @@ class Index2(object):
     def header(self): return self._header
 
     @property
-    def files(self): return self._files
+    def files(self) -> Mapping: return self._files
+
+    @property
+    def table(self) -> IndexTable: return self._table
+
+    @property
+    def path(self) -> str: return self._path
 
     @property
     def pack_id(self): return self._pack_id
 
-    def __init__(self, pack_id, path_or_stream):
+    def __init__(self, pack_id, path_or_stream, cache: 'IndexCache' = None):
         self._pack_id = pack_id
+        self._path = None
+        self._cache = cache
         if isinstance(path_or_stream, str):
+            self._path = path_or_stream
             with open(path_or_stream, 'rb') as stream:
                 self._build(stream)
         else:
@@ -431,17 +774,25 @@ class Index2(object):
         self._header = Index2Header(stream)
 
     def _read_files(self, stream):
-        stream.seek(self.header.files_offset)
+        ENTRY_LENGTH = 0x08
 
-        files = [Index2File(self.pack_id, stream)
-                 for _ in range(self.header.files_count)]
-        # rem = self.header.files_count
-        # files = []
-        # while rem > 0:
-        #     rem -= 1
-        #     files += [Index2File(self.pack_id, stream)]
+        def _read_table():
+            stream.seek(self.header.files_offset)
+            return IndexTable.read(stream.read(self.header.files_count * ENTRY_LENGTH),
+                                   ENTRY_LENGTH, False)
 
-        self._files = dict([(file.file_key, file) for file in files])
+        if self._cache is not None and self._path is not None:
+            self._table = self._cache.get_table(self._path, False, _read_table)
+        else:
+            self._table = _read_table()
+
+        self._files = IndexFileMapping(self._table, range(len(self._table)), self._create_file)
+
+    def _create_file(self, table: IndexTable, i: int) -> 'Index2File':
+        return Index2File(self.pack_id,
+                          table.file_keys[i],
+                          table.dat_files[i],
+                          table.offsets[i])
 
 
 class Index2Header(object):
@@ -474,13 +825,11 @@ class Index2File(IIndexFile):
     @property
     def dat_file(self): return self._dat_file
 
-    def __init__(self, pack_id, stream):
+    def __init__(self, pack_id, file_key, dat_file, offset):
         self._pack_id = pack_id
-        self._file_key, = struct.unpack('<L', stream.read(4))
-
-        base_offset, = struct.unpack('<l', stream.read(4))
-        self._dat_file = (base_offset & 0x7) >> 1
-        self._offset = (base_offset & 0xFFFFFFF8) << 3
+        self._file_key = file_key
+        self._dat_file = dat_file
+        self._offset = offset
 
     def __hash__(self):
         return ((self.dat_file << 24) | hash(self._pack_id)) ^ self.offset
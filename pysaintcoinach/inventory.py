@@ -0,0 +1,356 @@
+from array import array
+from pathlib import Path
+import logging
+import struct
+import sys
+import zlib
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .file import FileType
+from .indexfile import _compute_hash
+from .pack import Pack, PackCollection, PackIdentifier
+from .util import replace_file
+
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryEntry(NamedTuple):
+    pack_id: PackIdentifier
+    file_key: int
+    directory_key: int
+    dat_file: int
+    offset: int
+    file_type: int
+    size: int
+    raw_size: int
+    block_count: int
+    header_crc: int
+
+
+class Inventory(object):
+    """
+    Metadata of every entry in one or more packs, kept in parallel arrays.
+
+    `size` is the number of bytes a file occupies in its dat file, headers
+    included; `raw_size` is the size of its data once inflated, and
+    `header_crc` is the CRC-32 of its common header, which holds the block
+    table and so changes whenever the file is repacked. Only the
+    common header of each file is read to build an inventory. Packs with
+    only an index2 file have no directory keys, and report them as 0.
+    """
+
+    MAGIC = b'SCIV'
+    FORMAT_VERSION = 2
+
+    # Magic, format version, reserved, entry count.
+    _HEADER = struct.Struct('<4sIII')
+
+    # Name and type code of each column, in file order.
+    _COLUMNS = (('offsets', 'Q'),
+                ('packs', 'I'),
+                ('file_keys', 'I'),
+                ('directory_keys', 'I'),
+                ('sizes', 'I'),
+                ('raw_sizes', 'I'),
+                ('block_counts', 'I'),
+                ('header_crcs', 'I'),
+                ('dat_files', 'B'),
+                ('file_types', 'B'))
+
+    def __init__(self):
+        for name, typecode in self._COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.file_keys)
+
+    def __iter__(self) -> Iterator[InventoryEntry]:
+        pack_ids = {}
+        for i in range(len(self)):
+            pack_key = self.packs[i]
+            pack_id = pack_ids.get(pack_key)
+            if pack_id is None:
+                pack_id = pack_ids[pack_key] = self._get_pack_id(pack_key)
+            yield InventoryEntry(pack_id,
+                                 self.file_keys[i],
+                                 self.directory_keys[i],
+                                 self.dat_files[i],
+                                 self.offsets[i],
+                                 self.file_types[i],
+                                 self.sizes[i],
+                                 self.raw_sizes[i],
+                                 self.block_counts[i],
+                                 self.header_crcs[i])
+
+    def append(self, entry: InventoryEntry):
+        self.packs.append(hash(entry.pack_id))
+        self.file_keys.append(entry.file_key)
+        self.directory_keys.append(entry.directory_key)
+        self.dat_files.append(entry.dat_file)
+        self.offsets.append(entry.offset)
+        self.file_types.append(entry.file_type)
+        self.sizes.append(entry.size)
+        self.raw_sizes.append(entry.raw_size)
+        self.block_counts.append(entry.block_count)
+        self.header_crcs.append(entry.header_crc)
+
+    def get_paths(self, dictionary: 'PathDictionary') -> List[Optional[str]]:
+        """
+        Gets the path of each entry from a table of known paths, or None for
+        entries it does not name.
+        """
+        paths = []
+        for directory_key, file_key in zip(self.directory_keys, self.file_keys):
+            # A directory key of 0 marks an index2 entry, keyed by its full path.
+            if directory_key != 0:
+                paths.append(dictionary.get_path(directory_key, file_key))
+            else:
+                paths.append(dictionary.get_path_for_hash(file_key))
+        return paths
+
+    @staticmethod
+    def _get_pack_id(pack_key: int) -> PackIdentifier:
+        return PackIdentifier((pack_key >> 16) & 0xFF, (pack_key >> 8) & 0xFF, pack_key & 0xFF)
+
+    @staticmethod
+    def load(source) -> 'Inventory':
+        """
+        Gets an inventory from an inventory file, or by scanning a sqpack
+        directory, a pack collection or a single pack.
+        """
+        if isinstance(source, Inventory):
+            return source
+        if isinstance(source, str):
+            source = Path(source)
+        if isinstance(source, Path):
+            if source.is_dir():
+                collection = PackCollection(source)
+                try:
+                    return Inventory.scan(collection)
+                finally:
+                    collection.close()
+            return Inventory.read(source)
+        return Inventory.scan(source)
+
+    def get_entries(self) -> Dict[Tuple[int, int, int], Tuple[int, int, int, int]]:
+        """
+        Gets the location, size and header CRC of each entry, keyed by pack,
+        directory key and file key.
+        """
+        return dict(zip(zip(self.packs, self.directory_keys, self.file_keys),
+                        zip(self.dat_files, self.offsets, self.sizes, self.header_crcs)))
+
+    @staticmethod
+    def scan(source) -> 'Inventory':
+        """
+        Builds the inventory of a pack, or of every pack of a collection.
+        """
+        inventory = Inventory()
+        packs = source.get_all_packs() if isinstance(source, PackCollection) else [source]
+        for pack in packs:
+            for entry in scan_pack(pack):
+                inventory.append(entry)
+        return inventory
+
+    def write(self, path):
+        """
+        Writes the inventory to a compact, little-endian columnar file.
+        """
+        if isinstance(path, str):
+            path = Path(path)
+
+        parts = [self._HEADER.pack(self.MAGIC, self.FORMAT_VERSION, 0, len(self))]
+        for name, typecode in self._COLUMNS:
+            values = array(typecode, getattr(self, name))
+            if sys.byteorder != 'little':
+                values.byteswap()
+            parts.append(values.tobytes())
+
+        replace_file(path, parts)
+
+    @staticmethod
+    def read(path) -> 'Inventory':
+        if isinstance(path, str):
+            path = Path(path)
+
+        buffer = path.read_bytes()
+        magic, fmt, _, count = Inventory._HEADER.unpack_from(buffer, 0)
+        if magic != Inventory.MAGIC or fmt != Inventory.FORMAT_VERSION:
+            raise ValueError('Not an inventory file: %s' % path)
+
+        inventory = Inventory()
+        position = Inventory._HEADER.size
+        for name, typecode in Inventory._COLUMNS:
+            values = getattr(inventory, name)
+            length = count * values.itemsize
+            if position + length > len(buffer):
+                raise EOFError
+            values.frombytes(buffer[position:position + length])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            position += length
+        return inventory
+
+
+class InventoryDiff(object):
+    """
+    Files added, removed or changed between two inventories, as lists of
+    (directory key, file key) per pack.
+
+    An entry has changed when its location in the dat files, its size or its
+    common header differs; patches write changed files to new locations, and
+    the data itself is never read.
+    """
+
+    @property
+    def added(self) -> Dict[PackIdentifier, List[Tuple[int, int]]]: return self._added
+
+    @property
+    def removed(self) -> Dict[PackIdentifier, List[Tuple[int, int]]]: return self._removed
+
+    @property
+    def changed(self) -> Dict[PackIdentifier, List[Tuple[int, int]]]: return self._changed
+
+    def __init__(self, old, new):
+        old_entries = Inventory.load(old).get_entries()
+        new_entries = Inventory.load(new).get_entries()
+
+        self._added = {}  # type: Dict[PackIdentifier, List[Tuple[int, int]]]
+        self._removed = {}  # type: Dict[PackIdentifier, List[Tuple[int, int]]]
+        self._changed = {}  # type: Dict[PackIdentifier, List[Tuple[int, int]]]
+        self._modified = set()
+
+        for key, value in new_entries.items():
+            old_value = old_entries.get(key)
+            if old_value is None:
+                self.__add(self._added, key)
+            elif old_value != value:
+                self.__add(self._changed, key)
+            else:
+                continue
+            self._modified.add(key)
+        for key in old_entries.keys() - new_entries.keys():
+            self.__add(self._removed, key)
+
+    def __len__(self):
+        return sum(len(keys)
+                   for target in (self._added, self._removed, self._changed)
+                   for keys in target.values())
+
+    @staticmethod
+    def __add(target, key):
+        pack_key, directory_key, file_key = key
+        pack_id = Inventory._get_pack_id(pack_key)
+        target.setdefault(pack_id, []).append((directory_key, file_key))
+
+    def is_modified(self, path: str) -> bool:
+        """
+        Gets whether the file at `path` was added or changed.
+        """
+        pack_id = PackIdentifier.get(path)
+        if pack_id is None or '/' not in path:
+            return False
+
+        last_separator = path.rindex('/')
+        pack_key = hash(pack_id)
+        # Index2 packs key files by their full path, with no directory.
+        return (pack_key,
+                _compute_hash(path[:last_separator]),
+                _compute_hash(path[last_separator + 1:])) in self._modified or \
+            (pack_key, 0, _compute_hash(path)) in self._modified
+
+
+def scan_pack(pack: Pack) -> Iterator[InventoryEntry]:
+    """
+    Streams the inventory of a pack, in dat file and offset order.
+    """
+    table = pack.source.index.table
+    directory_keys = table.directory_keys
+
+    order = sorted(range(len(table)), key=lambda i: (table.dat_files[i], table.offsets[i]))
+    streams = {}
+    for i in order:
+        dat_file = table.dat_files[i]
+        stream = streams.get(dat_file)
+        if stream is None:
+            stream = streams[dat_file] = pack.get_data_stream(dat_file)
+
+        offset = table.offsets[i]
+        try:
+            header = _read_header(stream, offset)
+            file_type, size, raw_size, block_count = _measure(header)
+            header_crc = zlib.crc32(header)
+        except (EOFError, struct.error) as exc:
+            logger.warning('Bad file header in %s at %u:%08X: %s', pack, dat_file, offset, exc)
+            file_type, size, raw_size, block_count, header_crc = FileType.Unknown.value, 0, 0, 0, 0
+
+        yield InventoryEntry(pack.id,
+                             table.file_keys[i],
+                             directory_keys[i] if directory_keys is not None else 0,
+                             dat_file,
+                             offset,
+                             file_type,
+                             size,
+                             raw_size,
+                             block_count,
+                             header_crc)
+
+
+def _read_header(stream, offset: int) -> bytes:
+    # Every common header is at least this long, so most take a single read.
+    MIN_LENGTH = 0x80
+
+    stream.seek(offset)
+    buffer = bytes(stream.read(MIN_LENGTH))
+    if len(buffer) < 4:
+        raise EOFError
+    length, = struct.unpack_from('<l', buffer, 0)
+    if length > len(buffer):
+        buffer += bytes(stream.read(length - len(buffer)))
+    if len(buffer) < length:
+        raise EOFError
+    return buffer[:length]
+
+
+def _measure(header: bytes):
+    """
+    Gets the type, size in the dat file, raw size and block count of a file
+    from its common header alone.
+    """
+    FILE_TYPE_OFFSET = 0x04
+    RAW_SIZE_OFFSET = 0x08
+    COUNT_OFFSET = 0x14
+    BLOCK_INFO_OFFSET = 0x18
+    BLOCK_INFO_LENGTH = 0x08
+    LOD_ENTRY_LENGTH = 0x14
+    IMAGE_HEADER_LENGTH = 0x50
+
+    file_type, = struct.unpack_from('<l', header, FILE_TYPE_OFFSET)
+    raw_size, = struct.unpack_from('<L', header, RAW_SIZE_OFFSET)
+    count, = struct.unpack_from('<l', header, COUNT_OFFSET)
+    size = len(header)
+
+    if file_type == FileType.Default.value:
+        # Same block table as `FileDefault`.
+        for i in range(count):
+            block_offset, block_size, _ = struct.unpack_from('<lHH', header, BLOCK_INFO_OFFSET + i * BLOCK_INFO_LENGTH)
+            size = max(size, len(header) + block_offset + block_size)
+        return file_type, size, raw_size, count
+
+    if file_type == FileType.Image.value:
+        # Same block size list as `ImageFile`.
+        block_count = 0
+        size += IMAGE_HEADER_LENGTH
+        i = BLOCK_INFO_OFFSET + (count & 0xFFFF) * LOD_ENTRY_LENGTH
+        while i + 2 <= len(header):
+            block_size, = struct.unpack_from('<H', header, i)
+            if block_size == 0:
+                break
+            size += block_size
+            block_count += 1
+            i += 2
+        return file_type, size, raw_size, block_count
+
+    # Empty and model files have no blocks this library can account for.
+    return file_type, size, raw_size, 0
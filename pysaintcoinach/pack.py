@@ -1,13 +1,16 @@
 from collections.abc import Iterable
+from itertools import groupby
 from pathlib import Path
 from weakref import WeakValueDictionary
 import io
 import logging
-from typing import Iterable as IterableT, Dict, Tuple, IO
+import mmap
+import os
+import time
+from typing import Iterable as IterableT, Iterator, Dict, Tuple, IO, List, Callable, Union
 from threading import Lock
-import threading
 
-from .util import ConcurrentDictionary
+from .util import ConcurrentDictionary, LruCache
 
 
 logger = logging.getLogger(__name__)
@@ -113,14 +116,298 @@ class PackIdentifier(object):
         return PackIdentifier(type, expansion, number)
 
 
+class BufferStream(object):
+    """
+    Read-only, seekable stream over a buffer holding all or part of a dat
+    file, such as a memory map or a span read in one go.
+
+    Reads return `memoryview` slices of the buffer instead of copies, so
+    block headers and payloads can be handed to `struct` and `zlib` as-is.
+    Positions are dat file offsets; `base_offset` is the offset of the
+    start of the buffer.
+    """
+
+    def __init__(self, view: memoryview, base_offset: int = 0, statistics: 'PackStatistics' = None):
+        self._view = view
+        self._base_offset = base_offset
+        self._position = 0
+        self._statistics = statistics
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            offset -= self._base_offset
+        elif whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError('offset')
+        if self._statistics is not None and offset != self._position:
+            self._statistics.add('seeks')
+        self._position = offset
+        return offset + self._base_offset
+
+    def tell(self) -> int:
+        return self._position + self._base_offset
+
+    def read(self, size: int = -1) -> memoryview:
+        start = min(self._position, len(self._view))
+        if size is None or size < 0:
+            end = len(self._view)
+        else:
+            end = min(start + size, len(self._view))
+        self._position = max(self._position, end)
+        if self._statistics is not None:
+            self._statistics.add_read(end - start)
+        return self._view[start:end]
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+class PositionalStream(object):
+    """
+    Seekable stream over a file descriptor shared by all readers of a dat file.
+
+    The position is private to each stream and reads are positional, so any
+    number of streams can read the same descriptor concurrently without
+    coordinating. Where `os.pread` is unavailable the descriptor's own
+    position is used under `lock` instead.
+    """
+
+    def __init__(self, fd: int, lock: Lock = None, statistics: 'PackStatistics' = None):
+        self._fd = fd
+        self._lock = lock
+        self._position = 0
+        self._statistics = statistics
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += os.fstat(self._fd).st_size
+        if offset < 0:
+            raise ValueError('offset')
+        if self._statistics is not None and offset != self._position:
+            self._statistics.add('seeks')
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = max(0, os.fstat(self._fd).st_size - self._position)
+
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = self._pread(remaining, self._position)
+            if len(chunk) == 0:
+                break
+            chunks.append(chunk)
+            self._position += len(chunk)
+            remaining -= len(chunk)
+        if self._statistics is not None:
+            self._statistics.add_read(size - remaining)
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def _pread(self, size: int, offset: int) -> bytes:
+        if self._lock is None:
+            return os.pread(self._fd, size, offset)
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, size)
+
+
+class PackStatistics(object):
+    """
+    I/O and decompression counters of a pack.
+
+    Counters are only kept once statistics are enabled on the collection;
+    until then every instrumented call site only checks for None. When a
+    `hook` is given, it is called with a snapshot at most every `interval`
+    seconds with the pack's name and a snapshot, from whichever thread
+    updates a counter.
+    """
+
+    COUNTERS = ('reads',
+                'bytes_read',
+                'seeks',
+                'blocks_inflated',
+                'bytes_inflated',
+                'inflate_time',
+                'cache_hits',
+                'cache_misses',
+                'files_created')
+
+    DEFAULT_INTERVAL = 10.0
+
+    @property
+    def name(self) -> str: return self._name
+
+    def __init__(self, name: str, hook: Callable[[str, Dict], None] = None, interval: float = DEFAULT_INTERVAL):
+        self._name = name
+        self._hook = hook
+        self._interval = interval
+        self._lock = Lock()
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._next_report = time.monotonic() + interval
+
+    def __repr__(self):
+        return "PackStatistics(%s)" % self.name
+
+    def add(self, counter: str, value=1):
+        with self._lock:
+            self._counters[counter] += value
+        self._check_hook()
+
+    def add_read(self, length: int):
+        with self._lock:
+            self._counters['reads'] += 1
+            self._counters['bytes_read'] += length
+        self._check_hook()
+
+    def add_inflate(self, blocks: int, length: int, elapsed: float):
+        with self._lock:
+            self._counters['blocks_inflated'] += blocks
+            self._counters['bytes_inflated'] += length
+            self._counters['inflate_time'] += elapsed
+        self._check_hook()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def _check_hook(self):
+        if self._hook is None:
+            return
+        now = time.monotonic()
+        if now < self._next_report:
+            return
+        with self._lock:
+            if now < self._next_report:
+                return
+            self._next_report = now + self._interval
+        self._hook(self.name, self.snapshot())
+
+
 class PackCollection(object):
+    # File name containing the current version string, next to the data directory.
+    _VERSION_FILE = 'ffxivgame.ver'
+
+    # Default byte budget for decompressed file payloads.
+    DEFAULT_PAYLOAD_CACHE_SIZE = 256 * 1024 * 1024
+
+    # Number of recent path resolutions remembered for lookups.
+    RESOLUTION_CACHE_SIZE = 0x10000
+
     @property
     def data_directory(self): return self._data_directory
 
     @property
     def packs(self) -> 'IterableT[Pack]': return self._packs.values()
 
-    def __init__(self, data_directory):
+    @property
+    def keep_in_memory(self): return self._keep_in_memory
+
+    @keep_in_memory.setter
+    def keep_in_memory(self, value):
+        self._keep_in_memory = value
+        for pack in self.packs:
+            pack.keep_in_memory = value
+
+    @property
+    def game_version(self) -> str:
+        """
+        Gets the game version read from `ffxivgame.ver`, or None if missing.
+        """
+        if self._game_version is None:
+            version_path = self.data_directory.parent.joinpath(self._VERSION_FILE)
+            if version_path.exists():
+                self._game_version = version_path.read_text().strip()
+        return self._game_version
+
+    @property
+    def index_cache(self) -> 'IndexCache':
+        """
+        Gets or sets the cache of parsed index tables, or None. Only packs
+        opened after setting it use the new cache.
+        """
+        return self._index_cache
+
+    @index_cache.setter
+    def index_cache(self, value): self._index_cache = value
+
+    @property
+    def blob_store(self) -> 'BlobStore':
+        """
+        Gets or sets the store of decompressed payloads, or None.
+        """
+        return self._blob_store
+
+    @blob_store.setter
+    def blob_store(self, value): self._blob_store = value
+
+    @property
+    def path_dictionary(self) -> 'PathDictionary':
+        """
+        Gets or sets the table of known paths used to name files found by
+        iterating packs, or None.
+        """
+        return self._path_dictionary
+
+    @path_dictionary.setter
+    def path_dictionary(self, value): self._path_dictionary = value
+
+    @property
+    def decompressor(self) -> 'BlockDecompressor':
+        """
+        Gets or sets the engine used to inflate file blocks, or None to
+        inflate them serially as they are read.
+        """
+        return self._decompressor
+
+    @decompressor.setter
+    def decompressor(self, value): self._decompressor = value
+
+    @property
+    def payload_cache(self) -> LruCache:
+        """
+        Gets the cache of decompressed file payloads shared by all packs.
+        """
+        return self._payload_cache
+
+    @property
+    def shared_state(self) -> 'SharedPackState':
+        """
+        Gets the shared state attached from the descriptor given as
+        `shared_state`, or None.
+        """
+        return self._shared_state
+
+    def __init__(self,
+                 data_directory,
+                 keep_in_memory=False,
+                 cache_directory=None,
+                 decompressor=None,
+                 payload_cache_size=DEFAULT_PAYLOAD_CACHE_SIZE,
+                 path_dictionary=None,
+                 blob_directory=None,
+                 blob_store_size=None,
+                 shared_state=None):
         if isinstance(data_directory, str):
             data_directory = Path(data_directory)
         if isinstance(data_directory, Path):
@@ -129,16 +416,178 @@ class PackCollection(object):
         else:
             raise TypeError("data_directory")
         self._data_directory = data_directory
+        self._keep_in_memory = keep_in_memory
+        self._game_version = None
+        self._decompressor = decompressor
+        self._path_dictionary = path_dictionary
+        self._payload_cache = LruCache(payload_cache_size)
+        self._resolutions = LruCache(self.RESOLUTION_CACHE_SIZE, sizeof=lambda v: 1)
+        self._statistics_options = None
+        self._index_cache = None
+        if cache_directory is not None:
+            from .indexcache import IndexCache
+            self._index_cache = IndexCache(cache_directory, self.game_version)
+        self._blob_store = None
+        if blob_directory is not None:
+            from .blobstore import BlobStore
+            self._blob_store = BlobStore(blob_directory, self.game_version,
+                                         blob_store_size or BlobStore.DEFAULT_MAX_SIZE)
         self._packs = ConcurrentDictionary()  # type: ConcurrentDictionary[PackIdentifier, Pack]
+        self._shared_state = None
+        if shared_state is not None:
+            # Attached before any pack is opened, so every pack uses it.
+            from .sharedstate import SharedPackState
+            self._shared_state = SharedPackState.attach(self, shared_state)
 
     def file_exists(self, path: str):
-        pack = self.get_pack(path)
-        return pack is not None and pack.file_exists(path)
+        return self.files_exist([path])[0]
+
+    def files_exist(self, paths: IterableT[str]) -> List[bool]:
+        """
+        Gets whether each of the given paths exists, splitting and hashing
+        every path at most once and looking up each directory once per batch.
+        """
+        paths = list(paths)
+        resolved = self.resolve_many(paths)
+
+        by_pack = {}  # type: Dict[PackIdentifier, List[int]]
+        for i, resolution in enumerate(resolved):
+            if resolution is not None:
+                by_pack.setdefault(resolution[0], []).append(i)
+
+        results = [False] * len(paths)
+        for _id, indices in by_pack.items():
+            exists = self.get_pack(_id).source.keys_exist([resolved[i][1] for i in indices])
+            for i, e in zip(indices, exists):
+                results[i] = e
+        return results
+
+    def resolve_many(self, paths: IterableT[str]) -> List[Tuple[PackIdentifier, object]]:
+        """
+        Gets the pack identifier and the key inside that pack's index of each
+        path, or None for paths outside any pack. Recent resolutions are
+        remembered, so repeated lookups skip hashing entirely.
+        """
+        paths = list(paths)
+        resolved = [self._resolutions.get(path) for path in paths]
+
+        by_pack = {}  # type: Dict[PackIdentifier, List[int]]
+        for i, path in enumerate(paths):
+            if resolved[i] is None:
+                _id = PackIdentifier.get(path)
+                if _id is not None:
+                    by_pack.setdefault(_id, []).append(i)
+
+        for _id, indices in by_pack.items():
+            keys = self.get_pack(_id).source.resolve_many([paths[i] for i in indices])
+            for i, key in zip(indices, keys):
+                if key is not None:
+                    resolved[i] = (_id, key)
+                    self._resolutions.put(paths[i], resolved[i])
+        return resolved
 
     def get_file(self, path: str):
         pack = self.get_pack(path)
         return pack.get_file(path) if pack is not None else None
 
+    def get_all_packs(self) -> 'List[Pack]':
+        """
+        Gets every pack that has an index file in the data directory.
+        """
+        packs = []
+        for expansion in sorted(PackIdentifier.EXPANSION_TO_KEY_MAP):
+            expansion_directory = self.data_directory.joinpath(expansion)
+            if not expansion_directory.is_dir():
+                continue
+            keys = set()
+            for path in expansion_directory.glob('*.win32.index*'):
+                name = path.name[:path.name.find('.')]
+                if len(name) != 6 or path.suffix not in ('.index', '.index2'):
+                    continue
+                try:
+                    keys.add(tuple(int(name[i:i + 2], 16) for i in (0, 2, 4)))
+                except ValueError:
+                    continue
+            for type_key, expansion_key, number in sorted(keys):
+                if type_key not in PackIdentifier.KEY_TO_TYPE_MAP or \
+                        expansion_key != PackIdentifier.EXPANSION_TO_KEY_MAP[expansion]:
+                    continue
+                packs.append(self.get_pack(PackIdentifier(type_key, expansion_key, number)))
+        return packs
+
+    def close(self):
+        """
+        Closes the dat files opened by any of the packs.
+        """
+        for pack in list(self.packs):
+            pack.close()
+
+    def extract_many(self,
+                     paths: IterableT[str],
+                     sink: Union[str, Path, Callable[[str, bytes], None]],
+                     max_gap: int = None,
+                     max_span: int = None) -> List[str]:
+        """
+        Extracts many files at once, reading each dat file in offset order
+        and coalescing neighbouring files into large sequential reads.
+
+        `sink` is either a callable receiving each path and its data, or a
+        directory the files are written to. Files already held by the payload
+        cache or the blob store are not read again, and the others are added
+        to the blob store. Returns the paths that could not be found.
+        """
+        missing = []
+        for _id, pack_paths in self.__group_by_pack(paths, missing).items():
+            missing += self.get_pack(_id).extract_many(pack_paths, sink, max_gap, max_span)
+        return missing
+
+    def _read_many(self,
+                   paths: IterableT[str],
+                   missing: List[str],
+                   max_gap: int = None,
+                   max_span: int = None) -> Iterator[Tuple['File', bytes, list]]:
+        """
+        Reads many files without inflating them, pack by pack. See
+        `Pack._read_many`.
+        """
+        for _id, pack_paths in self.__group_by_pack(paths, missing).items():
+            yield from self.get_pack(_id)._read_many(pack_paths, missing, max_gap, max_span)
+
+    @staticmethod
+    def __group_by_pack(paths: IterableT[str], missing: List[str]) -> Dict[PackIdentifier, List[str]]:
+        by_pack = {}  # type: Dict[PackIdentifier, List[str]]
+        for path in paths:
+            _id = PackIdentifier.get(path)
+            if _id is None:
+                missing.append(path)
+            else:
+                by_pack.setdefault(_id, []).append(path)
+        return by_pack
+
+    def enable_statistics(self,
+                          hook: Callable[[str, Dict], None] = None,
+                          interval: float = PackStatistics.DEFAULT_INTERVAL):
+        """
+        Starts keeping I/O and decompression counters for every pack. When
+        given, `hook` is called with each pack's name and counters at most
+        every `interval` seconds.
+        """
+        self._statistics_options = (hook, interval)
+        for pack in self.packs:
+            pack._statistics = PackStatistics(str(pack), hook, interval)
+
+    def disable_statistics(self):
+        self._statistics_options = None
+        for pack in self.packs:
+            pack._statistics = None
+
+    def get_statistics(self) -> Dict[str, Dict]:
+        """
+        Gets a snapshot of the counters of each pack, keyed by pack name.
+        """
+        return dict((str(pack), pack.statistics.snapshot())
+                    for pack in list(self.packs) if pack.statistics is not None)
+
     def get_pack(self, id_or_path):
         if isinstance(id_or_path, PackIdentifier):
             _id = id_or_path
@@ -147,7 +596,14 @@ class PackCollection(object):
         if _id is None:
             return None
 
-        return self._packs.get_or_add(_id, lambda i: Pack(self.data_directory, _id, self))
+        def _create_pack(i):
+            pack = Pack(self.data_directory, i, self)
+            pack.keep_in_memory = self.keep_in_memory
+            if self._statistics_options is not None:
+                pack._statistics = PackStatistics(str(pack), *self._statistics_options)
+            return pack
+
+        return self._packs.get_or_add(_id, _create_pack)
 
 
 class Pack(Iterable):
@@ -171,20 +627,42 @@ class Pack(Iterable):
     def source(self): return self._source
 
     @property
-    def keep_in_memory(self): return self._keep_in_memory
+    def decompressor(self) -> 'BlockDecompressor':
+        return self.collection.decompressor if self.collection is not None else None
+
+    @property
+    def blob_store(self) -> 'BlobStore':
+        return self.collection.blob_store if self.collection is not None else None
+
+    @property
+    def statistics(self) -> PackStatistics:
+        """
+        Gets the pack's counters, or None while statistics are disabled.
+        """
+        return self._statistics
+
+    @property
+    def payload_cache(self) -> LruCache:
+        if self.collection is not None:
+            return self.collection.payload_cache
+        return self._payload_cache
+
+    @property
+    def keep_in_memory(self):
+        """
+        Gets or sets whether the dat files are accessed through memory maps
+        rather than file handles.
+        """
+        return self._keep_in_memory
 
     @keep_in_memory.setter
     def keep_in_memory(self, value):
         if value == self.keep_in_memory:
             return
 
-        if len(self._data_streams) > 0:
-            logger.error("Failed to keep pack %r in memory." % self.id)
-            return
-
         self._keep_in_memory = value
         if not value:
-            self._buffers.clear()
+            self._release_buffers()
 
     def __init__(self,
                  data_directory,
@@ -204,46 +682,82 @@ class Pack(Iterable):
         self._collection = collection
         self._data_directory = data_directory
         self._id = id
-        self._data_streams = {}  # type: Dict[Tuple[int, int], IO]
+        self._data_files = {}  # type: Dict[int, Tuple[int, Lock]]
         self._data_streams_lock = Lock()
         self._keep_in_memory = False
-        self._buffers = {}  # type: Dict[int, bytes]
+        self._buffers = {}  # type: Dict[int, memoryview]
+        self._payload_cache = None
+        self._statistics = None
+        if collection is None:
+            self._payload_cache = LruCache(PackCollection.DEFAULT_PAYLOAD_CACHE_SIZE)
 
         index_path = data_directory.joinpath(id.expansion, self._INDEX_FILE_FORMAT.format(id.type_key, id.expansion_key, id.number))
         index2_path = data_directory.joinpath(id.expansion, self._INDEX2_FILE_FORMAT.format(id.type_key, id.expansion_key, id.number))
+        cache = collection.index_cache if collection is not None else None
         if index_path.exists() and index_path.is_file():
-            self._source = IndexSource(self, Index(id, index_path.as_posix()))
+            self._source = IndexSource(self, Index(id, index_path.as_posix(), cache))
         elif index2_path.exists() and index2_path.is_file():
-            self._source = Index2Source(self, Index2(id, index2_path.as_posix()))
+            self._source = Index2Source(self, Index2(id, index2_path.as_posix(), cache))
         else:
             raise FileNotFoundError
 
-    def get_data_stream(self, dat_file=0) -> IO:
-        thread = threading.get_ident()
+    def _get_dat_path(self, dat_file) -> Path:
+        base_name = self._DAT_FILE_FORMAT.format(self.id.type_key, self.id.expansion_key, self.id.number, dat_file)
+        return self.data_directory.joinpath(self.id.expansion, base_name)
 
-        key = (thread, dat_file)
+    def get_data_buffer(self, dat_file=0) -> memoryview:
+        """
+        Gets a read-only view over the memory-mapped contents of a dat file.
+        """
         with self._data_streams_lock:
-            stream = self._data_streams.get(key, None)
-
-        if stream is not None:
-            return stream
-
-        base_name = self._DAT_FILE_FORMAT.format(self.id.type_key, self.id.expansion_key, self.id.number, dat_file)
-        full_path = self.data_directory.joinpath(self.id.expansion, base_name)
+            view = self._buffers.get(dat_file, None)
+            if view is None:
+                full_path = self._get_dat_path(dat_file)
+                logger.info('Mapping: %s' % full_path)
+                with full_path.open(mode='rb') as f:
+                    view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                self._buffers[dat_file] = view
+        return view
+
+    def _release_buffers(self):
+        with self._data_streams_lock:
+            views = list(self._buffers.values())
+            self._buffers.clear()
+        for view in views:
+            mapping = view.obj
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                # Slices are still referenced elsewhere; the mapping will be
+                # closed once they are collected.
+                pass
 
+    def get_data_stream(self, dat_file=0) -> IO:
         if self.keep_in_memory:
-            if dat_file not in self._buffers:
-                logger.info('Reading: %s' % full_path)
-                self._buffers[dat_file] = full_path.read_bytes()
-            stream = io.BufferedReader(self._buffers[dat_file])
-        else:
-            logger.info('Opening: %s' % full_path)
-            stream = full_path.open(mode='rb')
+            return BufferStream(self.get_data_buffer(dat_file), statistics=self._statistics)
 
         with self._data_streams_lock:
-            self._data_streams[key] = stream
-
-        return stream
+            data_file = self._data_files.get(dat_file, None)
+            if data_file is None:
+                full_path = self._get_dat_path(dat_file)
+                logger.info('Opening: %s' % full_path)
+                fd = os.open(full_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+                data_file = (fd, None if hasattr(os, 'pread') else Lock())
+                self._data_files[dat_file] = data_file
+
+        return PositionalStream(*data_file, statistics=self._statistics)
+
+    def close(self):
+        """
+        Closes the dat files opened by this pack and releases any mappings.
+        """
+        with self._data_streams_lock:
+            data_files = list(self._data_files.values())
+            self._data_files.clear()
+        for fd, _ in data_files:
+            os.close(fd)
+        self._release_buffers()
 
     def __str__(self):
         return "%s/%02x%02x%02x" % (self.id.expansion, self.id.type_key, self.id.expansion_key, self.id.number)
@@ -255,4 +769,130 @@ class Pack(Iterable):
         return self.source.get_file(path)
 
     def __iter__(self):
-        return iter(self.source)
+        dictionary = self.collection.path_dictionary if self.collection is not None else None
+        if dictionary is None:
+            return iter(self.source)
+        return self.__iter_named(dictionary)
+
+    def __iter_named(self, dictionary):
+        for file in self.source:
+            path = dictionary.get_path_for_index(file.index)
+            if path is not None:
+                file.path = path
+            yield file
+
+    # Largest gap between two files that is still read through rather than seeked over.
+    DEFAULT_MAX_GAP = 0x10000
+
+    # Largest span of a dat file that is read in one go.
+    DEFAULT_MAX_SPAN = 0x1000000
+
+    def extract_many(self,
+                     paths: IterableT[str],
+                     sink: Union[str, Path, Callable[[str, bytes], None]],
+                     max_gap: int = None,
+                     max_span: int = None) -> List[str]:
+        """
+        Extracts many files from this pack. See `PackCollection.extract_many`.
+        """
+        if not callable(sink):
+            sink = self.__create_directory_sink(Path(sink))
+
+        missing = []
+        for file, data, blocks in self._read_many(paths, missing, max_gap, max_span):
+            if data is None:
+                data = file._inflate_stored(blocks)
+            sink(file.path, data)
+        return missing
+
+    def _read_many(self,
+                   paths: IterableT[str],
+                   missing: List[str],
+                   max_gap: int = None,
+                   max_span: int = None) -> Iterator[Tuple['File', bytes, list]]:
+        """
+        Reads many files in dat file and offset order, without inflating them.
+
+        Yields each file along with either its data, when the payload cache
+        or the blob store already holds it, or its blocks as read by
+        `File._read_sources`. Paths that could not be found are appended to
+        `missing`.
+        """
+        from .file import FileFactory
+
+        if max_gap is None:
+            max_gap = self.DEFAULT_MAX_GAP
+        if max_span is None:
+            max_span = self.DEFAULT_MAX_SPAN
+
+        entries = []
+        for path in paths:
+            index = self.source.get_file_index(path)
+            if index is None:
+                missing.append(path)
+            else:
+                entries.append((index, path))
+        entries.sort(key=lambda e: (e[0].dat_file, e[0].offset))
+
+        for dat_file, group in groupby(entries, key=lambda e: e[0].dat_file):
+            # Headers are read in offset order first, as they give the extent
+            # of each file's blocks.
+            files = []
+            for index, path in group:
+                file = FileFactory.get(self, index)
+                file.path = path
+                files.append((file, ) + file._get_extent())
+
+            for span in self.__coalesce(files, max_gap, max_span):
+                stored = [self.__get_stored(file) for file, _, _ in span]
+                # Only the part of the span still to be read is read.
+                unread = [entry for entry, data in zip(span, stored) if data is None]
+                if len(unread) > 0:
+                    start = unread[0][1]
+                    end = max(e for _, _, e in unread)
+                    stream = self.get_data_stream(dat_file)
+                    stream.seek(start)
+                    span_stream = BufferStream(memoryview(stream.read(end - start)), start)
+
+                for (file, _, _), data in zip(span, stored):
+                    if data is not None:
+                        yield file, data, None
+                        continue
+                    try:
+                        yield file, None, file._read_sources(span_stream)
+                    except EOFError:
+                        # The block table understated the file's extent.
+                        yield file, file.get_data(), None
+
+    def __get_stored(self, file: 'File') -> bytes:
+        data = self.payload_cache.get(file.cache_key)
+        if self._statistics is not None:
+            self._statistics.add('cache_misses' if data is None else 'cache_hits')
+        if data is None and self.blob_store is not None:
+            data = self.blob_store.get(file.blob_key)
+        return data
+
+    @staticmethod
+    def __coalesce(files, max_gap, max_span):
+        span = []
+        span_end = 0
+        for entry in files:
+            _, start, end = entry
+            if len(span) > 0 and (start - span_end > max_gap or end - span[0][1] > max_span):
+                yield span
+                span = []
+            if len(span) == 0:
+                span_end = end
+            span.append(entry)
+            span_end = max(span_end, end)
+        if len(span) > 0:
+            yield span
+
+    @staticmethod
+    def __create_directory_sink(directory: Path):
+        def _write(path, data):
+            target = directory.joinpath(path)
+            if not target.parent.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+        return _write
@@ -0,0 +1,210 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+import struct
+import sys
+from zlib import crc32
+from typing import Iterable, Optional
+
+from .util import replace_file
+
+
+class PathDictionary(object):
+    """
+    Table of known paths, used to recover the names of files that packs only
+    store as hashes.
+
+    Each path is hashed once, both as a directory and file name pair (for
+    packs with an index file) and as a whole (for packs with only an index2
+    file). The keys are kept in sorted arrays and the names in a single
+    UTF-8 blob, so millions of paths take little more memory than their
+    text.
+    """
+
+    MAGIC = b'SCPD'
+    FORMAT_VERSION = 1
+
+    # Magic, format version, path count, name blob length.
+    _HEADER = struct.Struct('<4sIIQ')
+
+    def __init__(self, paths: Iterable[str] = None):
+        # (directory key << 32 | file key) and full path key of each path,
+        # sorted, with the index of the path they belong to.
+        self._pair_keys = array('Q')
+        self._pair_paths = array('I')
+        self._full_keys = array('I')
+        self._full_paths = array('I')
+        self._name_offsets = array('Q', [0])
+        self._names = bytearray()
+        self._pending = []  # type: list[str]
+        if paths is not None:
+            self.add_paths(paths)
+
+    def __len__(self):
+        self._freeze()
+        return len(self._name_offsets) - 1
+
+    def add_paths(self, paths: Iterable[str]):
+        """
+        Adds the given paths to the dictionary.
+        """
+        self._pending.extend(path.strip() for path in paths)
+
+    def add_path_list(self, path):
+        """
+        Adds the paths listed in a text file, one per line.
+        """
+        if isinstance(path, str):
+            path = Path(path)
+        with path.open(encoding='utf-8') as f:
+            self.add_paths(line for line in f if len(line.strip()) > 0)
+
+    def get_path(self, directory_key: int, file_key: int) -> Optional[str]:
+        """
+        Gets the path of a file in a pack with an index file.
+        """
+        self._freeze()
+        return self.__find(self._pair_keys, self._pair_paths, directory_key << 32 | file_key)
+
+    def get_path_for_hash(self, key: int) -> Optional[str]:
+        """
+        Gets the path of a file in a pack with only an index2 file.
+        """
+        self._freeze()
+        return self.__find(self._full_keys, self._full_paths, key)
+
+    def get_path_for_index(self, index) -> Optional[str]:
+        """
+        Gets the path of the file an index entry refers to.
+        """
+        directory_key = getattr(index, 'directory_key', None)
+        if directory_key is None:
+            return self.get_path_for_hash(index.file_key)
+        return self.get_path(directory_key, index.file_key)
+
+    def __find(self, keys, paths, key) -> Optional[str]:
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return None
+        return self.__get_name(paths[i])
+
+    def __get_name(self, i: int) -> str:
+        return self._names[self._name_offsets[i]:self._name_offsets[i + 1]].decode('utf-8')
+
+    def _freeze(self):
+        # Hash the paths added since the last lookup, and merge them into the
+        # sorted tables.
+        if len(self._pending) == 0:
+            return
+
+        pending = sorted(set(self._pending))
+        self._pending = []
+
+        first = len(self._name_offsets) - 1
+        has_entries = first > 0
+        directory_keys = {}  # type: dict[bytes, int]
+        pairs = []
+        fulls = []
+        encoded = []
+        offset = self._name_offsets[-1]
+        for path in pending:
+            # Same as `_compute_hash`, but each path is lowered and encoded
+            # only once for all three hashes.
+            lowered = path.lower().encode()
+            full_key = ~crc32(lowered) & 0xFFFFFFFF
+            if has_entries and self.__find(self._full_keys, self._full_paths, full_key) == path:
+                continue
+            i = first + len(encoded)
+            data = path.encode('utf-8')
+            encoded.append(data)
+            offset += len(data)
+            self._name_offsets.append(offset)
+
+            fulls.append((full_key, i))
+            last_separator = lowered.rfind(b'/')
+            if last_separator < 0:
+                continue
+            dir_path = lowered[:last_separator]
+            directory_key = directory_keys.get(dir_path)
+            if directory_key is None:
+                directory_key = directory_keys[dir_path] = ~crc32(dir_path) & 0xFFFFFFFF
+            pairs.append((directory_key << 32 | (~crc32(lowered[last_separator + 1:]) & 0xFFFFFFFF), i))
+        if len(encoded) == 0:
+            return
+        self._names.extend(b''.join(encoded))
+
+        self._pair_keys, self._pair_paths = self.__merge(self._pair_keys, self._pair_paths, pairs)
+        self._full_keys, self._full_paths = self.__merge(self._full_keys, self._full_paths, fulls)
+
+    @staticmethod
+    def __merge(keys, paths, entries):
+        # Only the new entries are sorted; the existing tables are copied in
+        # slices between the places the new keys go. New entries come after
+        # existing ones with the same key, as their paths were added later.
+        entries.sort()
+        merged_keys = array(keys.typecode)
+        merged_paths = array(paths.typecode)
+        start = 0
+        for key, path in entries:
+            i = bisect_right(keys, key, start)
+            merged_keys.extend(keys[start:i])
+            merged_paths.extend(paths[start:i])
+            merged_keys.append(key)
+            merged_paths.append(path)
+            start = i
+        merged_keys.extend(keys[start:])
+        merged_paths.extend(paths[start:])
+        return merged_keys, merged_paths
+
+    def write(self, path):
+        """
+        Writes the hashed table to a file that `read` loads without hashing.
+        """
+        if isinstance(path, str):
+            path = Path(path)
+        self._freeze()
+
+        parts = [self._HEADER.pack(self.MAGIC, self.FORMAT_VERSION, len(self), len(self._names))]
+        for values in (self._name_offsets, self._pair_keys, self._full_keys,
+                       self._pair_paths, self._full_paths):
+            values = array(values.typecode, values)
+            if sys.byteorder != 'little':
+                values.byteswap()
+            parts.append(struct.pack('<Q', len(values)))
+            parts.append(values.tobytes())
+        parts.append(self._names)
+
+        replace_file(path, parts)
+
+    @staticmethod
+    def read(path) -> 'PathDictionary':
+        if isinstance(path, str):
+            path = Path(path)
+
+        buffer = path.read_bytes()
+        magic, fmt, _, names_length = PathDictionary._HEADER.unpack_from(buffer, 0)
+        if magic != PathDictionary.MAGIC or fmt != PathDictionary.FORMAT_VERSION:
+            raise ValueError('Not a path dictionary: %s' % path)
+
+        dictionary = PathDictionary()
+        position = PathDictionary._HEADER.size
+        tables = []
+        for typecode in ('Q', 'Q', 'I', 'I', 'I'):
+            count, = struct.unpack_from('<Q', buffer, position)
+            position += 8
+            values = array(typecode)
+            length = count * values.itemsize
+            if position + length > len(buffer):
+                raise EOFError
+            values.frombytes(buffer[position:position + length])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            tables.append(values)
+            position += length
+        if position + names_length > len(buffer):
+            raise EOFError
+
+        (dictionary._name_offsets, dictionary._pair_keys, dictionary._full_keys,
+         dictionary._pair_paths, dictionary._full_paths) = tables
+        dictionary._names = bytearray(buffer[position:position + names_length])
+        return dictionary
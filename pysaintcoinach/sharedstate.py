@@ -0,0 +1,294 @@
+import logging
+import os
+import struct
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .indexcache import IndexCache
+from .indexfile import IndexTable
+from .pack import PackCollection
+
+
+logger = logging.getLogger(__name__)
+
+
+def _attach_segment(name: str):
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # Windows segments are never tracked.
+    if os.name == 'nt':
+        return shared_memory.SharedMemory(name=name)
+    try:
+        return _UntrackedSegment(name)
+    except ImportError:
+        pass
+
+    # Without access to the segment itself, attach through `SharedMemory`
+    # and undo its registration. Processes started by multiprocessing share
+    # their parent's tracker though, where that would drop the registration
+    # of the publisher.
+    import multiprocessing
+    from multiprocessing import resource_tracker
+
+    segment = shared_memory.SharedMemory(name=name)
+    if multiprocessing.parent_process() is None:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+class _UntrackedSegment(object):
+    """
+    Read-only mapping of a POSIX shared memory segment.
+
+    Before Python 3.13 attaching through `SharedMemory` registers the
+    segment with the resource tracker, which unlinks it when the process
+    exits; unregistering afterwards would instead drop the registration of
+    a parent sharing the same tracker. The segment is opened directly
+    instead, leaving the tracker alone.
+    """
+
+    @property
+    def name(self) -> str: return self._name
+
+    @property
+    def buf(self) -> memoryview: return self._buf
+
+    def __init__(self, name: str):
+        import mmap
+        import _posixshmem
+
+        self._name = name
+        fd = _posixshmem.shm_open('/' + name, os.O_RDONLY, mode=0o600)
+        try:
+            self._mmap = mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._buf = memoryview(self._mmap)
+
+    def close(self):
+        if self._buf is not None:
+            self._buf.release()
+            self._buf = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class SharedIndexCache(IndexCache):
+    """
+    Index cache serving tables from shared memory segments published by a
+    `SharedPackState`, falling back to an on-disk cache or to parsing.
+
+    Tables use the same layout as the on-disk cache and are validated the
+    same way, so a segment built for another game version is never used.
+    """
+
+    def __init__(self, tables: Dict[str, memoryview], game_version: str = None, inner: IndexCache = None):
+        super(SharedIndexCache, self).__init__(inner.directory if inner is not None else None, game_version)
+        self._tables = tables
+        self._inner = inner
+
+    def __repr__(self):
+        return "SharedIndexCache(%u tables)" % len(self._tables)
+
+    def get_table(self,
+                  source_path: str,
+                  has_directory_keys: bool,
+                  factory: Callable[[], IndexTable]) -> IndexTable:
+        view = self._tables.get(os.path.abspath(source_path))
+        if view is not None:
+            try:
+                table = self._parse_table(view, self._get_source_key(source_path))
+            except (OSError, ValueError, struct.error) as exc:
+                logger.warning('Ignoring shared index table for %s: %s', source_path, exc)
+                table = None
+            if table is not None:
+                return table
+        if self._inner is not None:
+            return self._inner.get_table(source_path, has_directory_keys, factory)
+        return factory()
+
+    def get_sheet_list(self, source_path: str, factory):
+        if self._inner is not None:
+            return self._inner.get_sheet_list(source_path, factory)
+        return factory()
+
+
+class SharedBlobStore(object):
+    """
+    Read-only store of decompressed payloads published in shared memory,
+    in front of an optional regular blob store.
+    """
+
+    # Pack, dat file, offset, compressed size; payload offset and length.
+    _ENTRY = struct.Struct('<IIQIQQ')
+    _HEADER = struct.Struct('<4sII')
+    MAGIC = b'SCSP'
+    FORMAT_VERSION = 1
+
+    def __init__(self, view: memoryview, inner=None):
+        self._view = view
+        self._inner = inner
+        self._entries = {}  # type: Dict[Tuple, Tuple[int, int]]
+
+        magic, fmt, count = self._HEADER.unpack_from(view, 0)
+        if magic != self.MAGIC or fmt != self.FORMAT_VERSION:
+            raise ValueError('Not a shared payload segment')
+        position = self._HEADER.size
+        for i in range(count):
+            pack, dat_file, offset, size, start, length = self._ENTRY.unpack_from(view, position)
+            self._entries[(pack, dat_file, offset, size)] = (start, length)
+            position += self._ENTRY.size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> bytes:
+        entry = self._entries.get(tuple(key))
+        if entry is not None:
+            start, length = entry
+            return bytes(self._view[start:start + length])
+        if self._inner is not None:
+            return self._inner.get(key)
+        return None
+
+    def put(self, key: Tuple, payload: bytes):
+        if self._inner is not None:
+            self._inner.put(key, payload)
+
+    @staticmethod
+    def serialize(payloads: List[Tuple[Tuple, bytes]]) -> bytes:
+        header_length = SharedBlobStore._HEADER.size + SharedBlobStore._ENTRY.size * len(payloads)
+        parts = [SharedBlobStore._HEADER.pack(SharedBlobStore.MAGIC, SharedBlobStore.FORMAT_VERSION,
+                                              len(payloads))]
+        position = header_length
+        for key, payload in payloads:
+            parts.append(SharedBlobStore._ENTRY.pack(*(tuple(key) + (position, len(payload)))))
+            position += len(payload)
+        parts.extend(payload for _, payload in payloads)
+        return b''.join(parts)
+
+
+class SharedPackState(object):
+    """
+    Parsed index tables, and optionally hot payloads, published in shared
+    memory by one process for worker processes to attach to read-only.
+
+    The parent calls `publish` and hands `descriptor` to its workers, which
+    pass it as the `shared_state` of their own `PackCollection` (or
+    `ARealmReversed`), so it is attached before any pack is opened. The
+    parent must keep its state alive while workers use it, and `unlink` it
+    once they are done.
+    """
+
+    @property
+    def descriptor(self) -> Dict:
+        """
+        Gets the picklable description of the segments, for `attach`.
+        """
+        return self._descriptor
+
+    def __init__(self, descriptor: Dict, segments: List, owner: bool):
+        self._descriptor = descriptor
+        self._segments = segments
+        self._owner = owner
+
+    def __repr__(self):
+        return "SharedPackState(%u segments)" % len(self._segments)
+
+    @staticmethod
+    def publish(collection: PackCollection,
+                packs: Iterable = None,
+                payload_paths: Iterable[str] = None) -> 'SharedPackState':
+        """
+        Parses the index tables of `packs` (every pack on disk by default)
+        and the data of the files at `payload_paths` into shared memory.
+        """
+        from multiprocessing import shared_memory
+
+        if packs is None:
+            packs = collection.get_all_packs()
+
+        serializer = IndexCache(None, collection.game_version)
+        segments = []
+        tables = {}
+        try:
+            for pack in packs:
+                index = pack.source.index
+                table = index.table
+                if index.path is None:
+                    continue
+                key = serializer._get_source_key(index.path)
+                data = serializer._serialize_table(key, table, table.directory_keys is not None)
+                segment = SharedPackState.__create_segment(shared_memory, data)
+                segments.append(segment)
+                tables[os.path.abspath(index.path)] = segment.name
+
+            payloads = None
+            if payload_paths is not None:
+                entries = []
+                for path in payload_paths:
+                    file = collection.get_file(path)
+                    if file is not None:
+                        entries.append((file.blob_key, bytes(file.get_data())))
+                segment = SharedPackState.__create_segment(shared_memory, SharedBlobStore.serialize(entries))
+                segments.append(segment)
+                payloads = segment.name
+        except BaseException:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+            raise
+
+        descriptor = {'game_version': collection.game_version, 'tables': tables, 'payloads': payloads}
+        return SharedPackState(descriptor, segments, True)
+
+    @staticmethod
+    def __create_segment(shared_memory, data: bytes):
+        segment = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        segment.buf[:len(data)] = data
+        return segment
+
+    @staticmethod
+    def attach(collection: PackCollection, descriptor: Dict) -> 'SharedPackState':
+        """
+        Makes `collection` use the published tables and payloads.
+
+        Only packs opened afterwards use the published tables; collections
+        given a `shared_state` attach to it while they are created.
+        """
+        segments = []
+        tables = {}
+        for path, name in descriptor['tables'].items():
+            segment = _attach_segment(name)
+            segments.append(segment)
+            tables[path] = segment.buf.toreadonly()
+        collection.index_cache = SharedIndexCache(tables, descriptor['game_version'], collection.index_cache)
+
+        if descriptor['payloads'] is not None:
+            segment = _attach_segment(descriptor['payloads'])
+            segments.append(segment)
+            collection.blob_store = SharedBlobStore(segment.buf.toreadonly(), collection.blob_store)
+        return SharedPackState(descriptor, segments, False)
+
+    def close(self):
+        for segment in self._segments:
+            try:
+                segment.close()
+            except BufferError:
+                # Tables are still in use; the mapping goes when they do.
+                pass
+
+    def unlink(self):
+        """
+        Closes and removes the segments; only the publishing process does so.
+        """
+        self.close()
+        if self._owner:
+            for segment in self._segments:
+                segment.unlink()
+            self._segments = []
@@ -1,11 +1,37 @@
-from typing import Union, Callable, TypeVar, Dict
+from typing import Union, Callable, TypeVar, Dict, Generic, Iterable
 from inspect import isfunction
+from collections import OrderedDict
+from pathlib import Path
+import os
+import tempfile
+from threading import RLock
 
 
 TKey = TypeVar('TKey')
 TValue = TypeVar('TValue')
 
 
+def replace_file(path: Path, parts: Iterable[bytes]):
+    """
+    Writes `parts` to a private temporary file next to `path` and moves it
+    over `path`, so concurrent readers never observe a partial file. The
+    temporary name ends in '.tmp' and is unique across threads and processes.
+    """
+    f = tempfile.NamedTemporaryFile(dir=str(path.parent), prefix=path.name + '.',
+                                    suffix='.tmp', delete=False)
+    try:
+        with f:
+            for part in parts:
+                f.write(part)
+        os.replace(f.name, str(path))
+    except BaseException:
+        try:
+            os.unlink(f.name)
+        except OSError:
+            pass
+        raise
+
+
 class ConcurrentDictionary(dict, Dict[TKey, TValue]):
     def add_or_update(self,
                       key: TKey,
@@ -35,3 +61,139 @@ class ConcurrentDictionary(dict, Dict[TKey, TValue]):
             value = self[key]
 
         return value
+
+
+class LruCache(Generic[TKey, TValue]):
+    """
+    Thread-safe cache that evicts the least recently used entries once the
+    total size of its values exceeds `max_size`.
+
+    With `keep_last`, the most recently added or used entry is kept even
+    when it alone exceeds `max_size`.
+    """
+
+    @property
+    def max_size(self) -> int: return self._max_size
+
+    @max_size.setter
+    def max_size(self, value: int):
+        with self._lock:
+            self._max_size = value
+            self._trim()
+
+    @property
+    def size(self) -> int: return self._size
+
+    @property
+    def hits(self) -> int: return self._hits
+
+    @property
+    def misses(self) -> int: return self._misses
+
+    @property
+    def evictions(self) -> int: return self._evictions
+
+    def __init__(self, max_size: int, sizeof: Callable[[TValue], int] = len, keep_last: bool = False):
+        self._max_size = max_size
+        self._sizeof = sizeof
+        self._keep_last = keep_last
+        self._entries = OrderedDict()  # type: OrderedDict[TKey, tuple[TValue, int]]
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: TKey):
+        return key in self._entries
+
+    def get(self, key: TKey, default: TValue = None) -> TValue:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: TKey, value: TValue, size: int = None) -> TValue:
+        if size is None:
+            size = self._sizeof(value)
+        with self._lock:
+            self._remove(key)
+            if size > self._max_size and not self._keep_last:
+                # Never worth evicting everything else for a single entry.
+                return value
+            self._entries[key] = (value, size)
+            self._size += size
+            self._trim()
+        return value
+
+    def get_or_add(self,
+                   key: TKey,
+                   factory: Callable[[TKey], TValue],
+                   sizeof: Callable[[TValue], int] = None) -> TValue:
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        # The factory runs outside the lock; concurrent misses for the same
+        # key may both compute the value.
+        value = factory(key)
+        return self.put(key, value, None if sizeof is None else sizeof(value))
+
+    def remove(self, key: TKey):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def remeasure(self, key: TKey):
+        """
+        Measures an entry again, for values that grow after being added,
+        and evicts the least recently used entries if they no longer fit.
+        The entry keeps its place in the order.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return
+        # Measuring may be slow, so it runs outside the lock.
+        size = self._sizeof(entry[0])
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current[0] is not entry[0]:
+                return
+            # Assigning to an existing key keeps its place in the order.
+            self._entries[key] = (entry[0], size)
+            self._size += size - current[1]
+            self._trim()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries),
+                    'size': self._size,
+                    'max_size': self._max_size,
+                    'hits': self._hits,
+                    'misses': self._misses,
+                    'evictions': self._evictions}
+
+    def _remove(self, key: TKey):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def _trim(self):
+        keep = 1 if self._keep_last else 0
+        while self._size > self._max_size and len(self._entries) > keep:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
@@ -6,10 +6,12 @@ from ..ex.relational.sheet import IRelationalRow, IRelationalSheet
 from .. import xiv
 from .. import text
 from .. import imaging
-from ..util import ConcurrentDictionary
+from ..util import LruCache
 
 
 class IXivRow(IRelationalRow):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def source_row(self) -> IRelationalRow: pass
@@ -20,6 +22,8 @@ class IXivRow(IRelationalRow):
 
 
 class IXivSubRow(IXivRow):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def parent_row(self) -> 'IRow': pass
@@ -43,6 +47,8 @@ class IXivSheet(IRelationalSheet[T]):
 
 
 class XivRow(IXivRow):
+    __slots__ = ('__sheet', '__source_row')
+
     @property
     def source_row(self): return self.__source_row
 
@@ -145,12 +151,15 @@ class XivRow(IXivRow):
 
 
 class XivSheet(IXivSheet[T]):
+    # Rough memory held by each row kept, for `estimate_size`.
+    ROW_SIZE_ESTIMATE = 0x200
+
     def __init__(self,
                  t_cls: Type[T],
                  collection: 'xiv.XivCollection',
                  source: IRelationalSheet):
         self.__t_cls = t_cls
-        self.__rows = ConcurrentDictionary()  # type: ConcurrentDictionary[int, T]
+        self.__rows = LruCache(collection.cache_policy.max_rows, sizeof=lambda row: 1)  # type: LruCache[int, T]
         self.__collection = collection
         self.__source = source
 
@@ -194,8 +203,16 @@ class XivSheet(IXivSheet[T]):
     @property
     def keys(self): return self.__source.keys
 
+    def column_array(self, column):
+        return self.__source.column_array(column)
+
+    def estimate_size(self) -> int:
+        return self.__source.estimate_size() + self.ROW_SIZE_ESTIMATE * len(self.__rows)
+
 
 class XivSubRow(XivRow, IXivSubRow):
+    __slots__ = ('_source_sub_row',)
+
     def __init__(self, sheet: IXivSheet, source_row: IRelationalRow):
         super(XivSubRow, self).__init__(sheet, source_row)
         self._source_sub_row = source_row  # type: SubRow
@@ -219,7 +236,8 @@ class XivSheet2(XivSheet[T]):
                  collection: 'xiv.XivCollection',
                  source: IRelationalSheet):
         self.__t_cls = t_cls
-        self.__sub_rows = {}  # type: Dict[Tuple[int, int], T]
+        self.__sub_rows = LruCache(collection.cache_policy.max_rows,
+                                   sizeof=lambda row: 1)  # type: LruCache[Tuple[int, int], T]
         self.__source = source
         super(XivSheet2, self).__init__(t_cls, collection, source)
 
@@ -229,8 +247,7 @@ class XivSheet2(XivSheet[T]):
                 key = (current_parent.key, src_row.key)
                 row = self.__sub_rows.get(key)
                 if row is None:
-                    row = self._create_sub_row(src_row)
-                    self.__sub_rows[key] = row
+                    row = self.__sub_rows.put(key, self._create_sub_row(src_row))
                 yield row
 
     def __len__(self):
@@ -240,6 +257,9 @@ class XivSheet2(XivSheet[T]):
     def _create_sub_row(self, source_row: IRelationalRow) -> T:
         return self.__t_cls(self, source_row)
 
+    def estimate_size(self) -> int:
+        return super(XivSheet2, self).estimate_size() + self.ROW_SIZE_ESTIMATE * len(self.__sub_rows)
+
     def __getitem__(self, item):
         # The base version of SaintCoinach doesn't provide a safe method of
         # using the indexer, even though it inherits it from XivSheet<T>.
@@ -1,5 +1,6 @@
 from typing import Dict, TypeVar, overload, Type, cast
 
+from ..ex.excollection import SheetCachePolicy
 from ..ex.relational.excollection import RelationalExCollection
 from ..ex.relational.sheet import IRelationalSheet
 from ..pack import PackCollection
@@ -27,8 +28,8 @@ class XivCollection(RelationalExCollection):
             self.__shops = ShopCollection(self)
         return self.__shops
 
-    def __init__(self, pack_collection: PackCollection):
-        super(XivCollection, self).__init__(pack_collection)
+    def __init__(self, pack_collection: PackCollection, cache_policy: SheetCachePolicy = None):
+        super(XivCollection, self).__init__(pack_collection, cache_policy)
         # NOTE: Our port doesn't actually make use of `sheet_name_to_type_map` because we use the decorator
         # instead. Runtime reflection is a bit different in Python.
         self.__sheet_name_to_type_map = ConcurrentDictionary()  # type: ConcurrentDictionary[str, type]
@@ -0,0 +1,25 @@
+import pytest
+
+from pysaintcoinach.pack import PackIdentifier
+
+from sqpack_builder import write_pack
+
+
+EXD_PACK = PackIdentifier('exd', 'ffxiv', 0)
+
+
+@pytest.fixture
+def make_sqpack(tmp_path):
+    """
+    Gets a function writing a synthetic sqpack directory holding the given
+    files in the exd pack, and returning the directory.
+    """
+    count = [0]
+
+    def _make(files, **kwargs):
+        count[0] += 1
+        data_directory = tmp_path.joinpath('root%u' % count[0], 'sqpack')
+        write_pack(data_directory, EXD_PACK, files, **kwargs)
+        return data_directory
+
+    return _make
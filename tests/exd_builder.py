@@ -0,0 +1,62 @@
+"""
+Builds small synthetic EX files (root list, headers and data files) for
+the tests.
+"""
+import struct
+from typing import Dict, Iterable, Tuple
+
+
+def build_root(sheets: Dict[str, int]) -> bytes:
+    lines = ['EXLT,2'] + ['%s,%d' % (name, id) for name, id in sheets.items()]
+    return ('\r\n'.join(lines) + '\r\n').encode()
+
+
+def build_header(columns: Iterable[Tuple[int, int]],
+                 fixed_size_data_length: int,
+                 ranges: Iterable[Tuple[int, int]],
+                 languages: Iterable[int] = (0, ),
+                 variant: int = 1) -> bytes:
+    """
+    Builds an EXH file from the (type, offset) of each column, the (start,
+    length) of each data file and the code of each language.
+    """
+    columns = list(columns)
+    ranges = list(ranges)
+    languages = list(languages)
+
+    header = bytearray(0x20)
+    header[0:4] = b'EXHF'
+    struct.pack_into('>HHHHHH', header, 0x04, 3, fixed_size_data_length,
+                     len(columns), len(ranges), len(languages), 0)
+    struct.pack_into('>H', header, 0x10, variant)
+    parts = [bytes(header)]
+    parts += [struct.pack('>HH', *column) for column in columns]
+    parts += [struct.pack('>ll', *_range) for _range in ranges]
+    parts += [struct.pack('>BB', code, 0) for code in languages]
+    return b''.join(parts)
+
+
+def build_data(rows: Dict[int, bytes], sub_row_counts: Dict[int, int] = None) -> bytes:
+    """
+    Builds an EXD file from the data of each row, after its metadata.
+    """
+    ENTRIES_OFFSET = 0x20
+    ENTRY_LENGTH = 0x08
+    METADATA_LENGTH = 0x06
+
+    if sub_row_counts is None:
+        sub_row_counts = {}
+
+    position = ENTRIES_OFFSET + ENTRY_LENGTH * len(rows)
+    entries = []
+    data = []
+    for key, row in rows.items():
+        entries.append(struct.pack('>ll', key, position))
+        data.append(struct.pack('>lh', len(row), sub_row_counts.get(key, 1)) + row)
+        position += METADATA_LENGTH + len(row)
+
+    header = bytearray(ENTRIES_OFFSET)
+    header[0:4] = b'EXDF'
+    struct.pack_into('>H', header, 0x04, 2)
+    struct.pack_into('>ll', header, 0x08, ENTRY_LENGTH * len(rows), sum(map(len, data)))
+    return bytes(header) + b''.join(entries) + b''.join(data)
@@ -0,0 +1,126 @@
+"""
+Writes small synthetic SqPack directories for the tests.
+
+Only the parts of the format this library reads are filled in: the index
+header, directory and file tables, and default-type files made of one or
+more deflated (or stored) blocks.
+"""
+from pathlib import Path
+import struct
+import zlib
+from typing import Dict, Iterable, Tuple
+
+from pysaintcoinach.indexfile import _compute_hash
+from pysaintcoinach.pack import PackIdentifier
+
+
+SQPACK_MAGIC = b'SqPack\x00\x00'
+
+BLOCK_PADDING = 0x80
+BLOCK_HEADER_LENGTH = 0x10
+UNCOMPRESSED_SOURCE_SIZE = 0x7D00
+
+# Offset of the first file in each dat file, past where the SqPack headers
+# of a real dat file would be.
+DAT_DATA_OFFSET = 0x800
+
+
+def _pad(data: bytes, alignment: int = BLOCK_PADDING) -> bytes:
+    if len(data) % alignment != 0:
+        data += bytes(alignment - len(data) % alignment)
+    return data
+
+
+def encode_block(data: bytes, compress: bool = True) -> bytes:
+    """
+    Encodes one data block, header included, padded as the game pads it.
+    """
+    if compress:
+        deflater = zlib.compressobj(9, zlib.DEFLATED, -15)
+        payload = deflater.compress(data) + deflater.flush()
+        header = struct.pack('<llll', BLOCK_HEADER_LENGTH, 0, len(payload), len(data))
+        return _pad(header + payload)
+    header = struct.pack('<llll', BLOCK_HEADER_LENGTH, 0, UNCOMPRESSED_SOURCE_SIZE, len(data))
+    return header + data
+
+
+def encode_file(data: bytes, compress: bool = True, block_size: int = 0x4000) -> bytes:
+    """
+    Encodes a default-type file: its common header followed by its blocks.
+    """
+    starts = range(0, len(data), block_size)
+    blocks = [encode_block(data[start:start + block_size], compress) for start in starts]
+
+    header = bytearray(_pad(bytes(0x18 + 8 * len(blocks))))
+    # The padded length is never more than the data, so it adds no padding.
+    struct.pack_into('<lLLLLl', header, 0,
+                     len(header), 2, len(data), 0, len(data) >> 7, len(blocks))
+    block_offset = 0
+    for i, (block, start) in enumerate(zip(blocks, starts)):
+        struct.pack_into('<lHH', header, 0x18 + i * 8,
+                         block_offset, len(block), len(data[start:start + block_size]))
+        block_offset += len(block)
+    return bytes(header) + b''.join(blocks)
+
+
+def write_pack(data_directory: Path,
+               pack_id: PackIdentifier,
+               files: Dict[str, bytes],
+               compress: bool = True,
+               dat_offset: int = DAT_DATA_OFFSET) -> Dict[str, Tuple[int, int]]:
+    """
+    Writes the index and dat file of a pack holding `files`, keyed by path.
+
+    Files are laid out in the order given, starting at `dat_offset`. Returns
+    the dat file and offset each path was written to.
+    """
+    expansion_directory = Path(data_directory).joinpath(pack_id.expansion)
+    expansion_directory.mkdir(parents=True, exist_ok=True)
+    base_name = '%02x%02x%02x.win32' % (pack_id.type_key, pack_id.expansion_key, pack_id.number)
+
+    dat = bytearray(dat_offset)
+    locations = {}
+    entries = []
+    for path, data in files.items():
+        offset = len(dat)
+        dat += _pad(encode_file(data, compress))
+        locations[path] = (0, offset)
+
+        last_separator = path.rindex('/')
+        entries.append((_compute_hash(path[:last_separator]),
+                        _compute_hash(path[last_separator + 1:]),
+                        offset))
+    expansion_directory.joinpath(base_name + '.dat0').write_bytes(bytes(dat))
+
+    entries.sort()
+    expansion_directory.joinpath(base_name + '.index').write_bytes(_build_index(entries))
+    return locations
+
+
+def _build_index(entries: Iterable[Tuple[int, int, int]]) -> bytes:
+    HEADER_OFFSET = 0x400
+    HEADER_LENGTH = 0x400
+    ENTRY_LENGTH = 0x10
+
+    entries = list(entries)
+    files_offset = HEADER_OFFSET + HEADER_LENGTH
+    files = b''.join(struct.pack('<LLL4x', file_key, directory_key, offset >> 3)
+                     for directory_key, file_key, offset in entries)
+
+    directories = []
+    for i, (directory_key, _, _) in enumerate(entries):
+        if len(directories) > 0 and directories[-1][0] == directory_key:
+            directories[-1][2] += ENTRY_LENGTH
+        else:
+            directories.append([directory_key, files_offset + i * ENTRY_LENGTH, ENTRY_LENGTH])
+    directories_offset = files_offset + len(files)
+    directory_table = b''.join(struct.pack('<Lll4x', *directory) for directory in directories)
+
+    prefix = bytearray(HEADER_OFFSET)
+    prefix[0:8] = SQPACK_MAGIC
+    struct.pack_into('<l', prefix, 0x0C, HEADER_OFFSET)
+
+    header = bytearray(HEADER_LENGTH)
+    struct.pack_into('<ll', header, 0x08, files_offset, len(files))
+    struct.pack_into('<ll', header, 0xE4, directories_offset, len(directory_table))
+    return bytes(prefix) + bytes(header) + files + directory_table
@@ -0,0 +1,114 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pysaintcoinach.asyncpack import AsyncPackCollection
+from pysaintcoinach.pack import PackCollection
+
+
+FILES = dict(('exd/file%02u.exd' % i, bytes([i]) * (0x100 + i * 0x40)) for i in range(24))
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super(CountingExecutor, self).__init__(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super(CountingExecutor, self).submit(*args, **kwargs)
+
+
+def _run(make_sqpack, test, **kwargs):
+    collection = PackCollection(make_sqpack(FILES), payload_cache_size=0)
+    inflate_executor = CountingExecutor()
+
+    async def _main():
+        async with AsyncPackCollection(collection, inflate_executor=inflate_executor, **kwargs) as packs:
+            return await test(packs)
+
+    try:
+        return asyncio.run(_main()), inflate_executor
+    finally:
+        inflate_executor.shutdown()
+        collection.close()
+
+
+def test_get_data(make_sqpack):
+    async def _test(packs):
+        paths = ['exd/file03.exd', 'exd/file03.exd', 'exd/missing.exd']
+        return await asyncio.gather(*(packs.get_data(path) for path in paths))
+
+    results, inflate_executor = _run(make_sqpack, _test)
+
+    assert results == [FILES['exd/file03.exd'], FILES['exd/file03.exd'], None]
+    # Concurrent requests for one file share a single read.
+    assert inflate_executor.submitted == 1
+
+
+def test_extract_many(make_sqpack):
+    async def _test(packs):
+        return [item async for item in packs.extract_many(list(FILES) + ['exd/missing.exd'], read_ahead=2)]
+
+    results, inflate_executor = _run(make_sqpack, _test)
+
+    assert dict(results[:-1]) == FILES
+    assert results[-1] == ('exd/missing.exd', None)
+    assert inflate_executor.submitted == len(FILES)
+
+
+def test_extract_many_stops_with_consumer(make_sqpack):
+    async def _test(packs):
+        extraction = packs.extract_many(FILES, read_ahead=2)
+        first = await extraction.__anext__()
+        await extraction.aclose()
+        # Let the reading thread notice it was stopped.
+        await asyncio.sleep(0.1)
+        return first
+
+    first, inflate_executor = _run(make_sqpack, _test)
+
+    assert FILES[first[0]] == first[1]
+    assert 1 <= inflate_executor.submitted < len(FILES)
+
+
+class HoldingExecutor(ThreadPoolExecutor):
+    """
+    Runs the first task it gets and holds every later one back.
+    """
+
+    def __init__(self):
+        super(HoldingExecutor, self).__init__(max_workers=1)
+        self.held = []
+
+    def submit(self, *args, **kwargs):
+        if self.held or getattr(self, 'started', False):
+            future = Future()
+            self.held.append(future)
+            return future
+        self.started = True
+        return super(HoldingExecutor, self).submit(*args, **kwargs)
+
+
+def test_extract_many_cancels_files_read_ahead(make_sqpack):
+    collection = PackCollection(make_sqpack(FILES), payload_cache_size=0)
+    inflate_executor = HoldingExecutor()
+
+    async def _main():
+        async with AsyncPackCollection(collection, inflate_executor=inflate_executor) as packs:
+            extraction = packs.extract_many(FILES, read_ahead=2)
+            first = await extraction.__anext__()
+            # Let the reading thread fill the queue and block on the next put.
+            await asyncio.sleep(0.1)
+            await extraction.aclose()
+            await asyncio.sleep(2 * AsyncPackCollection.PUT_POLL_INTERVAL)
+            return first
+
+    try:
+        first = asyncio.run(_main())
+    finally:
+        inflate_executor.shutdown()
+        collection.close()
+
+    assert FILES[first[0]] == first[1]
+    assert len(inflate_executor.held) >= 2
+    assert all(future.cancelled() for future in inflate_executor.held)
@@ -0,0 +1,57 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from pysaintcoinach.blobstore import BlobStore
+
+
+def test_put_and_get(tmp_path):
+    store = BlobStore(tmp_path, '2024.01.01.0000.0000')
+    store.put((1, 0, 0x800, 0x100), b'payload')
+
+    assert store.get((1, 0, 0x800, 0x100)) == b'payload'
+    assert store.get((1, 0, 0x880, 0x100)) is None
+    # Blobs of another game version are never served.
+    assert BlobStore(tmp_path, '2024.02.01.0000.0000').get((1, 0, 0x800, 0x100)) is None
+    assert BlobStore(tmp_path, '2024.01.01.0000.0000').get((1, 0, 0x800, 0x100)) == b'payload'
+
+
+def test_corrupt_blob_is_discarded(tmp_path):
+    store = BlobStore(tmp_path)
+    key = (1, 0, 0x800, 0x100)
+    store.put(key, b'payload')
+    path = store._get_path(key)
+    path.write_bytes(path.read_bytes()[:-1] + b'?')
+
+    assert store.get(key) is None
+    assert not path.exists()
+
+
+def test_trim_drops_least_recently_used(tmp_path):
+    payload = bytes(0x100)
+    store = BlobStore(tmp_path, max_size=4 * (BlobStore._HEADER.size + len(payload)))
+    keys = [(1, 0, offset, 0x100) for offset in range(0, 0x500, 0x100)]
+    for age, key in enumerate(keys[:4]):
+        store.put(key, payload)
+        # Give each blob a distinct access time, oldest first.
+        os.utime(store._get_path(key), ns=(age * 10 ** 9, age * 10 ** 9))
+    store.put(keys[4], payload)
+
+    assert store.size <= store.max_size
+    assert store.get(keys[0]) is None
+    assert store.get(keys[4]) == payload
+
+
+def test_concurrent_puts_of_one_key(tmp_path, caplog):
+    store = BlobStore(tmp_path)
+    key = (1, 0, 0x800, 0x100)
+    payloads = [bytes([i]) * 0x10000 for i in range(8)]
+
+    with caplog.at_level(logging.WARNING, logger='pysaintcoinach.blobstore'):
+        with ThreadPoolExecutor(8) as executor:
+            for _ in range(4):
+                list(executor.map(lambda payload: store.put(key, payload), payloads))
+
+    assert caplog.text == ''
+    assert store.get(key) in payloads
+    assert list(tmp_path.glob('??/*.tmp')) == []
@@ -0,0 +1,70 @@
+import struct
+
+import pytest
+
+from pysaintcoinach.ex import ExCollection, Language
+from pysaintcoinach.pack import PackCollection
+
+from exd_builder import build_data, build_header, build_root
+
+numpy = pytest.importorskip('numpy')
+
+
+# int32, uint16, single, two packed booleans sharing a byte, and a string.
+COLUMNS = [(0x06, 0), (0x05, 4), (0x09, 6), (0x19, 10), (0x1B, 10), (0x00, 12)]
+FIXED_SIZE = 16
+
+
+def _row(key):
+    return struct.pack('>lHfBxl', -key * 1000, key, key / 4, key & 0b101, 0) + b'\x00'
+
+
+STATS_KEYS = [[0, 5, 7], [100, 150]]
+FILES = {
+    'exd/root.exl': build_root({'Stats': 1, 'Nested': 2, 'Localised': 3}),
+    'exd/stats.exh': build_header(COLUMNS, FIXED_SIZE, [(0, 100), (100, 100)]),
+    'exd/stats_0.exd': build_data(dict((key, _row(key)) for key in STATS_KEYS[0])),
+    'exd/stats_100.exd': build_data(dict((key, _row(key)) for key in STATS_KEYS[1])),
+    'exd/nested.exh': build_header(COLUMNS, FIXED_SIZE, [(0, 10)], variant=2),
+    'exd/nested_0.exd': build_data({1: b'\x00\x00' + _row(1) + b'\x00\x01' + _row(2)}, {1: 2}),
+    'exd/localised.exh': build_header(COLUMNS, FIXED_SIZE, [(0, 10)], languages=[2]),
+    'exd/localised_0_en.exd': build_data({3: _row(3), 4: _row(4)}),
+}
+
+
+@pytest.fixture
+def collection(make_sqpack):
+    packs = PackCollection(make_sqpack(FILES))
+    collection = ExCollection(packs)
+    collection.active_language = Language.english
+    yield collection
+    packs.close()
+
+
+def test_column_array_matches_rows(collection):
+    sheet = collection.get_sheet('Stats')
+    keys = [key for part in STATS_KEYS for key in part]
+    for index in range(5):
+        values, row_keys = sheet.column_array(index)
+        assert list(row_keys) == keys
+        assert list(values) == [sheet[key][index] for key in keys]
+
+    values, _ = sheet.column_array(3)
+    assert values.dtype == numpy.bool_
+    assert list(values) == [key & 0b001 != 0 for key in keys]
+    values, _ = sheet.column_array(0)
+    assert values.dtype == numpy.dtype('int32')
+
+
+def test_column_array_of_localised_sheet(collection):
+    values, keys = collection.get_sheet('Localised').column_array(1)
+
+    assert list(keys) == [3, 4]
+    assert list(values) == [3, 4]
+
+
+def test_column_array_rejects_strings_and_sub_rows(collection):
+    with pytest.raises(ValueError):
+        collection.get_sheet('Stats').column_array(5)
+    with pytest.raises(ValueError):
+        collection.get_sheet('Nested').column_array(0)
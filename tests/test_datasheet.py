@@ -0,0 +1,98 @@
+import struct
+
+import pytest
+
+from pysaintcoinach.ex import ExCollection
+from pysaintcoinach.pack import PackCollection
+from pysaintcoinach.xiv import XivRow
+from pysaintcoinach.xiv.class_job_category import ClassJobCategory
+
+from exd_builder import build_data, build_header, build_root
+
+
+# int32, uint16 and a string.
+COLUMNS = [(0x06, 0), (0x05, 4), (0x00, 6)]
+FIXED_SIZE = 10
+
+
+def _row(key):
+    name = ('row %u' % key).encode() + b'\0'
+    return struct.pack('>lHl', key * 1000, key, 0) + name
+
+
+def _sub_row(key, sub_key):
+    return struct.pack('>hlHl', sub_key, key * 1000 + sub_key, sub_key, -1)
+
+
+FILES = {
+    'exd/root.exl': build_root({'Plain': 1, 'Nested': 2}),
+    'exd/plain.exh': build_header(COLUMNS, FIXED_SIZE, [(0, 100), (100, 100)]),
+    'exd/plain_0.exd': build_data(dict((key, _row(key)) for key in (1, 2, 3))),
+    'exd/plain_100.exd': build_data(dict((key, _row(key)) for key in (100, 101, 102))),
+    'exd/nested.exh': build_header(COLUMNS, FIXED_SIZE, [(0, 10)], variant=2),
+    'exd/nested_0.exd': build_data({1: _sub_row(1, 0) + _sub_row(1, 1) + _sub_row(1, 2)}, {1: 3}),
+}
+
+
+@pytest.fixture
+def collection(make_sqpack):
+    packs = PackCollection(make_sqpack(FILES))
+    yield ExCollection(packs)
+    packs.close()
+
+
+def test_rows_have_no_dict(collection):
+    row = collection.get_sheet('Plain')[1]
+    parent = collection.get_sheet('Nested')[1]
+    sub_row = parent.get_sub_row(1)
+    for r in (row, parent, sub_row):
+        assert not hasattr(r, '__dict__')
+        with pytest.raises(AttributeError):
+            r.note = 'x'
+
+
+def test_cached_values_match_uncached(collection):
+    sheet = collection.get_sheet('Plain')
+    for key in (1, 2, 3, 100, 101, 102):
+        row = sheet[key]
+        buffer = row.sheet.get_buffer()
+        uncached = [column.read(buffer, row) for column in sheet.header.columns]
+        first = [row[i] for i in range(len(uncached))]
+        cached = [sheet[key][i] for i in range(len(uncached))]
+
+        assert first == uncached == [key * 1000, key, 'row %u' % key]
+        assert all(a is b for a, b in zip(first, cached))
+
+    # Both partial sheets have rows at the same offsets.
+    assert sheet[1].offset == sheet[100].offset
+    assert sheet[1][0] == 1000 and sheet[100][0] == 100000
+
+
+def test_sub_rows_do_not_share_cached_values(collection):
+    parent = collection.get_sheet('Nested')[1]
+    sub_rows = list(parent.sub_rows)
+    assert [sub_row.key for sub_row in sub_rows] == [0, 1, 2]
+    for _ in range(2):
+        assert [sub_row[0] for sub_row in sub_rows] == [1000, 1001, 1002]
+        assert [sub_row[1] for sub_row in sub_rows] == [0, 1, 2]
+
+
+class NotedRow(XivRow):
+    def __init__(self, sheet, source_row):
+        super(NotedRow, self).__init__(sheet, source_row)
+        self.note = 'noted'
+
+
+def test_xiv_row_subclasses_keep_attributes(collection):
+    source_row = collection.get_sheet('Plain')[2]
+
+    row = NotedRow(None, source_row)
+    assert row.note == 'noted'
+    row.note = 'changed'
+    assert row.note == 'changed'
+    assert row[0] == 2000 and row.key == 2
+
+    category = ClassJobCategory(None, source_row)
+    assert hasattr(category, '__dict__')
+    assert category.source_row is source_row
+    assert category[1] == 2
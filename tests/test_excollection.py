@@ -0,0 +1,141 @@
+import gc
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+
+from pysaintcoinach.ex import ExCollection, SheetCachePolicy
+from pysaintcoinach.ex.datasheet import DataSheet
+from pysaintcoinach.pack import PackCollection
+
+from exd_builder import build_data, build_header, build_root
+
+
+SHEET_COUNT = 20
+ROW_COUNT = 50
+
+
+def _files():
+    names = ['Sheet%02u' % i for i in range(SHEET_COUNT)]
+    files = {'exd/root.exl': build_root(dict((name, i) for i, name in enumerate(names)))}
+    for name in names:
+        files['exd/%s.exh' % name.lower()] = build_header([(0x06, 0)], 4, [(0, ROW_COUNT)])
+        files['exd/%s_0.exd' % name.lower()] = build_data(dict((key, struct.pack('>l', key))
+                                                               for key in range(ROW_COUNT)))
+    return names, files
+
+
+NAMES, FILES = _files()
+
+
+@pytest.fixture
+def make_collection(make_sqpack):
+    packs = []
+
+    def _make(policy):
+        packs.append(PackCollection(make_sqpack(FILES)))
+        return ExCollection(packs[-1], policy)
+
+    yield _make
+    for pack in packs:
+        pack.close()
+
+
+def _read_all(sheet):
+    return [row[0] for row in sheet]
+
+
+def test_budget_counts_rows_read(make_collection):
+    collection = make_collection(SheetCachePolicy(max_size=0x100))
+
+    _read_all(collection.get_sheet('Sheet00'))
+    collection.get_sheet('Sheet01')
+
+    assert 'Sheet00' not in collection._sheets
+    assert 'Sheet01' in collection._sheets
+
+
+def test_sheet_in_use_is_kept_over_budget(make_collection):
+    collection = make_collection(SheetCachePolicy(max_size=0x10))
+
+    sheet = collection.get_sheet('Sheet00')
+    assert _read_all(sheet) == list(range(ROW_COUNT))
+    assert sheet.estimate_size() > collection.cache_policy.max_size
+    assert collection.get_sheet('Sheet00') is sheet
+
+    # Once dropped, it is still reused for as long as it is referenced.
+    collection.get_sheet('Sheet01')
+    assert 'Sheet00' not in collection._sheets
+    assert collection.get_sheet('Sheet00') is sheet
+
+
+def test_dropped_sheets_are_released(make_collection):
+    collection = make_collection(SheetCachePolicy(max_size=0x10))
+
+    _read_all(collection.get_sheet('Sheet00'))
+    collection.get_sheet('Sheet01')
+    gc.collect()
+
+    assert 'Sheet00' not in collection._live_sheets
+
+
+def test_sheets_are_measured_once_per_switch(make_collection, monkeypatch):
+    collection = make_collection(SheetCachePolicy())
+    calls = []
+    estimate_size = DataSheet.estimate_size
+
+    def _estimate_size(self):
+        calls.append(self.name)
+        return estimate_size(self)
+
+    monkeypatch.setattr(DataSheet, 'estimate_size', _estimate_size)
+    for name in NAMES:
+        _read_all(collection.get_sheet(name))
+        collection.get_sheet(name)
+
+    assert len(calls) <= 2 * len(NAMES)
+    assert len(collection._sheets) == len(NAMES)
+
+
+def test_pinned_sheets_are_kept(make_collection):
+    collection = make_collection(SheetCachePolicy(max_size=0x10, pinned=['Sheet00']))
+
+    sheet = collection.get_sheet('Sheet00')
+    _read_all(sheet)
+    for name in NAMES[1:]:
+        _read_all(collection.get_sheet(name))
+
+    assert collection.get_sheet('Sheet00') is sheet
+    assert len(collection._sheets) == 1
+
+
+def test_sheets_are_created_once_across_threads(make_collection, monkeypatch):
+    collection = make_collection(SheetCachePolicy(max_size=0x400, pinned=['Sheet00']))
+    created = []
+    create_header = ExCollection._create_header
+
+    def _create_header(self, name, file):
+        created.append(name)
+        # Widen the window between finding no sheet and storing a new one.
+        time.sleep(0.001)
+        return create_header(self, name, file)
+
+    monkeypatch.setattr(ExCollection, '_create_header', _create_header)
+    names = NAMES[:4] * 8
+    barrier = Barrier(len(names))
+
+    def _get(name):
+        barrier.wait()
+        sheet = collection.get_sheet(name)
+        return name, sheet, _read_all(sheet)
+
+    with ThreadPoolExecutor(len(names)) as executor:
+        results = list(executor.map(_get, names))
+
+    for name in NAMES[:4]:
+        sheets = set(id(sheet) for n, sheet, _ in results if n == name)
+        assert len(sheets) == 1
+    assert sorted(created) == sorted(NAMES[:4])
+    assert all(values == list(range(ROW_COUNT)) for _, _, values in results)
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+from pysaintcoinach.file import ParallelBlockDecompressor
+from pysaintcoinach.pack import PackCollection
+
+
+# Several blocks' worth of data that does not compress to nothing.
+DATA = bytes((i * 7 + (i >> 9)) & 0xFF for i in range(0x14000))
+FILES = {
+    'exd/large.exd': DATA,
+    'exd/stored.exd': DATA[:0x500],
+}
+
+
+@pytest.fixture(params=[True, False], ids=['deflated', 'stored'])
+def sqpack(request, make_sqpack):
+    return make_sqpack(FILES, compress=request.param)
+
+
+def test_get_data(sqpack):
+    collection = PackCollection(sqpack)
+    try:
+        for path, data in FILES.items():
+            assert collection.get_file(path).get_data() == data
+    finally:
+        collection.close()
+
+
+def test_parallel_decompressor_matches_serial(sqpack):
+    decompressor = ParallelBlockDecompressor(max_workers=2, threshold=0)
+    collection = PackCollection(sqpack, decompressor=decompressor, payload_cache_size=0)
+    try:
+        for path, data in FILES.items():
+            assert collection.get_file(path).get_data() == data
+    finally:
+        collection.close()
+        decompressor.shutdown()
+
+
+def test_open_streams_and_seeks(sqpack):
+    collection = PackCollection(sqpack)
+    try:
+        with collection.get_file('exd/large.exd').open() as stream:
+            assert len(stream) == len(DATA)
+            stream.seek(0x3FF0)
+            assert stream.read(0x20) == DATA[0x3FF0:0x4010]
+            stream.seek(-0x10, io.SEEK_END)
+            assert stream.read() == DATA[-0x10:]
+            stream.seek(0)
+            assert stream.read() == DATA
+    finally:
+        collection.close()
@@ -0,0 +1,139 @@
+import logging
+import os
+import random
+import struct
+
+from pysaintcoinach.indexcache import IndexCache
+from pysaintcoinach.indexfile import IndexTable
+
+
+SHEETS = [('Action', 0), ('Item', 1), ('quest/001/ClsArc001_00001', -1), ('ÉèÑ', 12345)]
+
+
+def _index_buffer(count, has_directory_keys):
+    rng = random.Random(0x1DC)
+    if has_directory_keys:
+        return b''.join(struct.pack('<LLL4x', rng.getrandbits(32), rng.getrandbits(32), rng.getrandbits(32))
+                        for _ in range(count))
+    return b''.join(struct.pack('<LL', rng.getrandbits(32), rng.getrandbits(32)) for _ in range(count))
+
+
+def _parse(buffer, has_directory_keys):
+    return IndexTable.read(buffer, 0x10 if has_directory_keys else 0x08, has_directory_keys)
+
+
+def _as_lists(table):
+    return (list(table.file_keys),
+            None if table.directory_keys is None else list(table.directory_keys),
+            list(table.dat_files),
+            list(table.offsets))
+
+
+class _Factory(object):
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def _source(tmp_path, data=b'index'):
+    path = tmp_path.joinpath('000000.win32.index')
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_table_round_trip(tmp_path):
+    source = _source(tmp_path)
+    for has_directory_keys in (True, False):
+        cache = IndexCache(tmp_path.joinpath('cache-%u' % has_directory_keys), '2024.01.01')
+        expected = _parse(_index_buffer(300, has_directory_keys), has_directory_keys)
+        factory = _Factory(expected)
+
+        assert cache.get_table(source, has_directory_keys, factory) is expected
+        cached = cache.get_table(source, has_directory_keys, factory)
+
+        assert factory.calls == 1
+        assert cached is not expected
+        assert _as_lists(cached) == _as_lists(expected)
+        assert cached.find(expected.file_keys[7]) == expected.find(expected.file_keys[7])
+
+
+def test_table_rebuilt_when_source_changes(tmp_path):
+    source = _source(tmp_path)
+    cache = IndexCache(tmp_path.joinpath('cache'))
+    factory = _Factory(_parse(_index_buffer(10, True), True))
+
+    cache.get_table(source, True, factory)
+    cache.get_table(source, True, factory)
+    assert factory.calls == 1
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    cache.get_table(source, True, factory)
+    assert factory.calls == 2
+
+    with open(source, 'ab') as f:
+        f.write(b'more')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    cache.get_table(source, True, factory)
+    assert factory.calls == 3
+
+    cache.get_table(source, True, factory)
+    assert factory.calls == 3
+
+
+def test_table_rebuilt_for_other_game_version(tmp_path):
+    source = _source(tmp_path)
+    directory = tmp_path.joinpath('cache')
+    factory = _Factory(_parse(_index_buffer(10, True), True))
+
+    IndexCache(directory, '2024.01.01').get_table(source, True, factory)
+    IndexCache(directory, '2024.01.01').get_table(source, True, factory)
+    assert factory.calls == 1
+
+    IndexCache(directory, '2024.02.01').get_table(source, True, factory)
+    assert factory.calls == 2
+
+
+def test_corrupt_cache_is_ignored(tmp_path, caplog):
+    source = _source(tmp_path)
+    cache = IndexCache(tmp_path.joinpath('cache'))
+    expected = _parse(_index_buffer(100, True), True)
+    factory = _Factory(expected)
+    cache.get_table(source, True, factory)
+
+    cache_path = next(cache.directory.glob('*.idx'))
+    data = cache_path.read_bytes()
+    for corrupt in (data[:len(data) // 2], b'', b'garbage'):
+        cache_path.write_bytes(corrupt)
+        with caplog.at_level(logging.WARNING, logger='pysaintcoinach.indexcache'):
+            caplog.clear()
+            table = cache.get_table(source, True, factory)
+        assert _as_lists(table) == _as_lists(expected)
+        if len(corrupt) > IndexCache._HEADER.size or len(corrupt) == 0:
+            assert 'Ignoring index cache' in caplog.text
+
+    # Each bad entry was replaced by a good one.
+    assert _as_lists(cache.get_table(source, True, factory)) == _as_lists(expected)
+    assert factory.calls == 4
+
+
+def test_sheet_list_round_trip(tmp_path, caplog):
+    source = _source(tmp_path)
+    cache = IndexCache(tmp_path.joinpath('cache'), '2024.01.01')
+    factory = _Factory(SHEETS)
+
+    assert cache.get_sheet_list(source, factory) is SHEETS
+    assert cache.get_sheet_list(source, factory) == SHEETS
+    assert factory.calls == 1
+
+    # Cut inside the last name, where decoding alone would not notice.
+    cache_path = next(cache.directory.glob('*.exl'))
+    cache_path.write_bytes(cache_path.read_bytes()[:-2])
+    with caplog.at_level(logging.WARNING, logger='pysaintcoinach.indexcache'):
+        assert cache.get_sheet_list(source, factory) == SHEETS
+    assert 'Ignoring sheet list cache' in caplog.text
+    assert factory.calls == 2
@@ -0,0 +1,66 @@
+import random
+import struct
+
+from pysaintcoinach.indexfile import IndexTable, build_name_table
+from pysaintcoinach.pack import PackCollection, PackIdentifier
+
+from sqpack_builder import write_pack
+
+
+def _entries(count):
+    rng = random.Random(0x5153)
+    return [(rng.getrandbits(32), rng.getrandbits(32), rng.getrandbits(32)) for _ in range(count)]
+
+
+def test_read_sorts_by_directory_and_file_key():
+    entries = _entries(500)
+    buffer = b''.join(struct.pack('<LLL4x', *entry) for entry in entries)
+
+    table = IndexTable.read(buffer, 0x10, True)
+
+    expected = sorted(entries, key=lambda e: (e[1], e[0]))
+    assert list(table.file_keys) == [e[0] for e in expected]
+    assert list(table.directory_keys) == [e[1] for e in expected]
+    assert list(table.dat_files) == [(e[2] & 0x7) >> 1 for e in expected]
+    assert list(table.offsets) == [(e[2] & 0xFFFFFFF8) << 3 for e in expected]
+
+
+def test_read_index2_table():
+    entries = sorted(_entries(500))
+    buffer = b''.join(struct.pack('<LL', file_key, base) for file_key, _, base in entries)
+
+    table = IndexTable.read(buffer, 0x08, False)
+
+    assert table.directory_keys is None
+    assert list(table.file_keys) == [e[0] for e in entries]
+    assert list(table.dat_files) == [(e[2] & 0x7) >> 1 for e in entries]
+    assert list(table.offsets) == [(e[2] & 0xFFFFFFF8) << 3 for e in entries]
+    assert table.find(entries[10][0]) == 10
+
+
+def test_match_names(tmp_path):
+    files = {
+        'ui/icon/000001.tex': b'1' * 0x80,
+        'ui/icon/000002.tex': b'2' * 0x80,
+        'ui/icon/000003_hr1.tex': b'3' * 0x80,
+        'ui/uld/x.uld': b'U' * 0x80,
+    }
+    write_pack(tmp_path, PackIdentifier('ui', 'ffxiv', 0), files)
+    collection = PackCollection(tmp_path)
+    try:
+        source = collection.get_pack('ui/icon/000001.tex').source
+        directory = source.get_directory('ui/icon')
+        candidates = ['000001.tex', '000003_hr1.tex', '000004.tex', 'x.uld']
+
+        matched = directory.match_names(candidates)
+        assert sorted(matched.values()) == ['000001.tex', '000003_hr1.tex']
+        assert directory.match_names(build_name_table(candidates)) == matched
+        assert all(directory.file_exists(name) for name in matched.values())
+        assert not directory.file_exists('000004.tex')
+
+        assert directory.file_keys is directory.file_keys
+        assert source.get_file_keys('ui/icon') is directory.file_keys
+        assert len(directory.file_keys) == 3
+        assert source.get_file_keys('ui/missing') == frozenset()
+    finally:
+        collection.close()
@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+from pysaintcoinach import inventory as inventory_module
+from pysaintcoinach.cmd import IXivShellCommandMixin
+from pysaintcoinach.ex.language import Language
+from pysaintcoinach.inventory import Inventory, InventoryDiff
+from pysaintcoinach.pack import PackCollection, PackIdentifier
+
+from conftest import EXD_PACK
+from sqpack_builder import write_pack
+
+
+FILES = {
+    'exd/a.exh': b'A' * 0x300,
+    'exd/b.exd': bytes(range(256)) * 0x40,
+    'exd/c.exd': b'C' * 0x100,
+}
+
+
+def test_diff_counts_file_entries(make_sqpack):
+    old = make_sqpack(FILES)
+    new_files = dict(FILES)
+    new_files['exd/a.exh'] = b'A' * 0x200
+    new_files['exd/b.exd'] = bytes(range(255, -1, -1)) * 0x80
+    del new_files['exd/c.exd']
+    new_files['exd/d.exd'] = b'D' * 0x80
+    new = make_sqpack(new_files)
+
+    diff = InventoryDiff(old, new)
+
+    assert len(diff) == 4
+    assert len(diff.added[EXD_PACK]) == 1
+    assert len(diff.removed[EXD_PACK]) == 1
+    assert len(diff.changed[EXD_PACK]) == 2
+    assert diff.is_modified('exd/a.exh')
+    assert diff.is_modified('exd/b.exd')
+    assert diff.is_modified('exd/d.exd')
+    assert not diff.is_modified('exd/c.exd')
+
+
+def test_diff_of_identical_roots_is_empty(make_sqpack):
+    diff = InventoryDiff(make_sqpack(FILES), make_sqpack(FILES))
+
+    assert len(diff) == 0
+    assert diff.changed == {}
+
+
+def test_diff_detects_moved_file_of_same_size(make_sqpack):
+    # Stored blocks of equal length give identical headers, so only the
+    # new location tells the change apart.
+    old = make_sqpack(FILES, compress=False)
+    new_files = dict(FILES)
+    new_files['exd/b.exd'] = bytes(reversed(FILES['exd/b.exd']))
+    new = make_sqpack(new_files, compress=False, dat_offset=0x1000)
+
+    diff = InventoryDiff(old, new)
+
+    assert diff.is_modified('exd/b.exd')
+    assert len(diff.changed[EXD_PACK]) == len(FILES)
+
+
+def test_load_closes_scanned_collection(make_sqpack, monkeypatch):
+    closed = []
+    close = PackCollection.close
+
+    def _close(self):
+        closed.append(self)
+        close(self)
+
+    monkeypatch.setattr(PackCollection, 'close', _close)
+    inventory = Inventory.load(make_sqpack(FILES))
+
+    assert len(inventory) == len(FILES)
+    assert len(closed) == 1
+    assert all(len(pack._data_files) == 0 for pack in closed[0].packs)
+
+
+def test_write_and_read_round_trip(make_sqpack, tmp_path):
+    inventory = Inventory.load(make_sqpack(FILES))
+    path = tmp_path.joinpath('inventory.bin')
+    inventory.write(path)
+
+    assert list(Inventory.read(path)) == list(inventory)
+
+
+def test_modified_sheets_scan_only_exd_pack(make_sqpack, monkeypatch):
+    UI_PACK = PackIdentifier('ui', 'ffxiv', 0)
+    sheet_files = {
+        'exd/a.exh': b'A' * 0x300,
+        'exd/a_0_en.exd': b'a' * 0x100,
+        'exd/b.exh': b'B' * 0x300,
+        'exd/b_0_en.exd': b'b' * 0x100,
+    }
+    old = make_sqpack(sheet_files)
+    write_pack(old, UI_PACK, {'ui/icon/x.tex': b'X' * 0x100})
+    new_files = dict(sheet_files)
+    new_files['exd/b_0_en.exd'] = b'B' * 0x180
+    new = make_sqpack(new_files)
+    write_pack(new, UI_PACK, {'ui/icon/x.tex': b'Y' * 0x200})
+
+    scanned = []
+    scan_pack = inventory_module.scan_pack
+
+    def _scan_pack(pack):
+        scanned.append(pack.id)
+        return scan_pack(pack)
+
+    closed = []
+    close = PackCollection.close
+
+    def _close(self):
+        closed.append(self)
+        close(self)
+
+    monkeypatch.setattr(inventory_module, 'scan_pack', _scan_pack)
+    monkeypatch.setattr(PackCollection, 'close', _close)
+
+    header = SimpleNamespace(data_file_ranges=[range(0, 1)], available_languages=[Language.english])
+    command = IXivShellCommandMixin()
+    command._realm = SimpleNamespace(
+        packs=PackCollection(new),
+        game_data=SimpleNamespace(get_sheet=lambda name: SimpleNamespace(header=header)))
+    try:
+        modified = command._get_modified_sheets(['a', 'b'], str(old))
+    finally:
+        command._realm.packs.close()
+
+    assert modified == ['b']
+    assert scanned == [EXD_PACK, EXD_PACK]
+    assert len(closed) == 2
+    assert all(len(pack._data_files) == 0 for pack in closed[0].packs)
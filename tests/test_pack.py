@@ -0,0 +1,174 @@
+from pysaintcoinach import indexfile
+from pysaintcoinach.pack import PackCollection, PackIdentifier
+
+from sqpack_builder import write_pack
+
+
+FILES = {
+    'exd/a.exh': b'A' * 0x300,
+    'exd/b.exd': bytes(range(256)) * 0x40,
+    'exd/sub/c.exd': bytes(range(0, 256, 3)) * 0x20,
+    'exd/sub/d.exd': b'D' * 0x5000,
+}
+
+
+def _extract(collection, paths, **kwargs):
+    extracted = {}
+
+    def _sink(path, data):
+        extracted[path] = bytes(data)
+
+    missing = collection.extract_many(paths, _sink, **kwargs)
+    return extracted, missing
+
+
+def test_extract_many(make_sqpack):
+    collection = PackCollection(make_sqpack(FILES))
+    try:
+        paths = list(FILES) + ['exd/missing.exd', 'nowhere/x.dat']
+        extracted, missing = _extract(collection, reversed(paths))
+    finally:
+        collection.close()
+
+    assert extracted == FILES
+    assert sorted(missing) == ['exd/missing.exd', 'nowhere/x.dat']
+
+
+def test_extract_many_in_small_spans(make_sqpack):
+    collection = PackCollection(make_sqpack(FILES))
+    try:
+        extracted, missing = _extract(collection, FILES, max_gap=0, max_span=0)
+    finally:
+        collection.close()
+
+    assert extracted == FILES
+    assert missing == []
+
+
+def test_extract_many_to_directory(make_sqpack, tmp_path):
+    collection = PackCollection(make_sqpack(FILES))
+    try:
+        assert collection.extract_many(FILES, tmp_path.joinpath('out')) == []
+    finally:
+        collection.close()
+
+    for path, data in FILES.items():
+        assert tmp_path.joinpath('out', path).read_bytes() == data
+
+
+def test_extract_many_uses_blob_store(make_sqpack, tmp_path):
+    data_directory = make_sqpack(FILES)
+    blob_directory = tmp_path.joinpath('blobs')
+
+    collection = PackCollection(data_directory, blob_directory=blob_directory)
+    try:
+        _extract(collection, FILES)
+        for path, data in FILES.items():
+            assert collection.blob_store.get(collection.get_file(path).blob_key) == data
+    finally:
+        collection.close()
+
+    collection = PackCollection(data_directory, blob_directory=blob_directory)
+    collection.enable_statistics()
+    try:
+        extracted, _ = _extract(collection, FILES)
+        statistics = collection.get_statistics()
+    finally:
+        collection.close()
+
+    assert extracted == FILES
+    assert sum(counters['blocks_inflated'] for counters in statistics.values()) == 0
+
+
+def test_keep_in_memory(make_sqpack):
+    data_directory = make_sqpack(FILES, compress=False)
+    collection = PackCollection(data_directory, keep_in_memory=True, payload_cache_size=0)
+    try:
+        files = dict((path, collection.get_file(path)) for path in FILES)
+        pack = collection.get_pack('exd/a.exh')
+        assert pack.keep_in_memory
+        assert len(pack._buffers) == 1
+        assert dict((path, file.get_data()) for path, file in files.items()) == FILES
+
+        # Turning it off on a live collection drops the mapping, and reads
+        # go through file handles from then on.
+        collection.keep_in_memory = False
+        assert len(pack._buffers) == 0
+        assert dict((path, file.get_data()) for path, file in files.items()) == FILES
+
+        collection.keep_in_memory = True
+        assert files['exd/b.exd'].get_data() == FILES['exd/b.exd']
+        assert len(pack._buffers) == 1
+    finally:
+        # Files still exist, which must not keep the mapping from closing.
+        collection.close()
+    assert len(pack._buffers) == 0
+    assert files['exd/a.exh'].get_data() == FILES['exd/a.exh']
+    collection.close()
+
+
+def test_keep_in_memory_matches_file_handles(make_sqpack):
+    data_directory = make_sqpack(FILES)
+    results = []
+    for keep_in_memory in (True, False):
+        collection = PackCollection(data_directory, keep_in_memory=keep_in_memory)
+        try:
+            results.append(dict((path, bytes(collection.get_file(path).get_data())) for path in FILES))
+        finally:
+            collection.close()
+    assert results == [FILES, FILES]
+
+
+UI_FILES = {
+    'ui/icon/000001.tex': b'I' * 0x100,
+    'ui/uld/x.uld': b'U' * 0x80,
+}
+
+
+def test_files_exist_across_packs(make_sqpack):
+    data_directory = make_sqpack(FILES)
+    write_pack(data_directory, PackIdentifier('ui', 'ffxiv', 0), UI_FILES)
+    paths = ['ui/icon/000001.tex', 'exd/missing.exd', 'exd/b.exd', 'exd', 'ui/uld/y.uld',
+             'exd/sub/c.exd', 'nowhere/x.dat', 'ui/uld/x.uld', 'missing/a.exd', 'exd/b.exd']
+
+    collection = PackCollection(data_directory)
+    try:
+        exists = collection.files_exist(paths)
+        resolved = collection.resolve_many(paths)
+        singly = [collection.get_pack(path) is not None and collection.get_pack(path).file_exists(path)
+                  for path in paths]
+        found = [path for path in paths if collection.get_file(path) is not None]
+    finally:
+        collection.close()
+
+    assert exists == [True, False, True, False, False, True, False, True, False, True]
+    assert exists == singly
+    assert [path for path, e in zip(paths, exists) if e] == found
+    assert resolved[3] is None and resolved[6] is None
+    assert resolved[0][0] == PackIdentifier('ui', 'ffxiv', 0)
+    assert resolved[2] == resolved[9]
+
+
+def test_resolve_many_remembers_paths(make_sqpack, monkeypatch):
+    collection = PackCollection(make_sqpack(FILES))
+    try:
+        first = collection.resolve_many(FILES)
+
+        hashed = []
+        compute_hash = indexfile._compute_hash
+
+        def _compute_hash(s):
+            hashed.append(s)
+            return compute_hash(s)
+
+        monkeypatch.setattr(indexfile, '_compute_hash', _compute_hash)
+        assert collection.resolve_many(FILES) == first
+        assert collection.files_exist(FILES) == [True] * len(FILES)
+        assert hashed == []
+
+        directory_key = first[2][1][0]
+        assert collection.resolve_many(['exd/sub/e.exd']) == \
+            [(first[0][0], (directory_key, compute_hash('e.exd')))]
+        assert hashed == ['exd/sub', 'e.exd']
+    finally:
+        collection.close()
@@ -0,0 +1,42 @@
+from pysaintcoinach.indexfile import _compute_hash
+from pysaintcoinach.pathdictionary import PathDictionary
+
+
+PATHS = ['exd/root.exl', 'exd/item.exh', 'exd/item_0_en.exd', 'music/ffxiv/bgm_system_title.scd',
+         'ui/icon/000000/000001.tex', 'ui/icon/000000/000002.tex']
+
+
+def _keys(path):
+    last_separator = path.rindex('/')
+    return _compute_hash(path[:last_separator]), _compute_hash(path[last_separator + 1:])
+
+
+def _check(dictionary, paths):
+    assert len(dictionary) == len(set(paths))
+    for path in paths:
+        assert dictionary.get_path(*_keys(path)) == path
+        assert dictionary.get_path_for_hash(_compute_hash(path)) == path
+
+
+def test_lookups_after_incremental_adds():
+    dictionary = PathDictionary()
+    for path in PATHS:
+        dictionary.add_paths([path])
+        _check(dictionary, PATHS[:PATHS.index(path) + 1])
+
+    # Adding a path again is a no-op.
+    dictionary.add_paths(PATHS[:2])
+    _check(dictionary, PATHS)
+    assert dictionary.get_path(0, 0) is None
+    assert dictionary.get_path_for_hash(0) is None
+
+
+def test_write_and_read(tmp_path):
+    path = tmp_path.joinpath('paths.bin')
+    PathDictionary(PATHS).write(path)
+
+    dictionary = PathDictionary.read(path)
+    _check(dictionary, PATHS)
+
+    dictionary.add_paths(['exd/quest.exh'])
+    _check(dictionary, PATHS + ['exd/quest.exh'])
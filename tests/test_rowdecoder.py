@@ -0,0 +1,77 @@
+import struct
+
+import pytest
+
+from pysaintcoinach.ex import ExCollection
+from pysaintcoinach.pack import PackCollection
+
+from exd_builder import build_data, build_header, build_root
+
+
+# Every fixed-size type, a bool and a byte sharing one offset, a byte whose
+# bits are also read as a packed boolean, eight packed booleans sharing a
+# byte, and two strings.
+COLUMNS = [
+    (0x00, 0x00), (0x01, 0x04), (0x03, 0x04), (0x02, 0x05), (0x03, 0x06),
+    (0x1A, 0x06), (0x04, 0x08), (0x05, 0x0A), (0x06, 0x0C), (0x07, 0x10),
+    (0x09, 0x14), (0x0B, 0x18), (0x00, 0x20),
+] + [(0x19 + i, 0x07) for i in range(8)]
+FIXED_SIZE = 0x24
+
+# Flag, int8, uint8, packed bits, int16, uint16, int32, uint32, single, int64.
+ROWS = {
+    0: (0, 0, 0, 0, 0, 0, 0, 0, 0.0, 0),
+    1: (1, -128, 255, 0b10100101, -32768, 65535, -2 ** 31, 2 ** 32 - 1, -1.5, -2 ** 63),
+    2: (255, 127, 2, 0b01011010, 32767, 1, 2 ** 31 - 1, 2 ** 31, 3.25e10, 2 ** 63 - 1),
+    7: (2, -1, 1, 0xFF, -1, 0x8000, -1, 0x80000000, 2.0 ** -20, -1),
+}
+
+
+def _row(key, values):
+    first = ('first %u' % key).encode() + b'\0'
+    second = ('' if key == 0 else 'second').encode() + b'\0'
+    return struct.pack('>lBbBBhHlLfql', 0, *values, len(first)) + first + second
+
+
+FILES = {
+    'exd/root.exl': build_root({'Types': 1}),
+    'exd/types.exh': build_header(COLUMNS, FIXED_SIZE, [(0, 10)]),
+    'exd/types_0.exd': build_data(dict((key, _row(key, values)) for key, values in ROWS.items())),
+}
+
+
+@pytest.fixture
+def sheet(make_sqpack):
+    packs = PackCollection(make_sqpack(FILES))
+    yield ExCollection(packs).get_sheet('Types')
+    packs.close()
+
+
+def test_decoder_matches_columns(sheet):
+    header = sheet.header
+    decoder = header.row_decoder
+    columns = list(header.columns)
+    for key in ROWS:
+        row = sheet[key]
+        buffer = row.sheet.get_buffer()
+        expected = [column.read(buffer, row) for column in columns]
+
+        assert decoder.read_raw(buffer, row) == expected
+        assert row.get_values() == expected
+        assert row.get_values(raw=True) == expected
+        indices = [11, 0, 5, 20, 3]
+        assert decoder.read_raw(buffer, row, indices) == [expected[i] for i in indices]
+        assert all(type(a) is type(b) for a, b in zip(decoder.read_raw(buffer, row), expected))
+
+
+def test_decoder_values(sheet):
+    row = sheet[1]
+    values = row.get_values()
+
+    assert values[0] == 'first 1' and values[12] == 'second'
+    assert values[1] is True and values[2] == 1
+    assert values[3:5] == [-128, 255]
+    assert values[5] is True
+    assert values[6:12] == [-32768, 65535, -2 ** 31, 2 ** 32 - 1, -1.5, -2 ** 63]
+    assert values[13:] == [bool(0b10100101 & (1 << i)) for i in range(8)]
+    assert sheet[0].get_values()[12] == ''
@@ -0,0 +1,119 @@
+import gc
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+from pysaintcoinach.pack import PackCollection
+from pysaintcoinach.sharedstate import SharedBlobStore, SharedIndexCache, SharedPackState
+
+
+FILES = {
+    'exd/a.exh': b'A' * 0x300,
+    'exd/b.exd': bytes(range(256)) * 0x40,
+    'exd/sub/c.exd': bytes(range(0, 256, 3)) * 0x20,
+}
+
+
+def _read_in_worker(data_directory, descriptor):
+    collection = PackCollection(data_directory, shared_state=descriptor)
+    try:
+        return dict((path, collection.get_file(path).get_data()) for path in FILES)
+    finally:
+        collection.close()
+        collection.shared_state.close()
+
+
+def test_attach_at_construction(make_sqpack):
+    data_directory = make_sqpack(FILES)
+    publisher = PackCollection(data_directory)
+    state = SharedPackState.publish(publisher, payload_paths=['exd/b.exd'])
+    try:
+        collection = PackCollection(data_directory, shared_state=state.descriptor)
+        assert isinstance(collection.index_cache, SharedIndexCache)
+        assert isinstance(collection.blob_store, SharedBlobStore)
+        assert len(collection.blob_store) == 1
+
+        table = collection.get_pack('exd/a.exh').source.index.table
+        assert list(table.file_keys) == list(publisher.get_pack('exd/a.exh').source.index.table.file_keys)
+        for path, data in FILES.items():
+            assert collection.get_file(path).get_data() == data
+        collection.close()
+        collection.shared_state.close()
+    finally:
+        publisher.close()
+        state.unlink()
+
+
+def test_workers_leave_segments_in_place(make_sqpack):
+    data_directory = make_sqpack(FILES)
+    publisher = PackCollection(data_directory)
+    state = SharedPackState.publish(publisher, payload_paths=list(FILES))
+    try:
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(1) as pool:
+            assert pool.apply(_read_in_worker, (data_directory, state.descriptor)) == FILES
+        # The worker exiting must not have unlinked the segments.
+        collection = PackCollection(data_directory, shared_state=state.descriptor)
+        for path, data in FILES.items():
+            assert collection.get_file(path).get_data() == data
+        collection.close()
+        # Segments attached through SharedMemory only unmap once nothing
+        # uses their tables.
+        shared_state = collection.shared_state
+        del collection
+        gc.collect()
+        shared_state.close()
+    finally:
+        publisher.close()
+        state.unlink()
+
+
+def _force_fallback(monkeypatch, parent):
+    from multiprocessing import resource_tracker, shared_memory
+
+    class SharedMemory(shared_memory.SharedMemory):
+        # Before Python 3.13 there is no way to attach untracked.
+        def __init__(self, name=None, create=False, size=0, **kwargs):
+            if kwargs:
+                raise TypeError('unexpected keyword argument')
+            super(SharedMemory, self).__init__(name, create, size)
+
+    unregistered = []
+    monkeypatch.setattr(shared_memory, 'SharedMemory', SharedMemory)
+    monkeypatch.setitem(sys.modules, '_posixshmem', None)
+    monkeypatch.setattr(resource_tracker, 'unregister', lambda name, rtype: unregistered.append((name, rtype)))
+    monkeypatch.setattr(multiprocessing, 'parent_process', lambda: parent)
+    return unregistered
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='Windows segments are never tracked')
+@pytest.mark.parametrize('parent', [None, object()])
+def test_attach_without_posixshmem(make_sqpack, monkeypatch, parent):
+    data_directory = make_sqpack(FILES)
+    publisher = PackCollection(data_directory)
+    state = SharedPackState.publish(publisher, payload_paths=['exd/b.exd'])
+    try:
+        unregistered = _force_fallback(monkeypatch, parent)
+        collection = PackCollection(data_directory, shared_state=state.descriptor)
+        for path, data in FILES.items():
+            assert collection.get_file(path).get_data() == data
+        collection.close()
+        # Segments attached through SharedMemory only unmap once nothing
+        # uses their tables.
+        shared_state = collection.shared_state
+        del collection
+        gc.collect()
+        shared_state.close()
+    finally:
+        publisher.close()
+        monkeypatch.undo()
+        state.unlink()
+
+    if parent is None:
+        # Only a process with a tracker of its own undoes the registration.
+        assert len(unregistered) > 0
+        assert all(rtype == 'shared_memory' for _, rtype in unregistered)
+    else:
+        assert unregistered == []